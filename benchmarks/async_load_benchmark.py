@@ -0,0 +1,139 @@
+"""
+Load test: latency of cheap tool calls while heavy body searches run.
+
+Cheap `file_exists` calls are issued at a fixed rate and their latency is
+measured from the moment they were due, so time spent waiting for a blocked
+event loop is counted. The test runs three phases: idle, with concurrent async
+searches, and with searches that block the loop the way a synchronous
+`subprocess.run` grep did.
+
+Usage:
+    python benchmarks/async_load_benchmark.py --files 20000 --searches 4
+"""
+
+import argparse
+import asyncio
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_fs.tools.file_tools import FileService  # noqa: E402
+from mcp_fs.tools.search_tools import SearchService  # noqa: E402
+from mcp_fs.utils.async_utils import ToolRunner  # noqa: E402
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the async tools.")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--file-size", type=int, default=16384)
+    parser.add_argument("--searches", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--search-limit", type=int, default=2)
+    return parser.parse_args()
+
+
+def generate_tree(root: Path, files: int, file_size: int) -> Path:
+    rng = random.Random(0)
+    for i in range(files):
+        directory = root / f"dir_{i % 100}"
+        directory.mkdir(parents=True, exist_ok=True)
+        body = "".join(
+            rng.choice(string.ascii_lowercase + " \n") for _ in range(file_size)
+        )
+        (directory / f"file_{i}.txt").write_text(body)
+    return directory / f"file_{files - 1}.txt"
+
+
+def percentile(samples: list, fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def cheap_calls(
+    file_service: FileService, path: str, duration: float, interval: float
+):
+    latencies = []
+    start = time.perf_counter()
+    due = start
+    while due - start < duration:
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await file_service.file_exists(path)
+        latencies.append(time.perf_counter() - due)
+        # Do not build up a backlog when the loop was blocked.
+        due = max(due + interval, time.perf_counter())
+    return latencies
+
+
+async def heavy_searches(
+    search_service: SearchService, root: Path, count: int, stop: asyncio.Event
+):
+    async def loop_search():
+        while not stop.is_set():
+            await search_service.search_file_bodies_for_substring(root, "zzzzqqqq")
+
+    await asyncio.gather(*(loop_search() for _ in range(count)))
+
+
+async def blocking_searches(root: Path, stop: asyncio.Event):
+    while not stop.is_set():
+        subprocess.run(["grep", "-irl", "zzzzqqqq", str(root)], capture_output=True)
+        await asyncio.sleep(0)
+
+
+async def run_phase(label, file_service, path, args, background=None):
+    stop = asyncio.Event()
+    task = asyncio.create_task(background(stop)) if background else None
+    await asyncio.sleep(0.1)
+    latencies = await cheap_calls(file_service, path, args.duration, args.interval)
+    stop.set()
+    if task:
+        await task
+    print(
+        f"{label:<28} calls {len(latencies):5d}   "
+        f"p50 {percentile(latencies, 0.50) * 1000:8.2f} ms   "
+        f"p99 {percentile(latencies, 0.99) * 1000:8.2f} ms"
+    )
+
+
+async def main() -> None:
+    args = parse_arguments()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"Generating {args.files} files...")
+        probe = str(generate_tree(root, args.files, args.file_size))
+
+        tool_runner = ToolRunner(
+            concurrency_limits={"search_file_bodies_for_substring": args.search_limit}
+        )
+        file_service = FileService([root], tool_runner=tool_runner)
+        search_service = SearchService(
+            [root], use_content_index=False, tool_runner=tool_runner
+        )
+
+        await run_phase("idle", file_service, probe, args)
+        await run_phase(
+            f"{args.searches} async searches",
+            file_service,
+            probe,
+            args,
+            lambda stop: heavy_searches(search_service, root, args.searches, stop),
+        )
+        await run_phase(
+            "blocking searches",
+            file_service,
+            probe,
+            args,
+            lambda stop: blocking_searches(root, stop),
+        )
+        tool_runner.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
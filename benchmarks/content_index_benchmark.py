@@ -0,0 +1,120 @@
+"""
+Compare cold `grep -irl` searches with warm trigram content index queries.
+
+Usage:
+    python benchmarks/content_index_benchmark.py --files 20000 --queries 20
+"""
+
+import argparse
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_fs.config.constants.grep_ignore_dirs import GREP_IGNORE_DIRS  # noqa: E402
+from mcp_fs.index.content_index import ContentIndex  # noqa: E402
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the content index.")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--file-size", type=int, default=8192)
+    parser.add_argument("--fanout", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def generate_tree(root: Path, files: int, file_size: int, fanout: int, seed: int):
+    rng = random.Random(seed)
+    vocabulary = [random_word(rng) for _ in range(5000)]
+    for i in range(files):
+        directory = root / f"dir_{i % fanout}" / f"sub_{(i // fanout) % fanout}"
+        directory.mkdir(parents=True, exist_ok=True)
+        words, size = [], 0
+        while size < file_size:
+            word = rng.choice(vocabulary)
+            words.append(word)
+            size += len(word) + 1
+        (directory / f"file_{i}.txt").write_text(" ".join(words))
+    return vocabulary
+
+
+def grep_search(root: Path, text: str) -> list:
+    excluded_dirs = [
+        item for pattern in GREP_IGNORE_DIRS for item in ["--exclude-dir", pattern]
+    ]
+    result = subprocess.run(
+        ["grep", "-irl", text, str(root)] + excluded_dirs,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.splitlines()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def summarize(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<24} median {statistics.median(samples) * 1000:9.2f} ms   "
+        f"p95 {p95 * 1000:9.2f} ms"
+    )
+
+
+def main() -> None:
+    args = parse_arguments()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        print(f"Generating {args.files} files of ~{args.file_size} bytes...")
+        vocabulary = generate_tree(
+            root, args.files, args.file_size, args.fanout, args.seed
+        )
+        # Pairs of words are rare enough to give selective queries.
+        queries = [
+            f"{rng.choice(vocabulary)} {rng.choice(vocabulary)}"
+            for _ in range(args.queries)
+        ]
+
+        # Files modified within the last second are read again by the next
+        # refresh, so let their mtimes settle before building the index.
+        time.sleep(1)
+        index = ContentIndex(root, index_dir=Path(tmp) / "index")
+        build_time, _ = timed(index.refresh)
+        print(f"Initial index build: {build_time:.2f}s")
+        refresh_time, _ = timed(lambda: index.refresh(force=True))
+        print(f"Incremental refresh of an unchanged tree: {refresh_time * 1000:.2f} ms")
+
+        grep_samples, index_samples = [], []
+        for query in queries:
+            grep_time, grep_result = timed(grep_search, root, query)
+            index_time, index_result = timed(index.search, query, root)
+            if sorted(grep_result) != sorted(index_result):
+                print(f"Result mismatch for query {query!r}", file=sys.stderr)
+            grep_samples.append(grep_time)
+            index_samples.append(index_time)
+
+        summarize("grep -irl (cold)", grep_samples)
+        summarize("content index (warm)", index_samples)
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
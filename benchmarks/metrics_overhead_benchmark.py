@@ -0,0 +1,68 @@
+"""
+Per-call overhead of the tool metrics wrapper.
+
+Awaits a trivial coroutine directly and through `ToolMetrics.instrument`,
+with and without `record` calls inside, and reports the difference per call.
+
+Usage:
+    python benchmarks/metrics_overhead_benchmark.py --calls 500000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_fs.utils import metrics  # noqa: E402
+from mcp_fs.utils.metrics import ToolMetrics  # noqa: E402
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the tool metrics wrapper.")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    return parser.parse_args()
+
+
+async def bare() -> int:
+    return 0
+
+
+async def recording() -> int:
+    metrics.record(metrics.BYTES_READ, 4096)
+    metrics.record(metrics.CACHE_HITS)
+    return 0
+
+
+async def time_calls(func, calls: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls
+
+
+async def main() -> None:
+    args = parse_arguments()
+    tool_metrics = ToolMetrics()
+    baseline = await time_calls(bare, args.calls, args.repeats)
+    cases = {
+        "instrumented": tool_metrics.instrument("bare", bare),
+        "instrumented, 2 records": tool_metrics.instrument("recording", recording),
+    }
+    print(f"{'direct call':<28} {baseline * 1e6:7.3f} us")
+    for label, func in cases.items():
+        per_call = await time_calls(func, args.calls, args.repeats)
+        print(
+            f"{label:<28} {per_call * 1e6:7.3f} us  "
+            f"(+{(per_call - baseline) * 1e6:.3f} us)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Measure per-call path validation overhead of `validate_path` vs `AllowedRoots`.
+
+Usage:
+    python benchmarks/path_validation_benchmark.py --allowed-dirs 8 --calls 20000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_fs.utils.path_utils import (
+    AllowedRoots,
+    expand_path,
+    validate_path,
+)  # noqa: E402
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark path validation.")
+    parser.add_argument("--allowed-dirs", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--calls", type=int, default=20000)
+    return parser.parse_args()
+
+
+def per_call(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    args = parse_arguments()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        allowed_dirs = []
+        for i in range(args.allowed_dirs):
+            allowed_dir = Path(tmp) / f"allowed_{i}"
+            allowed_dir.mkdir()
+            allowed_dirs.append(allowed_dir)
+
+        # The last allowed directory is the worst case for a linear scan.
+        target = allowed_dirs[-1].joinpath(*[f"level_{i}" for i in range(args.depth)])
+        target.mkdir(parents=True)
+        target = target / "file.txt"
+        target.touch()
+        target_str = str(target)
+
+        allowed_roots = AllowedRoots(allowed_dirs)
+        resolved_dirs = [expand_path(dir_path) for dir_path in allowed_dirs]
+
+        results = {
+            "validate_path": per_call(
+                lambda: validate_path(target_str, allowed_dirs), args.calls
+            ),
+            "AllowedRoots.validate": per_call(
+                lambda: allowed_roots.validate(target_str), args.calls
+            ),
+            "walk filter (startswith)": per_call(
+                lambda: any(
+                    str(Path(target_str)).startswith(str(allowed_dir))
+                    for allowed_dir in resolved_dirs
+                ),
+                args.calls,
+            ),
+            "AllowedRoots.contains": per_call(
+                lambda: allowed_roots.contains(target_str), args.calls
+            ),
+        }
+
+    print(f"{args.allowed_dirs} allowed dirs, path depth {args.depth}")
+    for label, seconds in results.items():
+        print(f"{label:<26} {seconds * 1e6:9.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Body search throughput per pattern mode, and the pathological-regex case.
+
+Every case searches the same synthetic tree through the content search
+engine. Regex cases run twice, with the literal prefilter and with it
+defeated, by wrapping the pattern in an alternation that no literal can be
+extracted from. The pathological case plants a file on which a nested
+quantifier backtracks exponentially and checks that the search gives up at
+its timeout instead of hanging.
+
+Usage:
+    python benchmarks/regex_benchmark.py --shape small_files --scale 2
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_trees import TEXT_MARKER, TREE_SHAPES, generate  # noqa: E402
+from mcp_fs.search.content_search import (  # noqa: E402
+    DEFAULT_PROCESSES,
+    ContentSearchEngine,
+    SearchTimeoutError,
+)
+
+# label -> (pattern, mode)
+CASES = {
+    "literal": (TEXT_MARKER, "literal"),
+    "grep (literal)": (TEXT_MARKER, "grep"),
+    "grep (BRE)": (f"hay.*{TEXT_MARKER[3:]}", "grep"),
+    "glob": (f"hay*{TEXT_MARKER[3:]}", "glob"),
+    "regex with literal": (rf"\bhaystack\w+", "regex"),
+    "regex without literal": (r"\b[a-z]{20,}\b", "regex"),
+}
+
+PATHOLOGICAL_PATTERN = r"(a+)+$"
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark search pattern modes.")
+    parser.add_argument("--shape", choices=list(TREE_SHAPES), default="small_files")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def without_prefilter(pattern: str) -> str:
+    # An alternation has no required literal; the second branch never matches.
+    return f"(?:{pattern})|(?!x)x"
+
+
+def time_search(engine, root: Path, pattern: str, mode: str, iterations: int):
+    best = float("inf")
+    matches = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        matches = len(list(engine.iter_matches(root, pattern, mode=mode)))
+        best = min(best, time.perf_counter() - start)
+    return best, matches
+
+
+def main() -> None:
+    args = parse_arguments()
+    engine = ContentSearchEngine(processes=args.processes)
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = generate(args.shape, Path(tmp) / args.shape, args.scale, args.seed)
+        print(f"{args.shape}: {tree.files} files, {tree.bytes / 1e6:.1f} MB")
+
+        for label, (pattern, mode) in CASES.items():
+            elapsed, matches = time_search(
+                engine, tree.root, pattern, mode, args.iterations
+            )
+            print(f"{label:<36} {elapsed * 1000:9.1f} ms  {matches:6d} files")
+            if mode == "regex":
+                elapsed, matches = time_search(
+                    engine,
+                    tree.root,
+                    without_prefilter(pattern),
+                    mode,
+                    args.iterations,
+                )
+                print(
+                    f"{label + ', no prefilter':<36} {elapsed * 1000:9.1f} ms  "
+                    f"{matches:6d} files"
+                )
+
+        # Backtracking on n characters takes about 2**n steps.
+        (tree.root / "pathological.txt").write_text("a" * 40 + "!\n")
+        start = time.perf_counter()
+        try:
+            list(
+                engine.iter_matches(
+                    tree.root, PATHOLOGICAL_PATTERN, mode="regex", timeout=args.timeout
+                )
+            )
+            outcome = "finished"
+        except SearchTimeoutError:
+            outcome = "timed out"
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'pathological ' + PATHOLOGICAL_PATTERN:<36} {elapsed * 1000:9.1f} ms  "
+            f"{outcome} (timeout {args.timeout}s)"
+        )
+
+        # The pool is rebuilt after stuck workers are terminated.
+        time.sleep(1.5)
+        elapsed, matches = time_search(engine, tree.root, TEXT_MARKER, "literal", 1)
+        print(
+            f"{'literal after timeout':<36} {elapsed * 1000:9.1f} ms  {matches:6d} files"
+        )
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Time-to-first-response of a stdio server session.
+
+Each run starts `main.py --transport stdio` the way an MCP client does, sends
+`initialize` at once and times the wait for its response, then the
+`tools/list` round trip that follows. JSON-RPC is written to the server's
+stdin directly, so no client library is loaded and the timings are the
+server's alone. Spawning a bare interpreter is timed too, as a floor.
+
+To compare with another revision, check it out elsewhere and point `--repo`
+at it, e.g. `git worktree add /tmp/mcp-fs-base HEAD~1`.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 20
+    python benchmarks/startup_benchmark.py --repo /tmp/mcp-fs-base
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROTOCOL_VERSION = "2024-11-05"
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the time to the first response of a stdio server."
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument(
+        "--repo",
+        type=Path,
+        nargs="+",
+        default=[REPO_ROOT],
+        help="Checkouts to benchmark, each run with its own main.py and src/.",
+    )
+    return parser.parse_args()
+
+
+def message(
+    method: str, params: Dict[str, Any], request_id: Optional[int] = None
+) -> bytes:
+    body = {"jsonrpc": "2.0", "method": method, "params": params}
+    if request_id is not None:
+        body["id"] = request_id
+    return json.dumps(body).encode("utf-8") + b"\n"
+
+
+def read_response(server: subprocess.Popen, request_id: int) -> Dict[str, Any]:
+    while True:
+        line = server.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Server exited with code {server.wait()}.")
+        response = json.loads(line)
+        if response.get("id") == request_id:
+            return response
+
+
+def run_session(repo: Path, allowed_dir: Path, log) -> Tuple[float, float, int]:
+    """Return seconds to the `initialize` response, to the `tools/list` response, and the tool count."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(repo / "src"), env.get("PYTHONPATH")])
+    )
+    env["LOG_LEVEL"] = "WARNING"
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            str(repo / "main.py"),
+            "--transport",
+            "stdio",
+            "--allowed-dirs",
+            str(allowed_dir),
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=log,
+        env=env,
+    )
+    try:
+        server.stdin.write(
+            message(
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "startup-benchmark", "version": "0"},
+                },
+                request_id=1,
+            )
+        )
+        server.stdin.flush()
+        read_response(server, 1)
+        initialized = time.perf_counter()
+
+        server.stdin.write(message("notifications/initialized", {}))
+        server.stdin.write(message("tools/list", {}, request_id=2))
+        server.stdin.flush()
+        tools = read_response(server, 2)["result"]["tools"]
+        listed = time.perf_counter()
+    finally:
+        server.stdin.close()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+    return initialized - start, listed - initialized, len(tools)
+
+
+def interpreter_start() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def describe(samples: List[float]) -> str:
+    samples = sorted(samples)
+    p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+    return (
+        f"median {statistics.median(samples) * 1000:7.1f} ms   "
+        f"min {samples[0] * 1000:7.1f} ms   p90 {p90 * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    args = parse_arguments()
+    floor = [interpreter_start() for _ in range(args.runs)]
+    print(f"interpreter         {describe(floor)}")
+
+    with tempfile.TemporaryDirectory() as tmp, open(
+        Path(tmp) / "server.log", "w+b"
+    ) as log:
+        # Keep content indexes out of the user cache.
+        os.environ["MCP_FS_INDEX_DIR"] = str(Path(tmp) / "index")
+        for repo in args.repo:
+            first_responses: List[float] = []
+            tool_lists: List[float] = []
+            try:
+                for run in range(args.warmup + args.runs):
+                    log.seek(0)
+                    log.truncate()
+                    first_response, tool_list, tools = run_session(
+                        repo.resolve(), Path(tmp), log
+                    )
+                    if run >= args.warmup:
+                        first_responses.append(first_response)
+                        tool_lists.append(tool_list)
+            except Exception:
+                log.seek(0)
+                sys.stderr.write(log.read().decode("utf-8", "replace"))
+                raise
+            print(f"{repo.resolve()} ({tools} tools)")
+            print(f"  first response    {describe(first_responses)}")
+            print(f"  tools/list        {describe(tool_lists)}")
+
+
+if __name__ == "__main__":
+    main()
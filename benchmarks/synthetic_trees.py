@@ -0,0 +1,187 @@
+"""
+Synthetic directory trees for the benchmarks.
+
+Every shape plants the same markers so the same tool calls work on all of
+them: file names containing `NAME_MARKER`, file bodies containing
+`TEXT_MARKER`, and a small text file to read. `scale` multiplies the size
+of every shape.
+
+Shapes:
+    deep           a few long directory chains
+    wide           one directory with many entries
+    small_files    many small files spread over a two-level tree
+    huge_files     a handful of large files
+    symlink_maze   directories full of symlinks, including cycles and links
+                   leaving the tree
+    ignored_dirs   most of the content below GREP_IGNORE_DIRS directories
+    build_artifacts
+                   sources next to large object files and archives that are
+                   not in ignored directories
+"""
+
+import os
+import random
+import string
+import textwrap
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple
+
+
+NAME_MARKER = "needle"
+TEXT_MARKER = "haystackneedle"
+
+_BLOCK_SIZE = 1024 * 1024
+
+
+class SyntheticTree(NamedTuple):
+    shape: str
+    root: Path
+    sample_dir: Path
+    sample_file: Path
+    files: int
+    bytes: int
+
+
+def _body(rng: random.Random, words: List[str], size: int, marked: bool) -> str:
+    if size > _BLOCK_SIZE:
+        # Repeat one random block so huge files are cheap to generate.
+        block = _body(rng, words, _BLOCK_SIZE, False)
+        body = block * (size // len(block))
+        return body + (f"{TEXT_MARKER}\n" if marked else "")
+    text = " ".join(rng.choices(words, k=size // 6 + 1))
+    lines = textwrap.wrap(text[:size], 80) or [""]
+    if marked:
+        lines[rng.randrange(len(lines))] += f" {TEXT_MARKER}"
+    return "\n".join(lines) + "\n"
+
+
+class _Builder:
+    def __init__(self, shape: str, root: Path, seed: int):
+        self.shape = shape
+        self.root = root
+        self.rng = random.Random(seed)
+        self.words = [
+            "".join(self.rng.choices(string.ascii_lowercase, k=self.rng.randint(2, 9)))
+            for _ in range(2000)
+        ]
+        self.files = 0
+        self.bytes = 0
+        self.sample_file = None
+
+    def write(self, directory: Path, size: int) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        marked = self.files % 10 == 0
+        name = f"{NAME_MARKER}_{self.files}.txt" if marked else f"file_{self.files}.txt"
+        path = directory / name
+        body = _body(self.rng, self.words, size, marked)
+        path.write_text(body)
+        self.files += 1
+        self.bytes += len(body)
+        if self.sample_file is None:
+            self.sample_file = path
+        return path
+
+    def write_binary(self, directory: Path, size: int, compressed: bool) -> Path:
+        # Random bytes contain NULs; the marker makes an unsniffed scan match.
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"artifact_{self.files}.{'gz' if compressed else 'o'}"
+        header = b"\x1f\x8b\x08\x00" if compressed else b"\x7fELF"
+        path.write_bytes(header + self.rng.randbytes(size) + TEXT_MARKER.encode())
+        self.files += 1
+        self.bytes += size
+        return path
+
+    def done(self, sample_dir: Path) -> SyntheticTree:
+        return SyntheticTree(
+            self.shape, self.root, sample_dir, self.sample_file, self.files, self.bytes
+        )
+
+
+def deep(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("deep", root, seed)
+    for chain in range(4):
+        directory = root / f"chain_{chain}"
+        for level in range(50 * scale):
+            directory = directory / f"level_{level}"
+            builder.write(directory, 512)
+    return builder.done(root / "chain_0")
+
+
+def wide(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("wide", root, seed)
+    directory = root / "wide"
+    for _ in range(2000 * scale):
+        builder.write(directory, 256)
+    for i in range(100 * scale):
+        (directory / f"subdir_{i}").mkdir()
+    return builder.done(directory)
+
+
+def small_files(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("small_files", root, seed)
+    for i in range(5000 * scale):
+        builder.write(root / f"dir_{i % 50}" / f"sub_{(i // 50) % 20}", 1024)
+    return builder.done(root / "dir_0")
+
+
+def huge_files(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("huge_files", root, seed)
+    builder.write(root, 2048)
+    for _ in range(4):
+        builder.write(root / "huge", 16 * 1024 * 1024 * scale)
+    return builder.done(root / "huge")
+
+
+def symlink_maze(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("symlink_maze", root, seed)
+    rooms = [root / f"room_{i}" for i in range(20 * scale)]
+    for room in rooms:
+        for _ in range(20):
+            builder.write(room, 512)
+    outside = root.parent / f"{root.name}_outside"
+    outside.mkdir(exist_ok=True)
+    (outside / f"{NAME_MARKER}_outside.txt").write_text(TEXT_MARKER)
+    for i, room in enumerate(rooms):
+        os.symlink(rooms[(i + 1) % len(rooms)], room / "next")
+        os.symlink(room, room / "self")
+        os.symlink(outside, room / "outside")
+        os.symlink(root / "missing", room / "dangling")
+        os.symlink(builder.sample_file, room / f"{NAME_MARKER}_link.txt")
+    return builder.done(rooms[0])
+
+
+def ignored_dirs(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("ignored_dirs", root, seed)
+    for i in range(200 * scale):
+        builder.write(root / "src" / f"pkg_{i % 10}", 1024)
+    for ignored in ("node_modules", ".git", "build", "__pycache__", ".venv"):
+        for i in range(1000 * scale):
+            builder.write(root / ignored / f"dep_{i % 40}", 1024)
+    return builder.done(root / "src")
+
+
+def build_artifacts(root: Path, scale: int, seed: int = 0) -> SyntheticTree:
+    builder = _Builder("build_artifacts", root, seed)
+    for i in range(200 * scale):
+        builder.write(root / "src" / f"pkg_{i % 10}", 1024)
+    for i in range(200 * scale):
+        builder.write_binary(
+            root / "artifacts" / f"lib_{i % 10}", 256 * 1024, compressed=i % 4 == 0
+        )
+    return builder.done(root / "src")
+
+
+TREE_SHAPES: Dict[str, Callable[..., SyntheticTree]] = {
+    "deep": deep,
+    "wide": wide,
+    "small_files": small_files,
+    "huge_files": huge_files,
+    "symlink_maze": symlink_maze,
+    "ignored_dirs": ignored_dirs,
+    "build_artifacts": build_artifacts,
+}
+
+
+def generate(shape: str, root: Path, scale: int = 1, seed: int = 0) -> SyntheticTree:
+    root.mkdir(parents=True, exist_ok=True)
+    return TREE_SHAPES[shape](root, scale, seed)
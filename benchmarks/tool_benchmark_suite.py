@@ -0,0 +1,410 @@
+"""
+Benchmark every tool against synthetic trees, directly and over stdio.
+
+For each tree shape (see `synthetic_trees.py`) every tool is called
+`--iterations` times after a short warm-up, either on the service objects
+in this process (`direct`) or through a server subprocess speaking MCP over
+stdio (`stdio`). Latency percentiles, throughput and peak RSS are written to
+a JSON file so runs of different versions can be compared.
+
+Usage:
+    python benchmarks/tool_benchmark_suite.py --output results.json
+    python benchmarks/tool_benchmark_suite.py --shapes deep wide --transports direct
+"""
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_trees import (  # noqa: E402
+    NAME_MARKER,
+    TEXT_MARKER,
+    TREE_SHAPES,
+    SyntheticTree,
+    generate,
+)
+from mcp_fs.tools.directory_tools import DirectoryService  # noqa: E402
+from mcp_fs.tools.file_tools import FileService  # noqa: E402
+from mcp_fs.tools.search_tools import SearchService  # noqa: E402
+from mcp_fs.utils.async_utils import ToolRunner  # noqa: E402
+from mcp_fs.utils.path_utils import AllowedRoots  # noqa: E402
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+EDIT_MARKER = "edit-me"
+
+
+def edit_target(scratch: Path, i: int) -> Dict[str, Any]:
+    """Write a fresh 1 MB file with one edit site, so every call has work to do."""
+    path = scratch / f"edit_{i % 10}.txt"
+    filler = "x" * 63 + "\n"
+    path.write_text(filler * 8192 + EDIT_MARKER + "\n" + filler * 8192)
+    return {
+        "file_path": str(path),
+        "edits": [{"old_text": EDIT_MARKER, "new_text": f"edited {i}"}],
+    }
+
+
+# label -> (tool name, arguments for iteration i)
+ToolCase = Tuple[str, Callable[[SyntheticTree, Path, List[str], int], Dict[str, Any]]]
+
+TOOL_CASES: Dict[str, ToolCase] = {
+    "list_directory": (
+        "list_directory",
+        lambda tree, scratch, files, i: {"dir_path": str(tree.sample_dir)},
+    ),
+    "list_directory_detailed": (
+        "list_directory_detailed",
+        lambda tree, scratch, files, i: {
+            "dir_path": str(tree.sample_dir),
+            "depth": 2,
+            "sort_by": "size",
+        },
+    ),
+    "directory_tree": (
+        "directory_tree",
+        lambda tree, scratch, files, i: {"dir_path": str(tree.root)},
+    ),
+    "create_directory": (
+        "create_directory",
+        lambda tree, scratch, files, i: {"dir_path": str(scratch / f"dir_{i}")},
+    ),
+    "file_exists": (
+        "file_exists",
+        lambda tree, scratch, files, i: {"file_path": str(tree.sample_file)},
+    ),
+    "read_file": (
+        "read_file",
+        lambda tree, scratch, files, i: {"file_path": files[i % len(files)]},
+    ),
+    "read_file_range": (
+        "read_file_range",
+        lambda tree, scratch, files, i: {
+            "file_path": files[i % len(files)],
+            "offset": 0,
+            "length": 65536,
+        },
+    ),
+    "read_many_files": (
+        "read_many_files",
+        lambda tree, scratch, files, i: {"file_paths": files[:20]},
+    ),
+    "write_file": (
+        "write_file",
+        lambda tree, scratch, files, i: {
+            "file_path": str(scratch / f"write_{i % 10}.txt"),
+            "content": "x" * 4096,
+        },
+    ),
+    "append_to_file": (
+        "append_to_file",
+        lambda tree, scratch, files, i: {
+            "file_path": str(scratch / "append.txt"),
+            "content": f"line {i}\n",
+        },
+    ),
+    "apply_edits": (
+        "apply_edits",
+        lambda tree, scratch, files, i: edit_target(scratch, i),
+    ),
+    "find_files_with_substring_in_path": (
+        "find_files_with_substring_in_path",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "substring": NAME_MARKER,
+        },
+    ),
+    "find_files_with_substring_in_path[glob]": (
+        "find_files_with_substring_in_path",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "substring": f"*{NAME_MARKER}*.txt",
+            "mode": "glob",
+        },
+    ),
+    "fuzzy_find_files": (
+        "fuzzy_find_files",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "query": NAME_MARKER,
+        },
+    ),
+    "search_file_bodies_for_substring": (
+        "search_file_bodies_for_substring",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "text": TEXT_MARKER,
+        },
+    ),
+    "search_file_bodies_for_substring[regex]": (
+        "search_file_bodies_for_substring",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "text": rf"\b{TEXT_MARKER[:8]}\w+",
+            "mode": "regex",
+        },
+    ),
+    "search_file_bodies_for_substring[context]": (
+        "search_file_bodies_for_substring",
+        lambda tree, scratch, files, i: {
+            "search_path": str(tree.root),
+            "text": TEXT_MARKER,
+            "context_lines": 2,
+        },
+    ),
+}
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark every tool against synthetic directory trees."
+    )
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(TREE_SHAPES), default=list(TREE_SHAPES)
+    )
+    parser.add_argument(
+        "--transports",
+        nargs="+",
+        choices=["direct", "stdio"],
+        default=["direct", "stdio"],
+    )
+    parser.add_argument("--tools", nargs="+", choices=list(TOOL_CASES))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    return parser.parse_args()
+
+
+def peak_rss_bytes(who: int) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"calls": 0, "errors": errors}
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "throughput_per_s": len(latencies) / elapsed if elapsed else None,
+    }
+
+
+async def measure(
+    call: Callable[[str, Dict[str, Any]], Awaitable[bool]],
+    tree: SyntheticTree,
+    scratch: Path,
+    files: List[str],
+    labels: List[str],
+    args: argparse.Namespace,
+) -> Dict[str, dict]:
+    """Run every tool case through `call`, which returns False on a tool error."""
+    results = {}
+    for label in labels:
+        tool_name, make_arguments = TOOL_CASES[label]
+        for i in range(args.warmup):
+            await call(tool_name, make_arguments(tree, scratch, files, -1 - i))
+
+        latencies, errors = [], 0
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            arguments = make_arguments(tree, scratch, files, i)
+            call_start = time.perf_counter()
+            ok = await call(tool_name, arguments)
+            latencies.append(time.perf_counter() - call_start)
+            errors += not ok
+        results[label] = summarize(latencies, errors, time.perf_counter() - start)
+        print(
+            f"  {label:<44} p50 {results[label].get('p50_ms', 0):9.2f} ms   "
+            f"p99 {results[label].get('p99_ms', 0):9.2f} ms   errors {errors}"
+        )
+    return results
+
+
+def build_services(allowed_dirs: List[Path]) -> list:
+    allowed_roots = AllowedRoots(allowed_dirs)
+    tool_runner = ToolRunner()
+    return [
+        DirectoryService(
+            allowed_dirs, allowed_roots=allowed_roots, tool_runner=tool_runner
+        ),
+        FileService(allowed_dirs, allowed_roots=allowed_roots, tool_runner=tool_runner),
+        SearchService(
+            allowed_dirs, allowed_roots=allowed_roots, tool_runner=tool_runner
+        ),
+    ]
+
+
+def shutdown_services(services: list) -> None:
+    services[0].tool_runner.shutdown()
+    services[2].content_search.shutdown()
+
+
+def tool_methods(services: list) -> Dict[str, Callable]:
+    """Return the public coroutine methods of the services, i.e. their tools."""
+    return {
+        name: method
+        for service in services
+        for name, method in inspect.getmembers(service, inspect.iscoroutinefunction)
+        if not name.startswith("_")
+    }
+
+
+async def run_direct(tree, scratch, files, labels, args) -> dict:
+    services = build_services([tree.root, scratch])
+    tools = tool_methods(services)
+
+    async def call(tool_name: str, arguments: Dict[str, Any]) -> bool:
+        try:
+            await tools[tool_name](**arguments)
+            return True
+        except Exception:
+            return False
+
+    results = await measure(call, tree, scratch, files, labels, args)
+    shutdown_services(services)
+    return {"tools": results, "peak_rss_bytes": peak_rss_bytes(resource.RUSAGE_SELF)}
+
+
+async def run_stdio(tree, scratch, files, labels, args) -> dict:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(REPO_ROOT / "src"), env.get("PYTHONPATH")])
+    )
+    env["LOG_LEVEL"] = "WARNING"
+    server = StdioServerParameters(
+        command=sys.executable,
+        args=[
+            str(REPO_ROOT / "main.py"),
+            "--transport",
+            "stdio",
+            "--allowed-dirs",
+            str(tree.root),
+            str(scratch),
+        ],
+        env=env,
+    )
+
+    async with stdio_client(server) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call(tool_name: str, arguments: Dict[str, Any]) -> bool:
+                result = await session.call_tool(tool_name, arguments)
+                return not result.isError
+
+            results = await measure(call, tree, scratch, files, labels, args)
+
+    # The largest RSS of any server process that has exited so far.
+    return {
+        "tools": results,
+        "peak_rss_bytes": peak_rss_bytes(resource.RUSAGE_CHILDREN),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main() -> None:
+    args = parse_arguments()
+    labels = args.tools or list(TOOL_CASES)
+
+    services = build_services([Path.cwd()])
+    covered = {TOOL_CASES[label][0] for label in TOOL_CASES}
+    uncovered = sorted(set(tool_methods(services)) - covered)
+    shutdown_services(services)
+    if uncovered:
+        print(f"Warning: no benchmark case for tools {uncovered}")
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scale": args.scale,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+        },
+        "uncovered_tools": uncovered,
+        "trees": [],
+    }
+
+    runners = {"direct": run_direct, "stdio": run_stdio}
+    for shape in args.shapes:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Keep content indexes of the synthetic trees out of the user cache.
+            os.environ["MCP_FS_INDEX_DIR"] = str(Path(tmp) / "index")
+            generation_start = time.perf_counter()
+            tree = generate(shape, Path(tmp) / shape, args.scale, args.seed)
+            generation_time = time.perf_counter() - generation_start
+            print(
+                f"{shape}: {tree.files} files, {tree.bytes / 1e6:.1f} MB "
+                f"(generated in {generation_time:.1f}s)"
+            )
+            files = sorted(str(path) for path in tree.sample_dir.glob("*.txt"))
+            files = files or [str(tree.sample_file)]
+
+            entry = {
+                "shape": shape,
+                "files": tree.files,
+                "bytes": tree.bytes,
+                "transports": {},
+            }
+            for transport in args.transports:
+                print(f" {transport}")
+                scratch = Path(tmp) / f"scratch_{transport}"
+                scratch.mkdir()
+                entry["transports"][transport] = await runners[transport](
+                    tree, scratch, files, labels, args
+                )
+            report["trees"].append(entry)
+
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
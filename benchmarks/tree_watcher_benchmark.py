@@ -0,0 +1,105 @@
+"""
+Compare `os.walk` file name searches with warm in-memory directory tree lookups.
+
+Usage:
+    python benchmarks/tree_watcher_benchmark.py --files 200000 --queries 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_fs.index.tree_watcher import TreeWatcher  # noqa: E402
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the directory tree watcher."
+    )
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--polling", action="store_true", help="Disable inotify.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def generate_tree(root: Path, files: int, fanout: int, rng: random.Random) -> list:
+    names = []
+    for i in range(files):
+        directory = root / f"dir_{i % fanout}" / f"sub_{(i // fanout) % fanout}"
+        directory.mkdir(parents=True, exist_ok=True)
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(10)) + ".txt"
+        (directory / name).touch()
+        names.append(name)
+    return names
+
+
+def walk_search(root: Path, substring: str) -> list:
+    matching_files = []
+    for dir_path, _, files in os.walk(root):
+        for file in files:
+            if substring.lower() in file.lower():
+                matching_files.append(os.path.join(dir_path, file))
+    return matching_files
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def summarize(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<24} median {statistics.median(samples) * 1000:9.2f} ms   "
+        f"p95 {p95 * 1000:9.2f} ms"
+    )
+
+
+def main() -> None:
+    args = parse_arguments()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        print(f"Generating {args.files} files...")
+        names = generate_tree(root, args.files, args.fanout, rng)
+        queries = [rng.choice(names)[2:6] for _ in range(args.queries)]
+
+        watcher = TreeWatcher([root], use_inotify=not args.polling)
+        start = time.perf_counter()
+        watcher.start()
+        watcher.wait_until_ready()
+        scan_time = time.perf_counter() - start
+        print(f"Initial scan: {scan_time:.2f}s")
+        # The first lookup builds the name index.
+        index_time, _ = timed(watcher.find_files, root, "warmup")
+        print(f"Name index build: {index_time * 1000:.2f} ms")
+
+        walk_samples, tree_samples = [], []
+        for query in queries:
+            walk_time, walk_result = timed(walk_search, root, query)
+            tree_time, tree_result = timed(watcher.find_files, root, query)
+            if sorted(walk_result) != sorted(tree_result):
+                print(f"Result mismatch for query {query!r}", file=sys.stderr)
+            walk_samples.append(walk_time)
+            tree_samples.append(tree_time)
+
+        summarize("os.walk", walk_samples)
+        summarize("directory tree (warm)", tree_samples)
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
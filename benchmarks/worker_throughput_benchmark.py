@@ -0,0 +1,214 @@
+"""
+Throughput of the SSE transport with 1, 2, 4 and 8 server workers.
+
+For each worker count, `main.py --transport sse --workers N` is started on
+a synthetic tree and `--clients` MCP clients, each with its own SSE session,
+call one CPU-bound tool in a loop for `--duration` seconds. Every call uses
+a different query, so no call is answered from a result cache. Throughput
+and latency percentiles are printed per worker count.
+
+Requires the `mcp` client package.
+
+Usage:
+    python benchmarks/worker_throughput_benchmark.py --clients 16
+    python benchmarks/worker_throughput_benchmark.py --workers 1 4 --tool search
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_trees import (  # noqa: E402
+    TEXT_MARKER,
+    TREE_SHAPES,
+    SyntheticTree,
+    generate,
+)
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# tool name and the arguments of its i-th call
+TOOL_CASES: Dict[str, Callable[[SyntheticTree, int], tuple]] = {
+    "fuzzy": lambda tree, i: (
+        "fuzzy_find_files",
+        {"search_path": str(tree.root), "query": f"f{i % 997}t", "limit": 20},
+    ),
+    "search": lambda tree, i: (
+        "search_file_bodies_for_substring",
+        {
+            "search_path": str(tree.root),
+            "text": f"{TEXT_MARKER}|nomatch{i}",
+            "mode": "regex",
+        },
+    ),
+}
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark SSE throughput by number of server workers."
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tool", choices=list(TOOL_CASES), default="fuzzy")
+    parser.add_argument("--shape", choices=list(TREE_SHAPES), default="small_files")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    return parser.parse_args()
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server did not listen on port {port} within {timeout}s.")
+
+
+def start_server(tree: SyntheticTree, workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(REPO_ROOT / "src"), env.get("PYTHONPATH")])
+    )
+    env["LOG_LEVEL"] = "WARNING"
+    return subprocess.Popen(
+        [
+            sys.executable,
+            str(REPO_ROOT / "main.py"),
+            "--transport",
+            "sse",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--allowed-dirs",
+            str(tree.root),
+        ],
+        env=env,
+    )
+
+
+async def client(
+    url: str,
+    make_call: Callable[[int], tuple],
+    first_call: int,
+    stop_at: float,
+    latencies: List[float],
+    errors: List[int],
+) -> None:
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            i = first_call
+            # At least one call, so a warm-up client makes exactly one.
+            while True:
+                tool_name, arguments = make_call(i)
+                start = time.perf_counter()
+                result = await session.call_tool(tool_name, arguments)
+                latencies.append(time.perf_counter() - start)
+                errors[0] += bool(result.isError)
+                if time.perf_counter() >= stop_at:
+                    return
+                # Interleave the clients' queries so none repeats.
+                i += 1_000_000
+
+
+async def run(
+    tree: SyntheticTree, workers: int, args: argparse.Namespace
+) -> Dict[str, Any]:
+    make_tool_call = TOOL_CASES[args.tool]
+    server = start_server(tree, workers, args.port)
+    try:
+        wait_for_port(args.port)
+        url = f"http://127.0.0.1:{args.port}/sse"
+        # Build the indexes before timing anything.
+        warmup: List[float] = []
+        await client(
+            url,
+            lambda i: make_tool_call(tree, i),
+            -1,
+            time.perf_counter(),
+            warmup,
+            [0],
+        )
+
+        latencies: List[float] = []
+        errors = [0]
+        start = time.perf_counter()
+        stop_at = start + args.duration
+        await asyncio.gather(
+            *(
+                client(
+                    url,
+                    lambda i: make_tool_call(tree, i),
+                    n,
+                    stop_at,
+                    latencies,
+                    errors,
+                )
+                for n in range(args.clients)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "calls": len(latencies),
+        "errors": errors[0],
+        "throughput_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def main() -> None:
+    args = parse_arguments()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep content indexes of the synthetic tree out of the user cache.
+        os.environ["MCP_FS_INDEX_DIR"] = str(Path(tmp) / "index")
+        tree = generate(args.shape, Path(tmp) / args.shape, args.scale, args.seed)
+        print(
+            f"{args.shape}: {tree.files} files, {tree.bytes / 1e6:.1f} MB; "
+            f"{args.clients} clients calling {args.tool} for {args.duration}s "
+            f"on {os.cpu_count()} CPUs"
+        )
+
+        baseline = None
+        for workers in args.workers:
+            result = await run(tree, workers, args)
+            baseline = baseline or result["throughput_per_s"]
+            print(
+                f"  {workers} workers: {result['throughput_per_s']:8.1f} calls/s "
+                f"({result['throughput_per_s'] / baseline:4.2f}x)   "
+                f"p50 {result['p50_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   "
+                f"errors {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,12 +3,44 @@ import logging
 import os
 import sys
 
-from dotenv import load_dotenv
+from mcp_fs.utils import startup
 
-from mcp_fs.launcher import start, directory_path_type
+# Started before the server's modules are imported, so the report covers them.
+if "--startup-profile" in sys.argv:
+    startup.profile_imports()
 
+from mcp_fs.launcher import (  # noqa: E402
+    start,
+    directory_path_type,
+    profile_tool_type,
+    tool_concurrency_type,
+)
+from mcp_fs.utils.async_utils import DEFAULT_TOOL_WORKERS  # noqa: E402
+from mcp_fs.utils.atomic_write import Durability  # noqa: E402
+
+
+def load_env_file() -> None:
+    """
+    Load the nearest `.env` file above this script, as `load_dotenv()` would.
+
+    dotenv is only imported when there is a file to load, since most stdio
+    launches get their settings from the client's environment.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        env_file = os.path.join(directory, ".env")
+        if os.path.isfile(env_file):
+            from dotenv import load_dotenv
+
+            load_dotenv(env_file)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
 
-load_dotenv()
+
+load_env_file()
 
 
 log_level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
@@ -63,6 +95,69 @@ def parse_arguments() -> argparse.Namespace:
         help="Comma-separated list of allowed resources for the MCP server.",
         default=os.getenv("ALLOWED_RESOURCES", ""),
     )
+    parser.add_argument(
+        "--watch-dirs",
+        action="store_true",
+        help="Keep an in-memory tree of the allowed directories for listings and name searches.",
+    )
+    parser.add_argument(
+        "--tool-workers",
+        type=int,
+        help="Number of worker threads running blocking tool calls.",
+        default=DEFAULT_TOOL_WORKERS,
+    )
+    parser.add_argument(
+        "--tool-concurrency",
+        type=tool_concurrency_type,
+        nargs="*",
+        help="Per-tool concurrency limits, e.g. search_file_bodies_for_substring=2.",
+        default=[],
+        metavar="TOOL=LIMIT",
+    )
+    parser.add_argument(
+        "--write-durability",
+        type=str.lower,
+        help="How hard writes try to reach disk: none, file (fsync the file) or directory (fsync the file and its directory).",
+        default="none",
+        choices=[d.value for d in Durability],
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve per-tool metrics in the Prometheus text format on this port, at /metrics.",
+        required=False,
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=directory_path_type,
+        help="Write spans of tool calls to this file in the Chrome trace-event format.",
+        default=os.getenv("MCP_FS_TRACE_FILE"),
+    )
+    parser.add_argument(
+        "--profile-tool",
+        type=profile_tool_type,
+        nargs="*",
+        help="Profile the next calls of a tool with cProfile, e.g. search_file_bodies_for_substring=5.",
+        default=[],
+        metavar="TOOL[=CALLS]",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=directory_path_type,
+        help="Directory profiles are written to. Defaults to ~/.cache/mcp_fs/profiles.",
+        required=False,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of server processes behind the SSE transport's address.",
+        default=1,
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Log how long each module took to import before the server started.",
+    )
     return parser.parse_args()
 
 
@@ -90,6 +185,15 @@ def main():
         port=args.port,
         allowed_tools=allowed_tools,
         allowed_resources=allowed_resources,
+        watch_dirs=args.watch_dirs,
+        tool_workers=args.tool_workers,
+        tool_concurrency=dict(args.tool_concurrency),
+        write_durability=Durability(args.write_durability),
+        metrics_port=args.metrics_port,
+        trace_file=args.trace_file,
+        profile_tools=dict(args.profile_tool) or None,
+        profile_dir=args.profile_dir,
+        workers=args.workers,
     )
 
 
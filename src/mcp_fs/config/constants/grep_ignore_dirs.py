@@ -46,18 +46,14 @@ GREP_IGNORE_DIRS: List[str] = [
     ".coverage",
     ".eggs",
     ".ipynb_checkpoints",
-    # Java Specific
-    "target",
-    "out",
+    # Java Specific (target and out are listed under Build Directories)
     "*.class",
     "*.jar",
     "*.war",
     "*.ear",
-    # Ruby Specific
+    # Ruby Specific (vendor is listed under Dependency Management, which
+    # also covers Go)
     ".bundle",
     "log",
     "tmp",
-    "vendor",
-    # Go Specific
-    "vendor",
 ]
@@ -0,0 +1,609 @@
+"""
+Persistent trigram index over the file bodies of one allowed directory.
+
+The index maps every lowercased three byte sequence found in a file to the
+files containing it. A query intersects the posting lists of the trigrams in
+the search text to get a small set of candidate files, which are then read and
+verified. Text is lowercased as decoded UTF-8, so non-ASCII letters match
+case-insensitively as with `grep -i` in a UTF-8 locale; data that is not
+valid UTF-8 is compared byte for byte. The index lives in a SQLite database on disk so it survives server
+restarts and is refreshed incrementally by comparing file mtime and size.
+
+A query refreshes only the subtree it searches, at most every
+`refresh_interval` seconds per subtree. Files the server writes itself are
+reported with `mark_changed` and re-read by the next query regardless, so a
+search right after a write finds it; changes made by other processes show up
+within the interval.
+
+Server worker processes share one database per directory. The database is
+memory-mapped, so their reads are served from the same page cache pages, and
+a refresh holds the write lock from reading the known files to committing, so
+a worker whose refresh waited on another's finds the index already fresh.
+"""
+
+import array
+import codecs
+import hashlib
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import time
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from mcp_fs.index.content_sniffer import SNIFF_SIZE, classify
+from mcp_fs.search.content_search import SearchDeadline, SearchTimeoutError
+from mcp_fs.utils import metrics, tracing
+from mcp_fs.utils.ignore import WalkFilter, walk
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_INDEX_DIR = Path("~/.cache/mcp_fs/content_index").expanduser()
+DEFAULT_MAX_FILE_SIZE = 16 * 1024 * 1024
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+_READ_CHUNK_SIZE = 1024 * 1024
+# Refreshes of other processes hold the write lock for as long as they take.
+_BUSY_TIMEOUT = 60.0
+_MMAP_SIZE = 256 * 1024 * 1024
+# A file modified within this window of being indexed may change again
+# without its mtime moving, so it is read again by the next refresh.
+_RACY_WINDOW_NS = 1_000_000_000
+# Bump when the trigrams extracted from a file change; older databases are left unused.
+_FORMAT_VERSION = 2
+# Ids looked up per query, below SQLite's limit on query parameters.
+_IDS_PER_QUERY = 500
+
+# Posting lists are stored as one blob of packed file ids per trigram. Ids of
+# files that changed or disappeared are not removed from the blobs right away;
+# they no longer resolve to a row in `files` and are dropped at compaction.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    indexed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_unindexed ON files (indexed) WHERE indexed = 0;
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER PRIMARY KEY,
+    file_ids BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_POSTING_TYPECODE = "I"
+_MAX_PENDING_POSTINGS = 4_000_000
+
+
+def default_index_dir() -> Path:
+    """Return the directory index databases are stored in."""
+    index_dir = os.getenv("MCP_FS_INDEX_DIR")
+    return Path(index_dir).expanduser() if index_dir else DEFAULT_INDEX_DIR
+
+
+def fold(data: bytes) -> bytes:
+    """Lowercase UTF-8 `data`; bytes that are not valid UTF-8 are kept as they are."""
+    if data.isascii():
+        return data.lower()
+    return (
+        data.decode("utf-8", "surrogateescape")
+        .lower()
+        .encode("utf-8", "surrogateescape")
+    )
+
+
+def extract_trigrams(data: bytes) -> Set[int]:
+    """Return the set of lowercased trigrams in `data`, packed into 24-bit integers."""
+    data = fold(data)
+    return {(a << 16) | (b << 8) | c for a, b, c in zip(data, data[1:], data[2:])}
+
+
+def file_contains(path: str | Path, needle: bytes) -> bool:
+    """
+    Case-insensitively check whether a text file contains `needle`.
+
+    The file is read in fixed-size chunks so memory use does not depend on the
+    file size. Binary and compressed files (see `classify`) never match.
+    `needle` must already be lowercased with `fold`.
+    """
+    overlap = max(len(needle) - 1, 0)
+    tail = b""
+    # Holds back a character split between two chunks until the next one.
+    decoder = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+    with open(path, "rb") as file:
+        head = file.read(SNIFF_SIZE)
+        if not classify(head, complete=len(head) < SNIFF_SIZE).scannable:
+            return False
+        file.seek(0)
+        while True:
+            chunk = file.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                return False
+            if chunk.isascii() and not decoder.getstate()[0]:
+                window = tail + chunk.lower()
+            else:
+                text = decoder.decode(chunk)
+                window = tail + text.lower().encode("utf-8", "surrogateescape")
+            if needle in window:
+                return True
+            tail = window[-overlap:] if overlap else b""
+
+
+def _ancestors(prefix: str) -> List[str]:
+    """Return the relative paths of the root and of every directory down to `prefix`."""
+    ancestors = [""]
+    if prefix:
+        parts = prefix.split(os.sep)
+        ancestors.extend(os.sep.join(parts[: i + 1]) for i in range(len(parts)))
+    return ancestors
+
+
+def _is_below(rel_path: str, prefix: str) -> bool:
+    return not prefix or rel_path.startswith(prefix + os.sep)
+
+
+def _below(target: str) -> Tuple[str, Tuple[str, ...]]:
+    """Return an SQL condition, and its parameters, matching `path` at or below `target`."""
+    if not target:
+        return "1", ()
+    # Paths below "a/b" sort between "a/b/" and "a/b0".
+    return "(path = ? OR (path > ? AND path < ?))", (
+        target,
+        target + os.sep,
+        target + chr(ord(os.sep) + 1),
+    )
+
+
+def _unpack_postings(blob: bytes) -> array.array:
+    postings = array.array(_POSTING_TYPECODE)
+    postings.frombytes(blob)
+    return postings
+
+
+class ContentIndex:
+    """
+    On-disk trigram index for the files below a single root directory.
+
+    Files larger than `max_file_size` are tracked but not tokenized; they are
+    always treated as candidates and verified by scanning.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index_dir: Optional[Path] = None,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.refresh_interval = refresh_interval
+        # When this process last refreshed each subtree, by path relative to the root.
+        self._refreshed: Dict[str, float] = {}
+        # Files this process wrote since, relative to the root.
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+
+        index_dir = index_dir or default_index_dir()
+        index_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256(str(root).encode("utf-8")).hexdigest()[:16]
+        self.db_path = index_dir / f"{digest}-v{_FORMAT_VERSION}.sqlite3"
+
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=_BUSY_TIMEOUT, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _walk(self, top: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (relative path, stat) for every regular file below `top` that is not ignored."""
+        # The root with one trailing separator, also when it is "/".
+        root_length = len(os.path.join(str(self.root), ""))
+        for _, _, files in walk(top):
+            for entry in files:
+                try:
+                    # Like `grep -r`, symlinks found while recursing are not followed.
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry.path[root_length:], entry.stat(
+                            follow_symlinks=False
+                        )
+                except OSError:
+                    continue
+
+    def _is_walked(self, rel_path: str) -> bool:
+        """Return whether `_walk` would reach the file at `rel_path`, i.e. none of its path is ignored."""
+        root = str(self.root)
+        return WalkFilter(root).reaches(os.path.join(root, rel_path))
+
+    def mark_changed(self, path: str | Path) -> None:
+        """Record that the file at `path` was written, so the next query re-reads it."""
+        rel_path = os.path.relpath(path, self.root)
+        if rel_path == os.curdir or rel_path.startswith(os.pardir + os.sep):
+            return
+        with self._lock:
+            self._changed.add(rel_path)
+
+    def refresh(
+        self,
+        search_path: Optional[Path] = None,
+        force: bool = False,
+        deadline: Optional[SearchDeadline] = None,
+    ) -> None:
+        """
+        Bring the index of the files below `search_path` up to date with the disk.
+
+        Only files whose mtime or size changed since they were last indexed are
+        re-read. The subtree is not walked if it, or a directory above it, was
+        refreshed less than `refresh_interval` seconds ago, by this or another
+        process, unless `force` is set; files passed to `mark_changed` are
+        re-read in any case.
+
+        Raises SearchTimeoutError once `deadline` expires. The files indexed
+        by then are kept, so the next refresh carries on from there.
+        """
+        deadline = deadline or SearchDeadline(None)
+        top = str(search_path or self.root)
+        if not os.path.isdir(top):
+            top = os.path.dirname(top)
+        prefix = "" if top == str(self.root) else os.path.relpath(top, self.root)
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            due = force or not self._refreshed_recently(prefix)
+            if not due and not changed:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process's refresh can be trusted once this process
+                # tracks its own writes, i.e. after its own first refresh.
+                walk_tree = due and (
+                    force
+                    or not self._refreshed
+                    or not self._refreshed_recently_elsewhere(prefix)
+                )
+                if walk_tree:
+                    changed = {path for path in changed if not _is_below(path, prefix)}
+                if changed:
+                    self._refresh_paths(changed)
+                if walk_tree:
+                    self._refresh_locked(top, prefix, deadline)
+                self._conn.commit()
+            except SearchTimeoutError:
+                self._conn.commit()
+                raise
+            except BaseException:
+                self._conn.rollback()
+                self._changed |= changed
+                raise
+            if due:
+                self._refreshed[prefix] = time.monotonic()
+
+    def _refreshed_recently(self, prefix: str) -> bool:
+        now = time.monotonic()
+        return any(
+            now - self._refreshed.get(ancestor, -float("inf")) < self.refresh_interval
+            for ancestor in _ancestors(prefix)
+        )
+
+    def _refreshed_recently_elsewhere(self, prefix: str) -> bool:
+        keys = [f"refreshed_at:{ancestor}" for ancestor in _ancestors(prefix)]
+        (refreshed_at,) = self._conn.execute(
+            f"SELECT MAX(value) FROM meta WHERE key IN ({', '.join('?' * len(keys))})",
+            keys,
+        ).fetchone()
+        return refreshed_at is not None and (
+            time.time_ns() - refreshed_at < self.refresh_interval * 1_000_000_000
+        )
+
+    def _known(self, prefix: str) -> Dict[str, Tuple[int, int, int]]:
+        """Return (id, mtime_ns, size) by relative path of the indexed files below `prefix`."""
+        condition, params = _below(prefix)
+        query = f"SELECT id, path, mtime_ns, size FROM files WHERE {condition}"
+        return {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in self._conn.execute(query, params)
+        }
+
+    def _refresh_locked(self, top: str, prefix: str, deadline: SearchDeadline) -> None:
+        start = time.perf_counter()
+        known = self._known(prefix)
+
+        cursor = self._conn.cursor()
+        pending: Dict[int, List[int]] = defaultdict(list)
+        pending_count = updated = 0
+        dead_ids = []
+        for rel_path, file_stat in self._walk(top):
+            if deadline.expired():
+                # Files not reached yet are neither removed nor marked fresh.
+                self._flush_postings(cursor, pending)
+                self._record_dead_ids(cursor, len(dead_ids))
+                raise SearchTimeoutError(
+                    f"Refreshing the content index of {top} timed out after "
+                    f"indexing {updated} changed files."
+                )
+            entry = known.pop(rel_path, None)
+            if entry is not None:
+                file_id, mtime_ns, size = entry
+                if mtime_ns == file_stat.st_mtime_ns and size == file_stat.st_size:
+                    continue
+                dead_ids.append(file_id)
+                cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            pending_count += self._index_file(cursor, rel_path, file_stat, pending)
+            updated += 1
+            if pending_count >= _MAX_PENDING_POSTINGS:
+                self._flush_postings(cursor, pending)
+                pending_count = 0
+
+        for file_id, _, _ in known.values():
+            dead_ids.append(file_id)
+            cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+        self._flush_postings(cursor, pending)
+        self._record_dead_ids(cursor, len(dead_ids))
+        cursor.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (f"refreshed_at:{prefix}", time.time_ns()),
+        )
+        self._conn.commit()
+        self._maybe_compact()
+
+        logger.debug(
+            f"Refreshed content index for {top}: {updated} updated, "
+            f"{len(known)} removed in {time.perf_counter() - start:.3f}s"
+        )
+
+    def _refresh_paths(self, rel_paths: Set[str]) -> None:
+        """Re-read the files at `rel_paths` if they changed, and drop those that are gone."""
+        cursor = self._conn.cursor()
+        pending: Dict[int, List[int]] = defaultdict(list)
+        dead_ids = 0
+        for rel_path in sorted(rel_paths):
+            row = cursor.execute(
+                "SELECT id, mtime_ns, size FROM files WHERE path = ?", (rel_path,)
+            ).fetchone()
+            try:
+                file_stat = os.stat(
+                    os.path.join(self.root, rel_path), follow_symlinks=False
+                )
+            except OSError:
+                file_stat = None
+            if file_stat is not None and not (
+                stat.S_ISREG(file_stat.st_mode) and self._is_walked(rel_path)
+            ):
+                file_stat = None
+            if row is not None:
+                if file_stat is not None and row[1:] == (
+                    file_stat.st_mtime_ns,
+                    file_stat.st_size,
+                ):
+                    continue
+                cursor.execute("DELETE FROM files WHERE id = ?", (row[0],))
+                dead_ids += 1
+            if file_stat is not None:
+                self._index_file(cursor, rel_path, file_stat, pending)
+        self._flush_postings(cursor, pending)
+        self._record_dead_ids(cursor, dead_ids)
+
+    @staticmethod
+    def _record_dead_ids(cursor: sqlite3.Cursor, count: int) -> None:
+        if count:
+            cursor.execute(
+                "INSERT INTO meta (key, value) VALUES ('dead_ids', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                (count,),
+            )
+
+    def _index_file(
+        self,
+        cursor: sqlite3.Cursor,
+        rel_path: str,
+        file_stat: os.stat_result,
+        pending: Dict[int, List[int]],
+    ) -> int:
+        """Record a file and queue its postings; return the number of postings queued."""
+        trigrams: Set[int] = set()
+        indexed = file_stat.st_size <= self.max_file_size
+        if indexed:
+            try:
+                with open(os.path.join(self.root, rel_path), "rb") as file:
+                    data = file.read()
+                # Binaries are recorded with no trigrams, so they are never candidates.
+                kind = classify(data[:SNIFF_SIZE], complete=len(data) <= SNIFF_SIZE)
+                if kind.scannable:
+                    trigrams = extract_trigrams(data)
+            except OSError as e:
+                logger.debug(f"Skipping unreadable file {rel_path}: {e}")
+                return 0
+
+        mtime_ns = file_stat.st_mtime_ns
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            mtime_ns = -1
+        cursor.execute(
+            "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+            (rel_path, mtime_ns, file_stat.st_size, int(indexed)),
+        )
+        file_id = cursor.lastrowid
+        for trigram in trigrams:
+            pending[trigram].append(file_id)
+        return len(trigrams)
+
+    def _flush_postings(
+        self, cursor: sqlite3.Cursor, pending: Dict[int, List[int]]
+    ) -> None:
+        cursor.executemany(
+            "INSERT INTO postings (trigram, file_ids) VALUES (?, ?) "
+            "ON CONFLICT(trigram) DO UPDATE SET file_ids = CAST(file_ids || excluded.file_ids AS BLOB)",
+            (
+                (trigram, array.array(_POSTING_TYPECODE, file_ids).tobytes())
+                for trigram, file_ids in pending.items()
+            ),
+        )
+        pending.clear()
+
+    def _maybe_compact(self) -> None:
+        """Drop dead file ids from the posting lists once they outnumber live files."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'dead_ids'"
+        ).fetchone()
+        dead_count = row[0] if row else 0
+        (live_count,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        if dead_count <= max(live_count, 1024):
+            return
+
+        start = time.perf_counter()
+        live_ids = {
+            file_id for (file_id,) in self._conn.execute("SELECT id FROM files")
+        }
+        rewritten = []
+        for trigram, blob in self._conn.execute(
+            "SELECT trigram, file_ids FROM postings"
+        ):
+            file_ids = [i for i in _unpack_postings(blob) if i in live_ids]
+            rewritten.append(
+                (trigram, array.array(_POSTING_TYPECODE, file_ids).tobytes())
+            )
+        self._conn.execute("DELETE FROM postings")
+        self._conn.executemany(
+            "INSERT INTO postings (trigram, file_ids) VALUES (?, ?)",
+            ((trigram, blob) for trigram, blob in rewritten if blob),
+        )
+        self._conn.execute("UPDATE meta SET value = 0 WHERE key = 'dead_ids'")
+        self._conn.commit()
+        logger.debug(
+            f"Compacted content index for {self.root} in "
+            f"{time.perf_counter() - start:.3f}s"
+        )
+
+    def candidates(self, text: str, target: str = "") -> List[str]:
+        """
+        Return relative paths of files at or below `target` that may contain `text`.
+
+        Only the rows of the files in the intersected posting lists, and of
+        the files too large to be indexed, are read.
+        """
+        trigrams = extract_trigrams(text.encode("utf-8"))
+        condition, params = _below(target)
+        with self._lock:
+            if not trigrams:
+                return [
+                    path
+                    for (path,) in self._conn.execute(
+                        f"SELECT path FROM files WHERE {condition}", params
+                    )
+                ]
+
+            posting_lists = []
+            for trigram in trigrams:
+                row = self._conn.execute(
+                    "SELECT file_ids FROM postings WHERE trigram = ?", (trigram,)
+                ).fetchone()
+                if row is None:
+                    posting_lists = []
+                    break
+                posting_lists.append(row[0])
+
+            candidate_ids: Set[int] = set()
+            if posting_lists:
+                posting_lists.sort(key=len)
+                candidate_ids = set(_unpack_postings(posting_lists[0]))
+                for blob in posting_lists[1:]:
+                    if not candidate_ids:
+                        break
+                    candidate_ids.intersection_update(_unpack_postings(blob))
+
+            paths = [
+                path
+                for (path,) in self._conn.execute(
+                    f"SELECT path FROM files WHERE indexed = 0 AND {condition}", params
+                )
+            ]
+            ids = list(candidate_ids)
+            for start in range(0, len(ids), _IDS_PER_QUERY):
+                batch = ids[start : start + _IDS_PER_QUERY]
+                # Ids of changed or removed files no longer resolve to a row.
+                paths.extend(
+                    path
+                    for (path,) in self._conn.execute(
+                        f"SELECT path FROM files WHERE id IN ({', '.join('?' * len(batch))})"
+                        f" AND indexed = 1 AND {condition}",
+                        (*batch, *params),
+                    )
+                )
+            return paths
+
+    def candidate_paths(
+        self,
+        text: str,
+        search_path: Optional[Path] = None,
+        deadline: Optional[SearchDeadline] = None,
+    ) -> List[str]:
+        """Return sorted full paths of files below `search_path` that may contain `text`."""
+        with tracing.span("walk", index=str(self.root)):
+            self.refresh(search_path, deadline=deadline)
+
+        target = ""
+        if search_path is not None and search_path != self.root:
+            target = os.path.relpath(search_path, self.root)
+
+        return [
+            os.path.join(self.root, rel_path)
+            for rel_path in sorted(self.candidates(text, target))
+        ]
+
+    def search(
+        self,
+        text: str,
+        search_path: Optional[Path] = None,
+        max_results: Optional[int] = None,
+        deadline: Optional[SearchDeadline] = None,
+    ) -> List[str]:
+        """
+        Return full paths of files below `search_path` whose body contains `text`.
+
+        Matching is case-insensitive and literal, like `grep -il -F` in a
+        UTF-8 locale. Raises
+        SearchTimeoutError once `deadline` expires.
+        """
+        deadline = deadline or SearchDeadline(None)
+        needle = fold(text.encode("utf-8"))
+        matching_files = []
+        scanned = 0
+        candidates = self.candidate_paths(text, search_path, deadline)
+        with tracing.span("scan", candidates=len(candidates)) as span_args:
+            for full_path in candidates:
+                if deadline.expired():
+                    metrics.record(metrics.FILES_SCANNED, scanned)
+                    raise SearchTimeoutError(
+                        f"Search of {search_path or self.root} timed out."
+                    )
+                scanned += 1
+                try:
+                    if file_contains(full_path, needle):
+                        matching_files.append(full_path)
+                        if (
+                            max_results is not None
+                            and len(matching_files) >= max_results
+                        ):
+                            break
+                except OSError as e:
+                    logger.debug(f"Skipping unreadable candidate {full_path}: {e}")
+            span_args.update(files=scanned, matches=len(matching_files))
+        metrics.record(metrics.FILES_SCANNED, scanned)
+        return matching_files
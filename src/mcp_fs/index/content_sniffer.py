@@ -0,0 +1,189 @@
+"""
+Classification of files as text, binary or compressed from their first bytes.
+
+A file is classified from its first `SNIFF_SIZE` bytes only: a byte order
+mark decides the encoding, known magic numbers mark compressed archives and
+binary formats, a NUL byte marks other binaries, and the rest is UTF-8 text
+if it decodes as such, Latin-1 text if it has few control characters, and
+binary otherwise. `ContentSniffer` caches the classification per path,
+validated against the file's (st_mtime_ns, st_size, st_ino), so a file
+already known to be binary is skipped without being opened again.
+"""
+
+import codecs
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from mcp_fs.index.line_index import file_signature
+
+
+SNIFF_SIZE = 8192
+DEFAULT_MAX_ENTRIES = 200_000
+
+TEXT = "text"
+BINARY = "binary"
+COMPRESSED = "compressed"
+
+# A file modified within this window of being sniffed may change again without
+# its mtime moving, so its classification is not cached.
+_RACY_WINDOW_NS = 1_000_000_000
+
+# Text that is not valid UTF-8 is binary if more than this share of its bytes
+# are control characters other than whitespace.
+_MAX_CONTROL_RATIO = 0.05
+_TEXT_CONTROLS = b"\b\t\n\f\r\x1b"
+_CONTROLS = bytes(byte for byte in [*range(32), 127] if byte not in _TEXT_CONTROLS)
+
+# Encodings in which ASCII text is stored as ASCII bytes, so byte-level search
+# finds it.
+_ASCII_COMPATIBLE = frozenset({"utf-8", "utf-8-sig", "latin-1"})
+
+
+class FileKind(NamedTuple):
+    kind: str
+    # the encoding to decode text files with
+    encoding: Optional[str] = None
+    # the detected format of compressed and recognized binary files, e.g. "gzip"
+    format: Optional[str] = None
+
+    @property
+    def is_text(self) -> bool:
+        return self.kind == TEXT
+
+    @property
+    def scannable(self) -> bool:
+        """Whether searching the raw bytes for ASCII-compatible text can find matches."""
+        return self.kind == TEXT and self.encoding in _ASCII_COMPATIBLE
+
+    def describe(self) -> str:
+        if self.kind == TEXT:
+            return f"{self.encoding} text"
+        return f"{self.format} {self.kind}" if self.format else self.kind
+
+
+UTF8_TEXT = FileKind(TEXT, "utf-8")
+LATIN1_TEXT = FileKind(TEXT, "latin-1")
+UNKNOWN_BINARY = FileKind(BINARY)
+
+# UTF-32 marks first: the UTF-32 LE mark starts with the UTF-16 LE one.
+_BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, FileKind(TEXT, "utf-32")),
+    (codecs.BOM_UTF32_BE, FileKind(TEXT, "utf-32")),
+    (codecs.BOM_UTF8, FileKind(TEXT, "utf-8-sig")),
+    (codecs.BOM_UTF16_LE, FileKind(TEXT, "utf-16")),
+    (codecs.BOM_UTF16_BE, FileKind(TEXT, "utf-16")),
+)
+
+_MAGIC_NUMBERS = (
+    (b"\x1f\x8b", FileKind(COMPRESSED, format="gzip")),
+    (b"PK\x03\x04", FileKind(COMPRESSED, format="zip")),
+    (b"PK\x05\x06", FileKind(COMPRESSED, format="zip")),
+    (b"\xfd7zXZ\x00", FileKind(COMPRESSED, format="xz")),
+    (b"\x28\xb5\x2f\xfd", FileKind(COMPRESSED, format="zstd")),
+    (b"\x04\x22\x4d\x18", FileKind(COMPRESSED, format="lz4")),
+    (b"7z\xbc\xaf\x27\x1c", FileKind(COMPRESSED, format="7z")),
+    (b"Rar!\x1a\x07", FileKind(COMPRESSED, format="rar")),
+    (b"\x7fELF", FileKind(BINARY, format="elf")),
+    (b"\x89PNG\r\n\x1a\n", FileKind(BINARY, format="png")),
+    (b"\xff\xd8\xff", FileKind(BINARY, format="jpeg")),
+    (b"GIF8", FileKind(BINARY, format="gif")),
+    (b"%PDF-", FileKind(BINARY, format="pdf")),
+)
+_BZIP2 = FileKind(COMPRESSED, format="bzip2")
+
+
+def classify(head: bytes, complete: bool = False) -> FileKind:
+    """
+    Classify a file from its first bytes.
+
+    `complete` tells whether `head` is the whole file, in which case a
+    multi-byte character cut off at its end makes it invalid UTF-8.
+    """
+    for mark, kind in _BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return kind
+    for magic, kind in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return kind
+    # "BZh", the block size digit, then the block magic (the BCD digits of pi).
+    if head.startswith(b"BZh") and head[4:10] == b"1AY&SY":
+        return _BZIP2
+    if b"\0" in head:
+        return UNKNOWN_BINARY
+    if head.isascii():
+        return UTF8_TEXT
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=complete)
+        return UTF8_TEXT
+    except UnicodeDecodeError:
+        pass
+    controls = len(head) - len(head.translate(None, _CONTROLS))
+    if controls > len(head) * _MAX_CONTROL_RATIO:
+        return UNKNOWN_BINARY
+    return LATIN1_TEXT
+
+
+class ContentSniffer:
+    """LRU of file classifications, each valid while the file's signature holds."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[
+            str, Tuple[Tuple[int, int, int], FileKind]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped_bytes = 0
+
+    def lookup(self, path: str, stat_result: os.stat_result) -> Optional[FileKind]:
+        """Return the cached classification of `path` if it matches `stat_result`."""
+        signature = file_signature(stat_result)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            if not entry[1].is_text:
+                self.skipped_bytes += stat_result.st_size
+            return entry[1]
+
+    def sniff(
+        self, path: str, stat_result: Optional[os.stat_result] = None
+    ) -> FileKind:
+        """Classify `path`, reading its first bytes unless the cache knows it."""
+        if stat_result is None:
+            stat_result = os.stat(path)
+        kind = self.lookup(path, stat_result)
+        if kind is not None:
+            return kind
+        with open(path, "rb") as file:
+            return self.record(path, stat_result, file.read(SNIFF_SIZE))
+
+    def record(self, path: str, stat_result: os.stat_result, head: bytes) -> FileKind:
+        """Classify `path` from `head`, its first `SNIFF_SIZE` bytes, and cache the result."""
+        kind = classify(head, complete=len(head) >= stat_result.st_size)
+        if time.time_ns() - stat_result.st_mtime_ns >= _RACY_WINDOW_NS:
+            with self._lock:
+                self._entries[path] = (file_signature(stat_result), kind)
+                self._entries.move_to_end(path)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return kind
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "skipped_bytes": self.skipped_bytes,
+            }
@@ -0,0 +1,107 @@
+"""
+Sparse line-offset indexes for large files.
+
+A `LineIndex` remembers the byte offset of every `stride`-th line of a file as
+it is discovered, so seeking to a line only scans forward from the nearest
+known checkpoint instead of from the start of the file. Indexes are cached
+per file and dropped when the file's mtime, size or inode change.
+"""
+
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+DEFAULT_STRIDE = 1024
+DEFAULT_CACHE_SIZE = 256
+
+_SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+def file_signature(stat_result: os.stat_result) -> Tuple[int, int, int]:
+    """Identify a version of a file by (st_mtime_ns, st_size, st_ino)."""
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+class LineIndex:
+    """Byte offsets of lines 1, 1 + stride, 1 + 2 * stride, ... of one file."""
+
+    def __init__(self, signature: Tuple[int, int, int], stride: int = DEFAULT_STRIDE):
+        self.signature = signature
+        self.stride = stride
+        # checkpoints[i] is the byte offset where line i * stride + 1 starts.
+        self.checkpoints = array("Q", [0])
+        self.total_lines: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def offset_of_line(self, file, line: int) -> Optional[int]:
+        """
+        Return the byte offset where 1-based `line` starts, or None past the end.
+
+        `file` must be a binary file object for the indexed file; it is only
+        read from the nearest known checkpoint up to the requested line.
+        """
+        if line < 1:
+            raise ValueError("Line numbers start at 1.")
+        if self.total_lines is not None and line > self.total_lines:
+            return None
+
+        with self._lock:
+            checkpoint = min((line - 1) // self.stride, len(self.checkpoints) - 1)
+            current_line = checkpoint * self.stride + 1
+            position = self.checkpoints[checkpoint]
+            file.seek(position)
+
+            while current_line < line:
+                chunk = file.read(_SCAN_CHUNK_SIZE)
+                if not chunk:
+                    self.total_lines = current_line
+                    return None
+
+                next_checkpoint_line = len(self.checkpoints) * self.stride + 1
+                stop_line = min(line, next_checkpoint_line)
+                newlines = chunk.count(b"\n")
+                if current_line + newlines < stop_line:
+                    current_line += newlines
+                    position += len(chunk)
+                    continue
+
+                start = 0
+                while True:
+                    newline = chunk.find(b"\n", start)
+                    if newline == -1:
+                        position += len(chunk)
+                        break
+                    current_line += 1
+                    start = newline + 1
+                    if current_line == len(self.checkpoints) * self.stride + 1:
+                        self.checkpoints.append(position + start)
+                    if current_line == line:
+                        return position + start
+            return position
+
+
+class LineIndexCache:
+    """Bounded LRU of `LineIndex` objects keyed by resolved file path."""
+
+    def __init__(
+        self, max_entries: int = DEFAULT_CACHE_SIZE, stride: int = DEFAULT_STRIDE
+    ):
+        self.max_entries = max_entries
+        self.stride = stride
+        self._entries: OrderedDict[str, LineIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat_result: os.stat_result) -> LineIndex:
+        signature = file_signature(stat_result)
+        with self._lock:
+            line_index = self._entries.get(path)
+            if line_index is None or line_index.signature != signature:
+                line_index = LineIndex(signature, self.stride)
+                self._entries[path] = line_index
+            self._entries.move_to_end(path)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return line_index
@@ -0,0 +1,368 @@
+"""
+In-memory index of the file paths below one allowed directory, for fuzzy search.
+
+Each directory is stored once, as an interned relative path, together with
+the names of the files directly inside it. For matching, the relative paths
+of all files are laid out lowercased, one per line, in one string per
+directory; the per-directory strings are joined into a single blob whose
+directory start offsets are kept in an array. A query is first run as one
+compiled regex over the blob, which keeps the per-path work in C, and only
+the lines it matches are scored in Python.
+
+Refreshes are incremental: a directory is listed again only if its mtime or
+the `.gitignore` rules in effect for it changed since it was last listed, so
+an unchanged tree costs one `stat` per directory.
+
+Server worker processes share one listing per directory: a
+`PathIndexPublisher` in the supervising process keeps the indexes and writes
+a snapshot file whenever one changes, and each worker's `SharedPathIndex`
+asks it for a refresh through a pipe and loads the snapshot if it is new.
+"""
+
+import bisect
+import hashlib
+import heapq
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from mcp_fs.index.line_index import file_signature
+from mcp_fs.search.fuzzy import fuzzy_score, subsequence_pattern
+from mcp_fs.utils.ignore import IgnoreScope, scope_for
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+# A directory modified within this window of being listed may change again
+# without its mtime moving, so it is listed again on the next refresh.
+_RACY_WINDOW_NS = 1_000_000_000
+
+
+class _Directory(NamedTuple):
+    # mtime_ns of the directory, or -1 to force a new listing
+    mtime_ns: int
+    # the `.gitignore` rules the listing was filtered with
+    gitignores: tuple
+    names: Tuple[str, ...]
+    subdirs: Tuple[str, ...]
+    # "rel/dir/name\n" for every file, lowercased, with `/` separators
+    lines: str
+
+
+class PathIndex:
+    """Fuzzy-searchable file paths below `root`, refreshed incrementally."""
+
+    def __init__(self, root: Path, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.root = str(root)
+        self.refresh_interval = refresh_interval
+        self._dirs: Dict[str, _Directory] = {}
+        self._lock = threading.Lock()
+        self._last_refresh: Optional[float] = None
+        # rel dir paths in blob order, their start offsets in the blob followed
+        # by the blob length, and the blob
+        self._order: List[str] = []
+        self._starts = array("Q", [0])
+        self._blob = ""
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Bring the index up to date with the tree on disk.
+
+        Refreshes are skipped if the previous one happened less than
+        `refresh_interval` seconds ago, unless `force` is set.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self._last_refresh is not None
+                and now - self._last_refresh < self.refresh_interval
+            ):
+                return
+            self._refresh_locked()
+            self._last_refresh = time.monotonic()
+
+    def _refresh_locked(self) -> None:
+        start = time.perf_counter()
+        dirs: Dict[str, _Directory] = {}
+        changed = 0
+        stack: List[Tuple[str, IgnoreScope]] = [("", scope_for(self.root))]
+        while stack:
+            rel_dir, scope = stack.pop()
+            dir_path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            directory = self._list(dir_path, rel_dir, scope)
+            if directory is None:
+                continue
+            if directory is not self._dirs.get(rel_dir):
+                changed += 1
+            dirs[rel_dir] = directory
+            for name in reversed(directory.subdirs):
+                child = f"{rel_dir}/{name}" if rel_dir else name
+                stack.append((child, scope.enter(os.path.join(dir_path, name))))
+
+        if changed or len(dirs) != len(self._dirs):
+            self._dirs = dirs
+            self._order = list(dirs)
+            self._starts = array("Q")
+            position = 0
+            for rel_dir in self._order:
+                self._starts.append(position)
+                position += len(dirs[rel_dir].lines)
+            self._starts.append(position)
+            self._blob = "".join(dirs[rel_dir].lines for rel_dir in self._order)
+        logger.debug(
+            f"Path index of {self.root} refreshed in {time.perf_counter() - start:.3f}s "
+            f"({len(dirs)} directories, {changed} relisted)"
+        )
+
+    def _list(
+        self, dir_path: str, rel_dir: str, scope: IgnoreScope
+    ) -> Optional[_Directory]:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None
+        previous = self._dirs.get(rel_dir)
+        if (
+            previous is not None
+            and previous.mtime_ns == mtime_ns
+            and previous.gitignores == scope.gitignores
+        ):
+            return previous
+
+        names: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if scope.ignores(entry.path, entry.name, is_dir):
+                        continue
+                    if not is_dir:
+                        names.append(entry.name)
+                    elif not entry.is_symlink():
+                        subdirs.append(entry.name)
+        except OSError:
+            return None
+
+        names.sort()
+        subdirs.sort()
+        prefix = sys.intern(f"{rel_dir}/") if rel_dir else ""
+        lines = "".join(f"{prefix}{name}\n" for name in names).lower()
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            mtime_ns = -1
+        return _Directory(
+            mtime_ns, scope.gitignores, tuple(names), tuple(subdirs), lines
+        )
+
+    def search(
+        self, query: str, search_path: Optional[str] = None, top_k: int = 50
+    ) -> List[Tuple[int, str]]:
+        """
+        Return up to `top_k` (score, absolute path) pairs for files below
+        `search_path` that fuzzy-match `query`, best first.
+        """
+        self.refresh()
+        query = query.lower().replace(os.sep, "/")
+        if "\n" in query:
+            raise ValueError("query must not contain a newline.")
+        with self._lock:
+            order, starts, blob, dirs = (
+                self._order,
+                self._starts,
+                self._blob,
+                self._dirs,
+            )
+
+        if not query:
+            raise ValueError("query must not be empty.")
+
+        scope_dirs = None
+        if search_path is not None and search_path != self.root:
+            prefix = os.path.relpath(search_path, self.root).replace(os.sep, "/")
+            scope_dirs = {
+                index
+                for index, rel_dir in enumerate(order)
+                if rel_dir == prefix or rel_dir.startswith(prefix + "/")
+            }
+
+        def scored():
+            pattern = subsequence_pattern(query)
+            dir_index = 0
+            for match in pattern.finditer(blob):
+                line_start = blob.rfind("\n", 0, match.start()) + 1
+                if not starts[dir_index] <= line_start < starts[dir_index + 1]:
+                    dir_index = bisect.bisect_right(starts, line_start) - 1
+                if scope_dirs is not None and dir_index not in scope_dirs:
+                    continue
+                line = blob[line_start : match.end()]
+                score = fuzzy_score(query, line)
+                if score is not None:
+                    # Shorter paths win ties, like fzf.
+                    yield score, -len(line), line_start, dir_index
+
+        best = heapq.nlargest(top_k, scored())
+        results = []
+        for score, _, line_start, dir_index in best:
+            rel_dir = order[dir_index]
+            name_index = blob.count("\n", starts[dir_index], line_start)
+            name = dirs[rel_dir].names[name_index]
+            results.append((score, os.path.join(self.root, rel_dir, name)))
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "directories": len(self._dirs),
+                "files": sum(len(directory.names) for directory in self._dirs.values()),
+                "bytes": len(self._blob),
+            }
+
+
+class PathIndexPublisher:
+    """
+    Path indexes kept in one process for the worker processes of a server.
+
+    `publish` refreshes the index of a directory, at most once per refresh
+    interval, and returns the path of a snapshot of it, which is rewritten
+    only when the index changed.
+    """
+
+    def __init__(
+        self, snapshot_dir: Path, refresh_interval: float = DEFAULT_REFRESH_INTERVAL
+    ):
+        self.snapshot_dir = snapshot_dir
+        self.refresh_interval = refresh_interval
+        self._indexes: Dict[str, PathIndex] = {}
+        self._published: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, root: str) -> str:
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is None:
+                index = self._indexes[root] = PathIndex(
+                    Path(root), self.refresh_interval
+                )
+            index.refresh()
+            with index._lock:
+                order, starts, blob, dirs = (
+                    index._order,
+                    index._starts,
+                    index._blob,
+                    index._dirs,
+                )
+
+            digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:16]
+            snapshot_path = str(self.snapshot_dir / f"{digest}.paths")
+            # A refresh that changed nothing keeps the same blob object.
+            if self._published.get(root) is not blob:
+                snapshot = (
+                    order,
+                    starts.tobytes(),
+                    blob,
+                    [dirs[rel_dir].names for rel_dir in order],
+                )
+                temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as file:
+                    pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, snapshot_path)
+                self._published[root] = blob
+            return snapshot_path
+
+    def serve(self, channel: "Connection") -> threading.Thread:
+        """
+        Answer the refresh requests of one worker's `PathIndexClient` from a daemon thread.
+
+        The thread ends, closing `channel`, once the worker's end is closed.
+        """
+
+        def answer():
+            with channel:
+                while True:
+                    try:
+                        root = channel.recv()
+                    except (EOFError, OSError):
+                        return
+                    try:
+                        snapshot_path = self.publish(root)
+                    except Exception as e:
+                        logger.error(f"Could not publish the path index of {root}: {e}")
+                        snapshot_path = None
+                    try:
+                        channel.send(snapshot_path)
+                    except (BrokenPipeError, OSError):
+                        return
+
+        thread = threading.Thread(
+            target=answer, name="mcp-fs-path-index-publisher", daemon=True
+        )
+        thread.start()
+        return thread
+
+
+class PathIndexClient:
+    """The end of a worker process's pipe to a `PathIndexPublisher`."""
+
+    def __init__(self, channel: "Connection"):
+        self._channel = channel
+        self._lock = threading.Lock()
+
+    def request(self, root: str) -> Optional[str]:
+        """Have the publisher refresh the index of `root`; return its snapshot path, or None."""
+        with self._lock:
+            self._channel.send(root)
+            return self._channel.recv()
+
+
+class SharedPathIndex(PathIndex):
+    """A `PathIndex` listed by a `PathIndexPublisher` and loaded from its snapshots."""
+
+    def __init__(
+        self,
+        root: Path,
+        client: PathIndexClient,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        super().__init__(root, refresh_interval)
+        self.client = client
+        self._snapshot_signature: Optional[Tuple[int, int, int]] = None
+
+    def _refresh_locked(self) -> None:
+        snapshot_path = self.client.request(self.root)
+        if snapshot_path is None:
+            # The publisher failed; list the tree in this process instead.
+            self._snapshot_signature = None
+            super()._refresh_locked()
+            return
+
+        signature = file_signature(os.stat(snapshot_path))
+        if signature == self._snapshot_signature:
+            return
+        with open(snapshot_path, "rb") as file:
+            order, starts, blob, names = pickle.load(file)
+        self._order = order
+        self._starts = array("Q")
+        self._starts.frombytes(starts)
+        self._blob = blob
+        # Listings are the publisher's business; only the names are kept.
+        self._dirs = {
+            rel_dir: _Directory(-1, (), dir_names, (), "")
+            for rel_dir, dir_names in zip(order, names)
+        }
+        self._snapshot_signature = signature
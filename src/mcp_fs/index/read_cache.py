@@ -0,0 +1,99 @@
+"""
+Cache of decoded file contents for `read_file`.
+
+Entries are keyed by resolved path and validated against the file's
+(st_mtime_ns, st_size, st_ino) on every lookup, so a file changed behind the
+server's back is re-read. The cache is bounded by the memory taken by the
+cached strings and evicts least recently used entries first.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from mcp_fs.index.line_index import file_signature
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+# A file modified within this window of being read may change again without
+# its mtime moving, so its contents are not cached.
+_RACY_WINDOW_NS = 1_000_000_000
+
+
+class ReadCache:
+    """Byte-budgeted LRU of file contents with hit, miss and eviction counters."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: OrderedDict[
+            str, Tuple[Tuple[int, int, int], str, int]
+        ] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, path: str, stat_result) -> Optional[str]:
+        """Return the cached contents of `path` if they match `stat_result`."""
+        signature = file_signature(stat_result)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(path)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, path: str, stat_result, content: str) -> None:
+        """Cache `content` as the contents of `path` at `stat_result`."""
+        if time.time_ns() - stat_result.st_mtime_ns < _RACY_WINDOW_NS:
+            return
+        size = sys.getsizeof(content)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = (file_signature(stat_result), content, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_path = next(iter(self._entries))
+                self._remove(evicted_path)
+                self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+                self.invalidations += 1
+
+    def _remove(self, path: str) -> None:
+        _, _, size = self._entries.pop(path)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,268 @@
+"""
+Cache of search results, invalidated when the searched subtree changes.
+
+Whether a subtree changed is decided from a Merkle digest of its directories:
+every directory's digest hashes the stamp of its listing with the digests of
+its subdirectories, so a subtree whose digest is unchanged had no entry
+created, removed or renamed anywhere below it. Only the searched subtree is
+walked, and no file is ever stat'ed: each directory costs a `stat` of itself
+and of its `.gitignore`, plus a `scandir` relying on the entry types it
+reports when its mtime or ignore rules changed. Listings are kept in a
+bounded LRU and get a new stamp whenever they are read again.
+Digests are recomputed at most every `check_interval` seconds per search
+path; in between, a repeat query is a dictionary lookup. Each search path's
+generation counter advances whenever its digest changes.
+
+Files rewritten in place do not change any directory mtime. The server's own
+writes report the file with `touch`, which restamps its directory's listing;
+changes made by other processes are bounded by `max_age`, after which cached
+body search results are recomputed.
+"""
+
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from mcp_fs.utils.ignore import GitignoreRules, IgnoreScope, scope_for
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_RESULTS = 10_000
+DEFAULT_MAX_LISTINGS = 100_000
+DEFAULT_CHECK_INTERVAL = 1.0
+DEFAULT_MAX_AGE = 30.0
+
+# A directory modified within this window may change again without its mtime
+# moving, so subtrees containing one are not cached.
+_RACY_WINDOW_NS = 1_000_000_000
+
+
+class _Listing(NamedTuple):
+    mtime_ns: int
+    # The `.gitignore` rules the directory was listed under
+    gitignores: Tuple[GitignoreRules, ...]
+    # Subdirectories a search descends into: not ignored and not symlinked
+    subdirs: Tuple[str, ...]
+    # Unique per listing and per `touch`, so digests never repeat
+    stamp: int
+
+
+class _Check(NamedTuple):
+    checked_at: float
+    # None for subtrees modified too recently to trust
+    digest: Optional[bytes]
+    generation: int
+
+
+class _Entry(NamedTuple):
+    digest: bytes
+    stored_at: float
+    max_age: Optional[float]
+    results: List[Any]
+
+
+class SearchResultCache:
+    """LRU of search results, each valid while its search path's subtree digest holds."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        max_listings: int = DEFAULT_MAX_LISTINGS,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+    ):
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self.max_listings = max_listings
+        self.check_interval = check_interval
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._listings: OrderedDict[str, _Listing] = OrderedDict()
+        self._checks: OrderedDict[str, _Check] = OrderedDict()
+        self._stamps = itertools.count(1)
+        # Advanced by every `touch`; a listing read across one is not kept.
+        self._touch_epoch = 0
+        # Checks made before the last `touch` are stale.
+        self._touched_at = float("-inf")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def digest(self, path: str) -> Optional[bytes]:
+        """Return the current digest of the subtree at `path`, or None if uncacheable."""
+        with self._lock:
+            check = self._checks.get(path)
+            fresh = (
+                check is not None
+                and check.checked_at > self._touched_at
+                and time.monotonic() - check.checked_at < self.check_interval
+            )
+        if not fresh:
+            check = self._check(path)
+        return check.digest
+
+    def _check(self, path: str) -> _Check:
+        checked_at = time.monotonic()
+        digest = self._subtree_digest(path)
+        with self._lock:
+            previous = self._checks.get(path)
+            generation = previous.generation if previous is not None else 0
+            if previous is None or previous.digest != digest:
+                generation += 1
+            check = _Check(checked_at, digest, generation)
+            self._checks[path] = check
+            self._checks.move_to_end(path)
+            while len(self._checks) > self.max_entries:
+                self._checks.popitem(last=False)
+        return check
+
+    def _subtree_digest(self, top: str) -> Optional[bytes]:
+        listings: Dict[str, _Listing] = {}
+        order: List[str] = []
+        stack: List[Tuple[str, IgnoreScope]] = [(top, scope_for(top))]
+        while stack:
+            dir_path, scope = stack.pop()
+            listing = self._listing(dir_path, scope)
+            if listing is None:
+                # Too recently modified to trust.
+                return None
+            if listing.mtime_ns < 0:
+                # Unreadable; it contributes nothing to the search either.
+                continue
+            listings[dir_path] = listing
+            order.append(dir_path)
+            for name in listing.subdirs:
+                child = os.path.join(dir_path, name)
+                stack.append((child, scope.enter(child)))
+
+        digests: Dict[str, bytes] = {}
+        # Subdirectories are listed after their parent, so reverse order is post-order.
+        for dir_path in reversed(order):
+            listing = listings[dir_path]
+            digest = hashlib.blake2b(str(listing.stamp).encode(), digest_size=16)
+            for name in listing.subdirs:
+                digest.update(digests.get(os.path.join(dir_path, name), b""))
+            digests[dir_path] = digest.digest()
+        return digests.get(top)
+
+    def _listing(self, dir_path: str, scope: IgnoreScope) -> Optional[_Listing]:
+        """
+        Return the memoized listing of `dir_path`, reading it again if it changed.
+
+        Returns None if the directory was modified within the racy window, and
+        a listing with a negative mtime if it cannot be read.
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return _Listing(-1, (), (), 0)
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            return None
+        with self._lock:
+            listing = self._listings.get(dir_path)
+            if (
+                listing is not None
+                and listing.mtime_ns == mtime_ns
+                and listing.gitignores == scope.gitignores
+            ):
+                self._listings.move_to_end(dir_path)
+                return listing
+            epoch = self._touch_epoch
+
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir and not scope.ignores(entry.path, entry.name, True):
+                        subdirs.append(entry.name)
+        except OSError:
+            return _Listing(-1, (), (), 0)
+        subdirs.sort()
+
+        with self._lock:
+            listing = _Listing(
+                mtime_ns, scope.gitignores, tuple(subdirs), next(self._stamps)
+            )
+            # A write reported while listing may already be missed by it.
+            if epoch == self._touch_epoch:
+                self._listings[dir_path] = listing
+                self._listings.move_to_end(dir_path)
+                while len(self._listings) > self.max_listings:
+                    self._listings.popitem(last=False)
+        return listing
+
+    def get(self, key: Hashable, digest: Optional[bytes]) -> Optional[List[Any]]:
+        """Return a copy of the results cached under `key` if they were computed at `digest`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expired = (
+                entry.max_age is not None
+                and time.monotonic() - entry.stored_at > entry.max_age
+            )
+            if digest is None or entry.digest != digest or expired:
+                del self._entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry.results)
+
+    def put(
+        self,
+        key: Hashable,
+        digest: Optional[bytes],
+        results: List[Any],
+        max_age: Optional[float] = None,
+    ) -> None:
+        """Cache `results`, computed when the searched subtree had `digest`."""
+        if digest is None or len(results) > self.max_results:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(
+                digest, time.monotonic(), max_age, list(results)
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, path: str) -> None:
+        """Record that the file at `path` changed; searches covering it are recomputed."""
+        dir_path = os.path.dirname(path)
+        with self._lock:
+            self._touch_epoch += 1
+            listing = self._listings.get(dir_path)
+            if listing is not None:
+                self._listings[dir_path] = listing._replace(stamp=next(self._stamps))
+            # Recheck every search path on the next lookup, without waiting for the interval.
+            self._touched_at = time.monotonic()
+
+    def generation(self, path: str) -> int:
+        with self._lock:
+            check = self._checks.get(path)
+            return check.generation if check is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "listings": len(self._listings),
+                "max_listings": self.max_listings,
+            }
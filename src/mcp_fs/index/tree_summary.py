@@ -0,0 +1,171 @@
+"""
+Per-subtree file counts and sizes for `directory_tree`.
+
+Every directory is summarized by one `os.scandir` pass: the number and total
+size of the files directly inside it and the names of the subdirectories to
+descend into. Entries are skipped by the same ignore rules as the search
+walk, `.gitignore` files included. Summaries are memoized under the
+directory's mtime, which changes whenever an entry is created, removed or
+renamed in it, and the `.gitignore` rules in effect, so summing a subtree
+that has not changed costs a `stat` of each directory and of its
+`.gitignore` instead of a listing and a `stat` per file.
+
+A file rewritten in place (appended to, or truncated and rewritten) keeps
+its directory's mtime, so its new size shows up only once the directory
+itself changes. Writes through `write_file` replace the file by renaming and
+are picked up immediately.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from mcp_fs.utils.ignore import GitignoreRules, IgnoreScope, scope_for
+
+
+DEFAULT_MAX_ENTRIES = 200_000
+
+# A directory modified within this window of being listed may change again
+# without its mtime moving, so its summary is not memoized.
+_RACY_WINDOW_NS = 1_000_000_000
+
+
+class DirectorySummary(NamedTuple):
+    mtime_ns: int
+    # Files, symlinks and other non-directory entries directly inside
+    files: int
+    bytes: int
+    # Subdirectories that are descended into: not ignored and not symlinked
+    subdirs: Tuple[str, ...]
+    # The `.gitignore` rules the directory was listed under
+    gitignores: Tuple[GitignoreRules, ...] = ()
+
+
+class SubtreeTotals(NamedTuple):
+    files: int
+    dirs: int
+    bytes: int
+
+
+class TreeSummaryCache:
+    """LRU of directory summaries, validated against the directory mtime."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, DirectorySummary] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def summarize(
+        self, dir_path: str, scope: Optional[IgnoreScope] = None
+    ) -> Optional[DirectorySummary]:
+        """
+        Return the summary of `dir_path`, or None if it cannot be read.
+
+        `scope` is the ignore scope inside `dir_path`, looked up if not given.
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None
+        if scope is None:
+            scope = scope_for(dir_path)
+        with self._lock:
+            summary = self._entries.get(dir_path)
+            if (
+                summary is not None
+                and summary.mtime_ns == mtime_ns
+                and summary.gitignores == scope.gitignores
+            ):
+                self._entries.move_to_end(dir_path)
+                self.hits += 1
+                return summary
+            self.misses += 1
+
+        try:
+            summary = self._scan(dir_path, mtime_ns, scope)
+        except OSError:
+            return None
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            return summary
+        with self._lock:
+            self._entries[dir_path] = summary
+            self._entries.move_to_end(dir_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return summary
+
+    @staticmethod
+    def _scan(dir_path: str, mtime_ns: int, scope: IgnoreScope) -> DirectorySummary:
+        files = total_bytes = 0
+        subdirs: List[str] = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if scope.ignores(entry.path, entry.name, is_dir):
+                        continue
+                    if is_dir:
+                        subdirs.append(entry.name)
+                        continue
+                    total_bytes += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                files += 1
+        subdirs.sort()
+        return DirectorySummary(
+            mtime_ns, files, total_bytes, tuple(subdirs), scope.gitignores
+        )
+
+    def subtree_totals(
+        self, top: str
+    ) -> Tuple[Dict[str, SubtreeTotals], Dict[str, DirectorySummary]]:
+        """
+        Sum file counts and sizes over every directory below `top`.
+
+        Returns the totals and the summary of every readable directory in
+        the subtree, keyed by path. The walk is iterative, so arbitrarily
+        deep trees are fine.
+        """
+        summaries: Dict[str, DirectorySummary] = {}
+        order: List[str] = []
+        stack = [(top, scope_for(top))]
+        while stack:
+            dir_path, scope = stack.pop()
+            summary = self.summarize(dir_path, scope)
+            if summary is None:
+                continue
+            summaries[dir_path] = summary
+            order.append(dir_path)
+            for name in summary.subdirs:
+                child = os.path.join(dir_path, name)
+                stack.append((child, scope.enter(child)))
+
+        totals: Dict[str, SubtreeTotals] = {}
+        # Children are visited after their parent, so reverse order is post-order.
+        for dir_path in reversed(order):
+            summary = summaries[dir_path]
+            files, dirs, total_bytes = summary.files, 0, summary.bytes
+            for name in summary.subdirs:
+                child = totals.get(os.path.join(dir_path, name))
+                if child is not None:
+                    files += child.files
+                    dirs += child.dirs + 1
+                    total_bytes += child.bytes
+            totals[dir_path] = SubtreeTotals(files, dirs, total_bytes)
+        return totals, summaries
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,486 @@
+"""
+In-memory directory trees for the allowed directories, kept current by a watcher.
+
+Each allowed directory gets a `DirectoryTree` holding the entry names of every
+directory below it (ignored directories are listed but not descended into,
+by the same rules as the search walk, `.gitignore` files included).
+A background thread keeps the tree up to date from inotify events, or by
+polling directory mtimes where inotify is unavailable, so directory listings
+and file name searches can be answered without touching the disk. When
+polling, a `.gitignore` edited in place is noticed only once its directory
+changes.
+"""
+
+import bisect
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mcp_fs.utils.ignore import GITIGNORE_FILE, IgnoreScope, scope_for
+from mcp_fs.utils.path_utils import expand_path
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+)
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# (lowercased names blob, name offsets, directory id per name, directory paths, names)
+_NameIndex = Tuple[str, array, array, List[str], List[str]]
+
+
+class DirectoryTree:
+    """
+    Entry names of every directory below `root`, keyed by absolute directory path.
+
+    Each directory maps entry names to whether the entry is a directory
+    (following symlinks, like `os.walk`). Symlinked and ignored directories
+    are listed in their parent but never descended into. The ignore scope
+    inside every tracked directory is kept, so a changed `.gitignore` can be
+    detected when its directory is rescanned.
+    """
+
+    def __init__(self, root: Path):
+        self.root = str(root)
+        self._dirs: Dict[str, Dict[str, bool]] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._scopes: Dict[str, IgnoreScope] = {}
+        self._lock = threading.RLock()
+        self._name_index: Optional[_NameIndex] = None
+
+    def scan(
+        self, dir_path: str, on_directory: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """
+        Recursively (re)load `dir_path` from disk.
+
+        `on_directory` is called for every directory before it is listed, which
+        lets an inotify watch be placed before its entries are read.
+        """
+        stack = [(dir_path, self._scope_inside(dir_path))]
+        while stack:
+            current, scope = stack.pop()
+            if on_directory is not None:
+                on_directory(current)
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+                entries = os.scandir(current)
+            except OSError:
+                continue
+
+            children: Dict[str, bool] = {}
+            with entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                        if is_dir and self._descends_into(entry, scope):
+                            stack.append((entry.path, scope.enter(entry.path)))
+                    except OSError:
+                        is_dir = False
+                    children[entry.name] = is_dir
+
+            with self._lock:
+                self._dirs[current] = children
+                self._mtimes[current] = mtime_ns
+                self._scopes[current] = scope
+                self._name_index = None
+
+    def reload(
+        self, dir_path: str, on_directory: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """Drop `dir_path` and everything below it, then scan it again."""
+        self.remove_subtree(dir_path)
+        self.scan(dir_path, on_directory)
+
+    def rescan_directory(self, dir_path: str) -> None:
+        """
+        Reload the entries of a single directory, scanning any new subdirectories.
+
+        If the directory's `.gitignore` changed, the whole subtree is reloaded.
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            self.remove_subtree(dir_path)
+            return
+
+        scope = self._scope_inside(dir_path)
+        with self._lock:
+            previous = self._dirs.get(dir_path, {})
+            previous_scope = self._scopes.get(dir_path)
+        if previous_scope is not None and previous_scope.gitignores != scope.gitignores:
+            self.reload(dir_path)
+            return
+        children: Dict[str, bool] = {}
+        new_dirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+                if (
+                    is_dir
+                    and self._descends_into(entry, scope)
+                    and entry.name not in previous
+                ):
+                    new_dirs.append(entry.path)
+            except OSError:
+                is_dir = False
+            children[entry.name] = is_dir
+
+        for name, was_dir in previous.items():
+            if was_dir and name not in children:
+                self.remove_subtree(os.path.join(dir_path, name))
+        with self._lock:
+            self._dirs[dir_path] = children
+            self._mtimes[dir_path] = mtime_ns
+            self._name_index = None
+        for new_dir in new_dirs:
+            self.scan(new_dir)
+
+    def add_entry(self, dir_path: str, name: str, is_dir: bool) -> None:
+        with self._lock:
+            children = self._dirs.get(dir_path)
+            if children is not None:
+                children[name] = is_dir
+                self._name_index = None
+
+    def remove_entry(self, dir_path: str, name: str) -> None:
+        with self._lock:
+            children = self._dirs.get(dir_path)
+            if children is not None and children.pop(name, None) is not None:
+                self._name_index = None
+
+    def remove_subtree(self, dir_path: str) -> None:
+        prefix = dir_path + os.sep
+        with self._lock:
+            for path in [
+                p for p in self._dirs if p == dir_path or p.startswith(prefix)
+            ]:
+                del self._dirs[path]
+                self._mtimes.pop(path, None)
+                self._scopes.pop(path, None)
+            self._name_index = None
+
+    def directory_mtimes(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            return list(self._mtimes.items())
+
+    def is_tracked(self, dir_path: str) -> bool:
+        with self._lock:
+            return dir_path in self._dirs
+
+    def list_directory(self, dir_path: str) -> Optional[List[str]]:
+        """Return the entry names of `dir_path`, or None if it is not tracked."""
+        with self._lock:
+            children = self._dirs.get(dir_path)
+            return list(children) if children is not None else None
+
+    def find_files(self, search_path: str, substring: str) -> List[str]:
+        """
+        Return paths of non-directory entries below `search_path` whose name
+        contains `substring`, case-insensitively.
+        """
+        with self._lock:
+            if self._name_index is None:
+                self._name_index = self._build_name_index()
+            blob, offsets, dir_ids, dir_paths, names = self._name_index
+
+        prefix = search_path + os.sep
+        needle = substring.lower()
+        matching_files = []
+        position = blob.find(needle)
+        while position != -1 and position < len(blob):
+            entry = bisect.bisect_right(offsets, position) - 1
+            dir_path = dir_paths[dir_ids[entry]]
+            if dir_path == search_path or dir_path.startswith(prefix):
+                matching_files.append(os.path.join(dir_path, names[entry]))
+            position = blob.find(needle, offsets[entry + 1])
+        return matching_files
+
+    def _build_name_index(self) -> _NameIndex:
+        """
+        Lay out every file name that is not ignored, lowercased and NUL-separated, in one string.
+
+        A substring search then becomes a handful of `str.find` calls over a
+        single buffer instead of a Python-level loop over every entry.
+        """
+        names: List[str] = []
+        lowered: List[str] = []
+        offsets = array("Q")
+        dir_ids = array("I")
+        dir_paths: List[str] = []
+        position = 0
+        for dir_path, children in self._dirs.items():
+            dir_id = len(dir_paths)
+            dir_paths.append(dir_path)
+            scope = self._scopes[dir_path]
+            for name, is_dir in children.items():
+                if is_dir or scope.ignores(os.path.join(dir_path, name), name, False):
+                    continue
+                lower_name = name.lower()
+                names.append(name)
+                lowered.append(lower_name)
+                offsets.append(position)
+                dir_ids.append(dir_id)
+                position += len(lower_name) + 1
+        offsets.append(position)
+        lowered.append("")
+        return "\0".join(lowered), offsets, dir_ids, dir_paths, names
+
+    def descends_into(self, dir_path: str, name: str) -> bool:
+        """Tell whether a new directory `name` inside tracked `dir_path` should be scanned."""
+        with self._lock:
+            scope = self._scopes.get(dir_path)
+        path = os.path.join(dir_path, name)
+        return (
+            scope is not None
+            and not os.path.islink(path)
+            and not scope.ignores(path, name, True)
+        )
+
+    @staticmethod
+    def _descends_into(entry: os.DirEntry, scope: IgnoreScope) -> bool:
+        return not entry.is_symlink() and not scope.ignores(
+            entry.path, entry.name, True
+        )
+
+    def _scope_inside(self, dir_path: str) -> IgnoreScope:
+        """Return the ignore scope inside `dir_path`, from its parent's if that is tracked."""
+        with self._lock:
+            parent_scope = self._scopes.get(os.path.dirname(dir_path))
+        if dir_path == self.root or parent_scope is None:
+            return scope_for(dir_path)
+        return parent_scope.enter(dir_path)
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        # Loaded here rather than at import, since most servers never watch.
+        import ctypes
+        import ctypes.util
+
+        self._get_errno = ctypes.get_errno
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            code = self._get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = self._get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Return (watch descriptor, mask, name) for events available within `timeout`."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _TreeWatcherThread(threading.Thread):
+    """Keeps one `DirectoryTree` current, preferring inotify over polling."""
+
+    def __init__(
+        self,
+        tree: DirectoryTree,
+        stop_event: threading.Event,
+        poll_interval: float,
+        use_inotify: bool,
+    ):
+        super().__init__(name=f"tree-watcher:{tree.root}", daemon=True)
+        self.tree = tree
+        self.stop_event = stop_event
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.ready = threading.Event()
+        self._watches: Dict[int, str] = {}
+
+    def run(self) -> None:
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify unavailable for {self.tree.root}, polling: {e}")
+            else:
+                try:
+                    self._run_inotify(inotify)
+                    return
+                except OSError as e:
+                    logger.warning(
+                        f"inotify failed for {self.tree.root}, falling back to polling: {e}"
+                    )
+                finally:
+                    inotify.close()
+        self._run_polling()
+
+    def _run_polling(self) -> None:
+        self.tree.scan(self.tree.root)
+        self.ready.set()
+        while not self.stop_event.wait(self.poll_interval):
+            for dir_path, mtime_ns in self.tree.directory_mtimes():
+                try:
+                    changed = os.stat(dir_path).st_mtime_ns != mtime_ns
+                except OSError:
+                    changed = True
+                if changed and self.tree.is_tracked(dir_path):
+                    self.tree.rescan_directory(dir_path)
+
+    def _run_inotify(self, inotify: _Inotify) -> None:
+        def watch(dir_path: str) -> None:
+            self._watches[inotify.add_watch(dir_path, _WATCH_MASK)] = dir_path
+
+        self.tree.scan(self.tree.root, on_directory=watch)
+        self.ready.set()
+        while not self.stop_event.is_set():
+            for wd, mask, name in inotify.read_events(timeout=0.5):
+                if mask & _IN_Q_OVERFLOW:
+                    logger.warning(
+                        f"inotify queue overflow, rescanning {self.tree.root}"
+                    )
+                    self.tree.scan(self.tree.root, on_directory=watch)
+                    continue
+                if mask & _IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                dir_path = self._watches.get(wd)
+                if dir_path is None:
+                    continue
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                    # Below the root, the parent's DELETE/MOVED_FROM event already
+                    # handled this, and a moved directory's watch now points at its
+                    # new location.
+                    if dir_path == self.tree.root:
+                        self.tree.remove_subtree(dir_path)
+                    continue
+
+                path = os.path.join(dir_path, name)
+                if name == GITIGNORE_FILE and self.tree.is_tracked(dir_path):
+                    # The rules below this directory changed.
+                    self.tree.reload(dir_path, on_directory=watch)
+                elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                    is_dir = os.path.isdir(path)
+                    self.tree.add_entry(dir_path, name, is_dir)
+                    if mask & _IN_ISDIR and self.tree.descends_into(dir_path, name):
+                        self.tree.scan(path, on_directory=watch)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    self.tree.remove_entry(dir_path, name)
+                    if mask & _IN_ISDIR:
+                        self.tree.remove_subtree(path)
+
+
+class TreeWatcher:
+    """
+    Keeps an in-memory `DirectoryTree` of every allowed directory.
+
+    Queries return None when they cannot be answered from a tree (the initial
+    scan has not finished, or the path lies inside an ignored directory), in
+    which case callers should fall back to reading the disk.
+    """
+
+    def __init__(
+        self,
+        allowed_dirs: List[Path],
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ):
+        self._stop_event = threading.Event()
+        self._threads = [
+            _TreeWatcherThread(
+                DirectoryTree(expand_path(dir_path)),
+                self._stop_event,
+                poll_interval,
+                use_inotify,
+            )
+            for dir_path in allowed_dirs
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return all(thread.ready.wait(timeout) for thread in self._threads)
+
+    def _tree_for(self, path: Path) -> Optional[DirectoryTree]:
+        path_str = str(path)
+        for thread in self._threads:
+            if thread.ready.is_set() and thread.tree.is_tracked(path_str):
+                return thread.tree
+        return None
+
+    def list_directory(self, dir_path: Path) -> Optional[List[str]]:
+        tree = self._tree_for(dir_path)
+        return tree.list_directory(str(dir_path)) if tree is not None else None
+
+    def find_files(self, search_path: Path, substring: str) -> Optional[List[str]]:
+        tree = self._tree_for(search_path)
+        return (
+            tree.find_files(str(search_path), substring) if tree is not None else None
+        )
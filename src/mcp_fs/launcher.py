@@ -7,11 +7,14 @@ This modules provides a programmatic way to launch the MCP server
 import argparse
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from easy_mcp.model import TransportType
 
-from mcp_fs.server import FileSystemMCP
+from mcp_fs.utils import startup
+from mcp_fs.utils.async_utils import DEFAULT_TOOL_WORKERS
+from mcp_fs.utils.atomic_write import Durability
+from mcp_fs.utils.profiling import parse_profile_specs
 
 
 logger = logging.getLogger(__name__)
@@ -27,6 +30,26 @@ def directory_path_type(path_str: str) -> Path:
         )
 
 
+def tool_concurrency_type(value: str) -> Tuple[str, int]:
+    try:
+        tool_name, limit = value.split("=", 1)
+        return tool_name.strip(), int(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Invalid tool concurrency limit: {value}. Expected TOOL_NAME=LIMIT."
+        )
+
+
+def profile_tool_type(value: str) -> Tuple[str, int]:
+    try:
+        [(tool_name, calls)] = parse_profile_specs([value.strip()]).items()
+        return tool_name, calls
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Invalid tool profile spec: {value}. Expected TOOL_NAME or TOOL_NAME=CALLS."
+        )
+
+
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Launch the File System MCP Server")
     parser.add_argument(
@@ -67,6 +90,67 @@ def parse_arguments() -> argparse.Namespace:
         help="Comma-separated list of allowed resources for the MCP server.",
         default="",
     )
+    parser.add_argument(
+        "--watch-dirs",
+        action="store_true",
+        help="Keep an in-memory tree of the allowed directories for listings and name searches.",
+    )
+    parser.add_argument(
+        "--tool-workers",
+        type=int,
+        help="Number of worker threads running blocking tool calls.",
+        default=DEFAULT_TOOL_WORKERS,
+    )
+    parser.add_argument(
+        "--tool-concurrency",
+        type=tool_concurrency_type,
+        nargs="*",
+        help="Per-tool concurrency limits, e.g. search_file_bodies_for_substring=2.",
+        default=[],
+    )
+    parser.add_argument(
+        "--write-durability",
+        type=str.lower,
+        help="How hard writes try to reach disk: none, file (fsync the file) or directory (fsync the file and its directory).",
+        default="none",
+        choices=[d.value for d in Durability],
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve per-tool metrics in the Prometheus text format on this port, at /metrics.",
+        required=False,
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=directory_path_type,
+        help="Write spans of tool calls to this file in the Chrome trace-event format.",
+        required=False,
+    )
+    parser.add_argument(
+        "--profile-tool",
+        type=profile_tool_type,
+        nargs="*",
+        help="Profile the next calls of a tool with cProfile, e.g. search_file_bodies_for_substring=5.",
+        default=[],
+    )
+    parser.add_argument(
+        "--profile-dir",
+        type=directory_path_type,
+        help="Directory profiles are written to. Defaults to ~/.cache/mcp_fs/profiles.",
+        required=False,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of server processes behind the SSE transport's address.",
+        default=1,
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Log how long each module took to import before the server started.",
+    )
     return parser.parse_args()
 
 
@@ -77,22 +161,59 @@ def start(
     port: Optional[int] = None,
     allowed_tools: Optional[List[str]] = None,
     allowed_resources: Optional[List[str]] = None,
+    watch_dirs: bool = False,
+    tool_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_concurrency: Optional[Dict[str, int]] = None,
+    write_durability: Durability = Durability.NONE,
+    metrics_port: Optional[int] = None,
+    trace_file: Optional[Path] = None,
+    profile_tools: Optional[Dict[str, int]] = None,
+    profile_dir: Optional[Path] = None,
+    workers: int = 1,
 ):
     """
     Start the File System MCP Server with the specified parameters.
+
+    With more than one worker, the SSE transport is served by that many
+    server processes behind one address. The server's modules are imported
+    here rather than with the launcher, so arguments are parsed, and import
+    profiling started, before they load.
     """
     logger.info("Starting File System MCP Server...")
     logger.info(f"Allowed directories: {allowed_dirs}")
 
-    mcp_server = FileSystemMCP(
+    transport = TransportType(transport.lower())
+    server_kwargs = dict(
         allowed_dirs=allowed_dirs,
-        transport=TransportType(transport.lower()),
-        host=host,
-        port=port,
         allowed_tools=allowed_tools,
         allowed_resources=allowed_resources,
+        watch_dirs=watch_dirs,
+        tool_workers=tool_workers,
+        tool_concurrency=tool_concurrency,
+        write_durability=write_durability,
+        metrics_port=metrics_port,
+        trace_file=trace_file,
+        profile_tools=profile_tools,
+        profile_dir=profile_dir,
     )
 
+    if workers > 1:
+        if transport != TransportType("sse"):
+            raise ValueError(
+                "Multiple workers are only supported with the SSE transport."
+            )
+        from mcp_fs.workers import serve
+
+        startup.report("Workers starting")
+        serve(workers, host=host, port=port, **server_kwargs)
+        return
+
+    from mcp_fs.server import FileSystemMCP
+
+    mcp_server = FileSystemMCP(
+        transport=transport, host=host, port=port, **server_kwargs
+    )
+    startup.report()
     mcp_server.start()
 
 
@@ -100,6 +221,8 @@ def start(
 # or `python src/mcp_fs/launcher.py`
 if __name__ == "__main__":
     args = parse_arguments()
+    if args.startup_profile:
+        startup.profile_imports()
 
     allowed_dirs = [Path(dir_path) for dir_path in args.allowed_dirs]
 
@@ -122,4 +245,13 @@ if __name__ == "__main__":
         port=args.port,
         allowed_tools=allowed_tools,
         allowed_resources=allowed_resources,
+        watch_dirs=args.watch_dirs,
+        tool_workers=args.tool_workers,
+        tool_concurrency=dict(args.tool_concurrency),
+        write_durability=Durability(args.write_durability),
+        metrics_port=args.metrics_port,
+        trace_file=args.trace_file,
+        profile_tools=dict(args.profile_tool) or None,
+        profile_dir=args.profile_dir,
+        workers=args.workers,
     )
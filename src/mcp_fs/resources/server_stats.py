@@ -0,0 +1,31 @@
+"""Runtime statistics of the server's caches."""
+
+from typing import Callable, Dict
+
+from easy_mcp.registration.resources import mcp_resource
+
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], dict]) -> None:
+    """Publish the statistics returned by `provider` under `name`."""
+    _providers[name] = provider
+
+
+@mcp_resource("stats://caches")
+def get_cache_stats() -> dict:
+    """
+    name: get_cache_stats
+    description: >
+        Retrieve hit, miss and eviction counters of the server's caches.
+
+    Returns:
+        dict: The statistics of every registered cache, keyed by cache name.
+
+    Example:
+        >>> get_cache_stats()
+        {'read_cache': {'hits': 120, 'misses': 14, 'evictions': 0, 'invalidations': 3,
+                        'entries': 11, 'bytes': 482133, 'max_bytes': 67108864}}
+    """
+    return {name: provider() for name, provider in _providers.items()}
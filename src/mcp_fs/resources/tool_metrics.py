@@ -0,0 +1,54 @@
+"""Latency and I/O metrics of the server's tools."""
+
+from typing import Optional
+
+from easy_mcp.registration.resources import mcp_resource
+
+from mcp_fs.utils.metrics import ToolMetrics
+
+
+_metrics: Optional[ToolMetrics] = None
+
+
+def set_metrics(metrics: ToolMetrics) -> None:
+    """Publish `metrics` through the resources of this module."""
+    global _metrics
+    _metrics = metrics
+
+
+@mcp_resource("metrics://tools")
+def get_tool_metrics() -> dict:
+    """
+    name: get_tool_metrics
+    description: >
+        Retrieve call counts, errors, latency histograms and I/O counters of every tool.
+
+    Returns:
+        dict: The metrics of every tool, keyed by tool name. Latencies are in seconds;
+        percentiles are the upper bounds of the histogram buckets holding them.
+
+    Example:
+        >>> get_tool_metrics()
+        {'read_file': {'calls': 42, 'errors': 1, 'seconds_total': 0.0213,
+                       'seconds_mean': 0.0005, 'seconds_p50': 0.0005, 'seconds_p90': 0.001,
+                       'seconds_p99': 0.0025, 'latency_buckets': {'0.0005': 30, ...},
+                       'cache_hits': 25, 'cache_misses': 17, 'bytes_read': 181234}}
+    """
+    return _metrics.snapshot() if _metrics is not None else {}
+
+
+@mcp_resource("metrics://prometheus")
+def get_prometheus_metrics() -> str:
+    """
+    name: get_prometheus_metrics
+    description: >
+        Retrieve the tool metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics as Prometheus text.
+
+    Example:
+        >>> get_prometheus_metrics()
+        '# HELP mcp_fs_tool_call_seconds Latency of tool calls.\\n...'
+    """
+    return _metrics.render_prometheus() if _metrics is not None else ""
@@ -0,0 +1,625 @@
+"""
+In-process parallel search of file bodies.
+
+The search path is split into subtree partitions which are scanned by a pool
+of worker processes. Each worker walks its partition with `os.scandir`, skips
+binary and compressed files, and scans the rest through `mmap`, with `bytes.find` for literal text and a compiled regex otherwise.
+Matches are yielded as partitions complete, and the search stops early once
+`max_results` matches have been found.
+
+Regex patterns are only run on files, and from positions, where the literal
+text every match must contain occurs. A search that runs past its timeout is
+stopped and raises `SearchTimeoutError`. A regex can spend unbounded time on
+a single file without returning to Python, so regex searches with a timeout
+always run in the worker pool, where a stuck worker can be terminated.
+
+In hit mode the same single scan also records the line number and the
+surrounding lines of every matching line, like `grep -n -C`.
+"""
+
+import functools
+import itertools
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from mcp_fs.index.content_sniffer import (
+    SNIFF_SIZE,
+    ContentSniffer,
+    FileKind,
+)
+from mcp_fs.search.patterns import compile_pattern
+from mcp_fs.utils import metrics, tracing
+from mcp_fs.utils.ignore import IgnoreScope, scope_for, walk
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PROCESSES = min(4, os.cpu_count() or 1)
+DEFAULT_MAX_HITS_PER_FILE = 10
+DEFAULT_MAX_HITS = 200
+MAX_LINE_BYTES = 1024
+
+_SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+_CANCEL_SLOTS = 1024
+_CANCEL_CHECK_INTERVAL = 64
+# How long workers still running after a timeout get to notice the cancel
+# flag before the pool is torn down.
+_STUCK_WORKER_GRACE = 1.0
+
+# (generation, directories to walk recursively with their ignore rules, files to scan)
+_Partition = Tuple[int, List[Tuple[str, IgnoreScope]], List[str]]
+
+# One matching line: path, line_number, line, before and after.
+Hit = Dict[str, Any]
+
+# Set in each worker process by `_init_worker`; one flag per search generation.
+_cancel_flags = None
+
+# File classifications of the current process. Pool workers outlive a search,
+# so files found to be binary are not opened again by later searches.
+_sniffer = ContentSniffer()
+
+
+class SearchTimeoutError(TimeoutError):
+    """Raised when a search runs longer than its timeout."""
+
+
+def _init_worker(cancel_flags, trace_file: Optional[Path] = None) -> None:
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+    tracing.attach(trace_file)
+
+
+def _is_cancelled(generation: int) -> bool:
+    return _cancel_flags is not None and bool(_cancel_flags[generation % _CANCEL_SLOTS])
+
+
+def _should_stop(
+    count: int, generation: int, stop: Optional[Callable[[], bool]]
+) -> bool:
+    if count % _CANCEL_CHECK_INTERVAL == 0 and _is_cancelled(generation):
+        return True
+    return stop is not None and stop()
+
+
+def _find_lowered(buffer, needle: bytes, position: int = 0) -> int:
+    """Find lowercased `needle` case-insensitively at or after `position`, or return -1."""
+    overlap = max(len(needle) - 1, 0)
+    # Lowercase fixed-size windows, so memory stays bounded for mmapped
+    # files of any size.
+    for start in range(position, max(len(buffer), 1), _SCAN_CHUNK_SIZE):
+        window = buffer[start : start + _SCAN_CHUNK_SIZE + overlap]
+        index = window.lower().find(needle)
+        if index != -1:
+            return start + index
+    return -1
+
+
+@functools.lru_cache(maxsize=64)
+def _matcher(pattern: str, mode: str = "grep") -> Callable[[bytes], bool]:
+    """Return a function checking whether a buffer matches `pattern`."""
+    regex, literal = compile_pattern(pattern, mode)
+    if regex is None:
+        return lambda buffer: _find_lowered(buffer, literal) != -1
+
+    def matches_regex(buffer) -> bool:
+        if literal and _find_lowered(buffer, literal) == -1:
+            return False
+        return regex.search(buffer) is not None
+
+    return matches_regex
+
+
+@functools.lru_cache(maxsize=64)
+def _finder(pattern: str, mode: str = "grep") -> Callable[[bytes, int], int]:
+    """Return a function giving the offset of the first match at or after a position, or -1."""
+    regex, literal = compile_pattern(pattern, mode)
+    if regex is None:
+        return lambda buffer, position: _find_lowered(buffer, literal, position)
+
+    def find_regex(buffer, position: int) -> int:
+        if literal and _find_lowered(buffer, literal, position) == -1:
+            return -1
+        match = regex.search(buffer, position)
+        return -1 if match is None else match.start()
+
+    return find_regex
+
+
+def _decode_line(line: bytes) -> str:
+    return line[:MAX_LINE_BYTES].rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def _collect_hits(
+    path: str,
+    buffer,
+    find: Callable[[bytes, int], int],
+    context_lines: int,
+    max_hits: int,
+) -> List[Hit]:
+    """Record the matching lines of one buffer, scanning it once from start to end."""
+    hits: List[Hit] = []
+    size = len(buffer)
+    position = 0
+    line_number = 1
+    counted_to = 0
+    while len(hits) < max_hits and position < size:
+        offset = find(buffer, position)
+        if offset == -1:
+            break
+        line_start = buffer.rfind(b"\n", position, offset) + 1 or position
+        line_end = buffer.find(b"\n", offset)
+        if line_end == -1:
+            line_end = size
+        line_number += buffer[counted_to:line_start].count(b"\n")
+        counted_to = line_start
+
+        context_start = line_start
+        for _ in range(context_lines):
+            if context_start == 0:
+                break
+            context_start = buffer.rfind(b"\n", 0, context_start - 1) + 1
+        context_end = line_end
+        for _ in range(context_lines):
+            if context_end >= size:
+                break
+            next_end = buffer.find(b"\n", context_end + 1)
+            context_end = size if next_end == -1 else next_end
+
+        before = buffer[context_start:line_start].split(b"\n")[:-1]
+        after = (
+            buffer[line_end + 1 : context_end].split(b"\n")
+            if context_end > line_end
+            else []
+        )
+        hits.append(
+            {
+                "path": path,
+                "line_number": line_number,
+                "line": _decode_line(buffer[line_start:line_end]),
+                "before": [_decode_line(line) for line in before],
+                "after": [_decode_line(line) for line in after],
+            }
+        )
+        # Further matches on the same line belong to this hit.
+        position = line_end + 1
+    return hits
+
+
+def _scannable_head(
+    file, path: str, kind: Optional[FileKind], sniffer: ContentSniffer
+) -> Optional[bytes]:
+    """Return the first bytes of an open file, or None if it is empty or not searchable text."""
+    head = file.read(SNIFF_SIZE)
+    if kind is None:
+        kind = sniffer.record(path, os.fstat(file.fileno()), head)
+    return head if head and kind.scannable else None
+
+
+def file_hits(
+    path: str,
+    pattern: str,
+    context_lines: int = 0,
+    max_hits: int = DEFAULT_MAX_HITS_PER_FILE,
+    mode: str = "grep",
+    sniffer: Optional[ContentSniffer] = None,
+) -> List[Hit]:
+    """Return the matching lines of one file with their context, skipping binaries."""
+    sniffer = sniffer or _sniffer
+    kind = sniffer.lookup(path, os.stat(path))
+    if kind is not None and not kind.scannable:
+        return []
+    find = _finder(pattern, mode)
+    with open(path, "rb") as file:
+        head = _scannable_head(file, path, kind, sniffer)
+        if head is None:
+            return []
+        if len(head) < SNIFF_SIZE:
+            return _collect_hits(path, head, find, context_lines, max_hits)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _collect_hits(path, buffer, find, context_lines, max_hits)
+
+
+def file_matches(
+    path: str,
+    matches: Callable[[bytes], bool],
+    sniffer: Optional[ContentSniffer] = None,
+) -> bool:
+    """Scan one file, skipping files `sniffer` classifies as binary or compressed."""
+    sniffer = sniffer or _sniffer
+    kind = sniffer.lookup(path, os.stat(path))
+    if kind is not None and not kind.scannable:
+        return False
+    with open(path, "rb") as file:
+        head = _scannable_head(file, path, kind, sniffer)
+        if head is None:
+            return False
+        if len(head) < SNIFF_SIZE:
+            return matches(head)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return matches(buffer)
+
+
+def _partition_files(partition: _Partition) -> Iterator[str]:
+    _, dirs, file_paths = partition
+    return itertools.chain(
+        file_paths,
+        itertools.chain.from_iterable(
+            _walk_files(dir_path, scope) for dir_path, scope in dirs
+        ),
+    )
+
+
+def _walk_files(dir_path: str, scope: IgnoreScope) -> Iterator[str]:
+    """Yield regular files below `dir_path`, not following symlinks (like `grep -r`)."""
+    for _, _, files in walk(dir_path, scope):
+        for entry in files:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
+
+
+def search_partition(
+    partition: _Partition,
+    pattern: str,
+    max_results: Optional[int],
+    mode: str = "grep",
+    stop: Optional[Callable[[], bool]] = None,
+    sniffer: Optional[ContentSniffer] = None,
+) -> Tuple[List[str], int]:
+    """
+    Return the matching files of one partition and the number of files
+    looked at; runs in a worker process.
+
+    With tracing on, the time spent walking the partition and scanning its
+    files is recorded as one span each. The scan stops early when the search is cancelled or, when scanning in
+    the calling process, once `stop` returns True. Workers classify files
+    with their own `ContentSniffer`; scans in the calling process can share
+    one through `sniffer`.
+    """
+    generation = partition[0]
+    matches = _matcher(pattern, mode)
+
+    walk_stage = tracing.stage("walk")
+    scan_stage = tracing.stage("scan")
+    matching_files = []
+    scanned = 0
+    for count, path in enumerate(walk_stage.iterate(_partition_files(partition))):
+        if _should_stop(count, generation, stop):
+            break
+        scanned += 1
+        try:
+            with scan_stage:
+                if file_matches(path, matches, sniffer):
+                    matching_files.append(path)
+        except (OSError, ValueError):
+            continue
+        if max_results is not None and len(matching_files) >= max_results:
+            break
+    walk_stage.close(files=scanned)
+    scan_stage.close(files=scanned, matches=len(matching_files))
+    return matching_files, scanned
+
+
+def search_partition_hits(
+    partition: _Partition,
+    pattern: str,
+    context_lines: int,
+    max_hits_per_file: int,
+    max_hits: Optional[int],
+    mode: str = "grep",
+    stop: Optional[Callable[[], bool]] = None,
+    sniffer: Optional[ContentSniffer] = None,
+) -> Tuple[List[Hit], int]:
+    """
+    Return the matching lines of one partition and the number of files
+    looked at; runs in a worker process.
+    """
+    generation = partition[0]
+
+    walk_stage = tracing.stage("walk")
+    scan_stage = tracing.stage("scan")
+    hits: List[Hit] = []
+    scanned = 0
+    for count, path in enumerate(walk_stage.iterate(_partition_files(partition))):
+        if _should_stop(count, generation, stop):
+            break
+        scanned += 1
+        per_file = max_hits_per_file
+        if max_hits is not None:
+            per_file = min(per_file, max_hits - len(hits))
+        try:
+            with scan_stage:
+                hits.extend(
+                    file_hits(path, pattern, context_lines, per_file, mode, sniffer)
+                )
+        except (OSError, ValueError):
+            continue
+        if max_hits is not None and len(hits) >= max_hits:
+            break
+    walk_stage.close(files=scanned)
+    scan_stage.close(files=scanned, hits=len(hits))
+    return hits, scanned
+
+
+class SearchDeadline:
+    """A point in time that can be pushed back by the time a search spent paused."""
+
+    def __init__(self, timeout: Optional[float]):
+        self.end = None if timeout is None else time.monotonic() + timeout
+
+    def expired(self) -> bool:
+        return self.end is not None and time.monotonic() >= self.end
+
+    def remaining(self) -> Optional[float]:
+        return None if self.end is None else max(self.end - time.monotonic(), 0.0)
+
+    def extend(self, seconds: float) -> None:
+        if self.end is not None:
+            self.end += seconds
+
+
+class ContentSearchEngine:
+    """
+    Searches file bodies on a pool of worker processes.
+
+    With `processes` of 1 or less, partitions are scanned in the calling
+    thread instead, which avoids the pool overhead on small machines, and
+    classify files with `sniffer`.
+    """
+
+    def __init__(
+        self,
+        processes: int = DEFAULT_PROCESSES,
+        sniffer: Optional[ContentSniffer] = None,
+    ):
+        self.processes = processes
+        self.sniffer = sniffer or _sniffer
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._cancel_flags = None
+        self._generations = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        with self._lock:
+            if self._pool is None:
+                # multiprocessing is only loaded once a search needs the pool.
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Forking a process that runs other threads is unsafe, so use
+                # a fork server on Linux and the platform default elsewhere.
+                method = "forkserver" if sys.platform.startswith("linux") else None
+                context = multiprocessing.get_context(method)
+                self._cancel_flags = context.RawArray("b", _CANCEL_SLOTS)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._cancel_flags, tracing.trace_file()),
+                )
+            return self._pool
+
+    def _partitions(self, search_path: Path, generation: int) -> List[_Partition]:
+        """
+        Split the tree below `search_path` into independent partitions.
+
+        Directories are expanded breadth-first until there are a few partitions
+        per worker; the files found along the way form their own partitions.
+        """
+        if search_path.is_file():
+            return [(generation, [], [str(search_path)])]
+
+        target = max(self.processes, 1) * 4
+        pending = [(str(search_path), scope_for(str(search_path)))]
+        partitions: List[_Partition] = []
+
+        while pending and len(pending) + len(partitions) < target:
+            dir_path, scope = pending.pop(0)
+            files = []
+            for _, dirs, others in walk(dir_path, scope):
+                for entry in dirs:
+                    if not entry.is_symlink():
+                        pending.append((entry.path, scope.enter(entry.path)))
+                for entry in others:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+                # Only expand one level; subdirectories become partitions.
+                dirs.clear()
+            if files:
+                partitions.append((generation, [], files))
+        partitions.extend((generation, [item], []) for item in pending)
+        return partitions
+
+    def _stream(
+        self,
+        search_path: Path,
+        task: Callable[..., Tuple[List[Any], int]],
+        limit: Optional[int],
+        timeout: Optional[float] = None,
+        inline: Optional[bool] = None,
+    ) -> Iterator[Any]:
+        """
+        Run `task` on every partition and yield its results until `limit` is reached.
+
+        `task` returns the results of one partition and the number of files
+        it looked at, which is recorded in the metrics of the current call.
+
+        Raises SearchTimeoutError once the search has run for `timeout`
+        seconds; time the consumer spends between results does not count.
+        Partitions are scanned in the calling thread if `inline` is set, and
+        on the pool otherwise; by default the pool is used with more than one
+        process.
+        """
+        generation = next(self._generations)
+        deadline = SearchDeadline(timeout)
+        with tracing.span("walk", path=str(search_path)) as span_args:
+            partitions = self._partitions(search_path, generation)
+            span_args["partitions"] = len(partitions)
+        if inline is None:
+            inline = self.processes <= 1
+
+        found = 0
+        if inline:
+            for partition in partitions:
+                results, scanned = task(
+                    partition, stop=deadline.expired, sniffer=self.sniffer
+                )
+                metrics.record(metrics.FILES_SCANNED, scanned)
+                if deadline.expired():
+                    raise SearchTimeoutError(
+                        f"Search of {search_path} timed out after {timeout}s."
+                    )
+                for result in results:
+                    paused_at = time.monotonic()
+                    yield result
+                    deadline.extend(time.monotonic() - paused_at)
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+            return
+
+        pool = self._get_pool()
+        self._cancel_flags[generation % _CANCEL_SLOTS] = 0
+        futures = {pool.submit(task, partition) for partition in partitions}
+        timed_out = False
+        try:
+            while futures:
+                done, futures = wait(
+                    futures, timeout=deadline.remaining(), return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    timed_out = True
+                    raise SearchTimeoutError(
+                        f"Search of {search_path} timed out after {timeout}s."
+                    )
+                for future in done:
+                    results, scanned = future.result()
+                    metrics.record(metrics.FILES_SCANNED, scanned)
+                    for result in results:
+                        paused_at = time.monotonic()
+                        yield result
+                        deadline.extend(time.monotonic() - paused_at)
+                        found += 1
+                        if limit is not None and found >= limit:
+                            return
+        finally:
+            if futures:
+                self._cancel_flags[generation % _CANCEL_SLOTS] = 1
+                for future in futures:
+                    future.cancel()
+                if timed_out:
+                    reaper = threading.Timer(
+                        _STUCK_WORKER_GRACE,
+                        self._terminate_if_stuck,
+                        args=(pool, futures),
+                    )
+                    reaper.daemon = True
+                    reaper.start()
+
+    def _terminate_if_stuck(self, pool: "ProcessPoolExecutor", futures) -> None:
+        """Tear down `pool` if a timed-out task is still running, e.g. in a runaway regex."""
+        if not any(future.running() for future in futures):
+            return
+        logger.warning("Terminating search workers still running past their timeout.")
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # ProcessPoolExecutor has no public way to stop a busy worker.
+        processes = getattr(pool, "_processes", None) or {}
+        for process in list(processes.values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_matches(
+        self,
+        search_path: Path,
+        pattern: str,
+        max_results: Optional[int] = None,
+        mode: str = "grep",
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Yield files below `search_path` whose body matches `pattern`.
+
+        `pattern` is interpreted according to `mode` (see `compile_pattern`)
+        and matching is case-insensitive, like `grep -irl`. Results arrive
+        partition by partition, in no particular order.
+        """
+        # Compile in the caller so an invalid pattern fails fast.
+        regex, _ = compile_pattern(pattern, mode)
+        task = functools.partial(
+            search_partition, pattern=pattern, max_results=max_results, mode=mode
+        )
+        return self._stream(
+            search_path,
+            task,
+            max_results,
+            timeout,
+            inline=self._scans_inline(regex is not None, timeout),
+        )
+
+    def iter_hits(
+        self,
+        search_path: Path,
+        pattern: str,
+        context_lines: int = 0,
+        max_hits_per_file: int = DEFAULT_MAX_HITS_PER_FILE,
+        max_hits: Optional[int] = DEFAULT_MAX_HITS,
+        mode: str = "grep",
+        timeout: Optional[float] = None,
+    ) -> Iterator[Hit]:
+        """
+        Yield the matching lines below `search_path`, like `grep -irn -C`.
+
+        Each hit carries the file path, the 1-based line number, the line and
+        up to `context_lines` lines before and after it. Files are scanned
+        once; hits of one file arrive in line order.
+        """
+        regex, _ = compile_pattern(pattern, mode)
+        task = functools.partial(
+            search_partition_hits,
+            pattern=pattern,
+            context_lines=context_lines,
+            max_hits_per_file=max_hits_per_file,
+            max_hits=max_hits,
+            mode=mode,
+        )
+        return self._stream(
+            search_path,
+            task,
+            max_hits,
+            timeout,
+            inline=self._scans_inline(regex is not None, timeout),
+        )
+
+    def _scans_inline(self, is_regex: bool, timeout: Optional[float]) -> bool:
+        # A regex can run away inside a single file; only a pool worker can be stopped then.
+        return self.processes <= 1 and not (is_regex and timeout is not None)
+
+    def search(
+        self, search_path: Path, pattern: str, max_results: Optional[int] = None
+    ) -> List[str]:
+        return list(self.iter_matches(search_path, pattern, max_results))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
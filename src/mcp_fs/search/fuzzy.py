@@ -0,0 +1,98 @@
+"""
+fzf-style fuzzy matching of file paths.
+
+A query matches a path if its characters appear in the path in order,
+case-insensitively. Matches are scored like fzf's v1 algorithm: the
+shortest window containing the query is found by a forward and a backward
+pass, then every matched character earns a base score plus a bonus when it
+starts a word (after `/`, `_`, `-`, `.` or a space) or continues a run of
+matched characters, and gaps between matched characters cost a penalty.
+"""
+
+import re
+from typing import Optional
+
+
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_PATH_SEPARATOR = BONUS_BOUNDARY + 1
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+# Extra credit when the whole match falls inside the file name.
+BONUS_FILE_NAME = BONUS_BOUNDARY
+
+_WORD_SEPARATORS = frozenset("_-. ")
+
+
+def _bonus(text: str, position: int) -> int:
+    if position == 0:
+        return BONUS_BOUNDARY
+    previous = text[position - 1]
+    if previous == "/":
+        return BONUS_PATH_SEPARATOR
+    if previous in _WORD_SEPARATORS:
+        return BONUS_BOUNDARY
+    return 0
+
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """
+    Score how well `query` matches `text`, or return None if it does not.
+
+    Both are expected lowercased; `text` uses `/` as the path separator.
+    """
+    if not query:
+        return 0
+    position = -1
+    for char in query:
+        position = text.find(char, position + 1)
+        if position == -1:
+            return None
+    position += 1
+    for char in reversed(query):
+        position = text.rfind(char, 0, position)
+    start = position
+
+    score = 0
+    previous = start - 1
+    run_bonus = 0
+    for index, char in enumerate(query):
+        position = text.find(char, previous + 1)
+        bonus = _bonus(text, position)
+        if position == previous + 1 and index > 0:
+            run_bonus = max(run_bonus, bonus, BONUS_CONSECUTIVE)
+            bonus = run_bonus
+        else:
+            if index > 0:
+                gap = position - previous - 1
+                score += SCORE_GAP_START + SCORE_GAP_EXTENSION * (gap - 1)
+            run_bonus = bonus
+        if index == 0:
+            bonus *= BONUS_FIRST_CHAR_MULTIPLIER
+        score += SCORE_MATCH + bonus
+        previous = position
+
+    if start > text.rfind("/"):
+        score += BONUS_FILE_NAME
+    return score
+
+
+def subsequence_pattern(query: str) -> "re.Pattern[str]":
+    """
+    Compile a regex finding the lines of a newline-separated blob that contain `query` in order.
+
+    A match starts at the first occurrence of the query's first character in
+    a line and runs to the end of the line. Each step skips only characters
+    that cannot be the next query character, so a line is matched or
+    rejected in a single left-to-right pass, and the literal first character
+    lets the regex engine skip ahead between candidate lines. `query` must
+    not be empty or contain a newline.
+    """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        escaped = re.escape(char)
+        parts.append(f"[^\\n{escaped}]*{escaped}")
+    parts.append("[^\\n]*")
+    return re.compile("".join(parts))
@@ -0,0 +1,352 @@
+"""
+Compilation of search patterns for the search tools.
+
+`search_file_bodies_for_substring` historically passed its text straight to
+`grep`, so by default the text is interpreted as a POSIX basic regular
+expression (BRE) with GNU extensions, and these helpers keep that behaviour
+for the in-process search engine. The search tools can also be asked
+explicitly for a literal, a Python regular expression or a glob.
+
+Compiled patterns are cached, and every pattern carries the longest literal
+text that any match must contain, so files and lines without it can be
+skipped with a plain `bytes.find` before the regex runs.
+
+Patterns run on the raw bytes of files, where `re.IGNORECASE` folds ASCII
+letters only. Non-ASCII characters are therefore rewritten into a group of
+their case variants, each matched as a whole UTF-8 sequence. Bracket
+expressions match single bytes, so non-ASCII characters are rejected in them.
+Negated bracket expressions never match a newline, so a match stays within
+a line, as with grep.
+"""
+
+import fnmatch
+import functools
+import re
+from typing import Callable, NamedTuple, Optional
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+# Characters with a special meaning in a grep basic regular expression.
+BRE_METACHARACTERS = frozenset(".[]*^$\\")
+
+_POSIX_CLASSES = {
+    "alnum": "a-zA-Z0-9",
+    "alpha": "a-zA-Z",
+    "blank": " \\t",
+    "cntrl": "\\x00-\\x1f\\x7f",
+    "digit": "0-9",
+    "graph": "\\x21-\\x7e",
+    "lower": "a-z",
+    "print": "\\x20-\\x7e",
+    "punct": "!-/:-@\\[-`{-~",
+    "space": " \\t\\n\\r\\f\\v",
+    "upper": "A-Z",
+    "xdigit": "0-9A-Fa-f",
+}
+
+
+def is_literal(pattern: str) -> bool:
+    """Check whether a grep BRE matches exactly its own text."""
+    return not BRE_METACHARACTERS & set(pattern)
+
+
+def _translate_bracket(body: str) -> str:
+    """Translate the inside of a POSIX bracket expression."""
+    out = []
+    i = 0
+    if body.startswith("^"):
+        out.append("^")
+        i = 1
+    while i < len(body):
+        if body.startswith("[:", i):
+            end = body.find(":]", i + 2)
+            if end != -1 and body[i + 2 : end] in _POSIX_CLASSES:
+                out.append(_POSIX_CLASSES[body[i + 2 : end]])
+                i = end + 2
+                continue
+        char = body[i]
+        # Backslashes and brackets are literal inside a POSIX bracket expression.
+        out.append("\\" + char if char in "\\[]" else char)
+        i += 1
+    return "".join(out)
+
+
+def translate_bre(pattern: str) -> str:
+    """Translate a GNU grep basic regular expression into Python `re` syntax."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        at_start = not out or out[-1] in ("(", "|")
+        if char == "\\" and i + 1 < n:
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in "(){}|+?":
+                out.append(escaped)
+            elif escaped in "<>":
+                out.append("\\b")
+            elif escaped in "wWsSbB" or escaped.isdigit():
+                out.append("\\" + escaped)
+            else:
+                out.append(re.escape(escaped))
+        elif char == "[":
+            j = i + 1
+            if j < n and pattern[j] == "^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                if pattern.startswith("[:", j) and pattern.find(":]", j + 2) != -1:
+                    j = pattern.find(":]", j + 2) + 2
+                else:
+                    j += 1
+            if j >= n:
+                raise re.error("unterminated bracket expression", pattern, i)
+            out.append("[" + _translate_bracket(pattern[i + 1 : j]) + "]")
+            i = j + 1
+        elif char == "^":
+            out.append("^" if at_start else "\\^")
+            i += 1
+        elif char == "$":
+            at_end = i == n - 1 or pattern[i + 1 : i + 3] in ("\\)", "\\|")
+            out.append("$" if at_end else "\\$")
+            i += 1
+        elif char == "*":
+            out.append("\\*" if at_start or out[-1] == "^" else "*")
+            i += 1
+        elif char == ".":
+            out.append(".")
+            i += 1
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
+
+
+def compile_bre(pattern: str) -> "re.Pattern[bytes]":
+    """Compile a grep BRE into a case-insensitive, line-anchored bytes regex."""
+    return re.compile(
+        translate_bre(pattern).encode("utf-8"), re.IGNORECASE | re.MULTILINE
+    )
+
+
+SEARCH_MODES = ("grep", "literal", "regex", "glob")
+NAME_SEARCH_MODES = ("literal", "regex", "glob")
+COMPILED_PATTERN_CACHE_SIZE = 256
+
+_GLOB_SPECIALS = frozenset("*?[")
+
+
+class CompiledPattern(NamedTuple):
+    """A body search pattern; `regex` is None when the pattern is a plain literal."""
+
+    regex: Optional["re.Pattern[bytes]"]
+    # Lowercased text every match contains; the whole pattern for literals.
+    literal: bytes
+
+
+class NamePattern(NamedTuple):
+    """A file name pattern with the lowercased text every matching name contains."""
+
+    matches: Callable[[str], bool]
+    literal: str
+
+
+def check_mode(mode: str, modes=SEARCH_MODES) -> str:
+    if mode not in modes:
+        raise ValueError(f"mode must be one of {', '.join(modes)}, not {mode!r}.")
+    return mode
+
+
+def required_literal(regex: str, flags: int = 0) -> str:
+    """
+    Return the longest run of literal characters that every match of `regex` contains.
+
+    Only the top level of the pattern and the groups in it are considered;
+    anything optional, repeated or alternative ends a run. Returns "" when
+    no such text can be found.
+    """
+    best, current = [], []
+
+    def visit(items) -> None:
+        nonlocal best, current
+        for op, value in items:
+            if op is sre_parse.LITERAL:
+                current.append(chr(value))
+                continue
+            if op is sre_parse.SUBPATTERN:
+                visit(value[-1])
+                continue
+            if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+                # The first repetition is required, but only as a run of its own.
+                flush()
+                visit(value[2])
+            if op is not sre_parse.AT:
+                flush()
+
+    def flush() -> None:
+        nonlocal best, current
+        if len(current) > len(best):
+            best = current
+        current = []
+
+    try:
+        visit(sre_parse.parse(regex, flags))
+    except (re.error, RecursionError):
+        return ""
+    flush()
+    return "".join(best)
+
+
+def _case_variants(char: str) -> str:
+    """Return a regex for `char` in any case, as one group so a quantifier applies to all of it."""
+    variants = [char]
+    for variant in (char.lower(), char.upper()):
+        if len(variant) == 1 and variant not in variants:
+            variants.append(variant)
+    return "(?:" + "|".join(variants) + ")"
+
+
+def _encodable_source(source: str, pattern: str) -> str:
+    """
+    Prepare a Python regex for compiling as bytes and matching UTF-8 text.
+
+    Non-ASCII characters become groups of their case variants, negated
+    bracket expressions are kept from matching newlines, and non-ASCII
+    characters in bracket expressions raise `re.error`.
+    """
+    out = []
+    i = 0
+    n = len(source)
+    while i < n:
+        char = source[i]
+        if char == "\\" and i + 1 < n:
+            escaped = source[i + 1]
+            out.append(
+                _case_variants(escaped) if ord(escaped) > 127 else char + escaped
+            )
+            i += 2
+        elif char == "[":
+            j = i + 1
+            negated = j < n and source[j] == "^"
+            if negated:
+                j += 1
+            if j < n and source[j] == "]":
+                j += 1
+            while j < n and source[j] != "]":
+                j += 2 if source[j] == "\\" else 1
+            if j >= n:
+                # Unterminated; let `re` report it.
+                out.append(source[i:])
+                break
+            body = source[i + 1 : j]
+            if not body.isascii():
+                raise re.error(
+                    "non-ASCII characters in bracket expressions are not supported",
+                    pattern,
+                )
+            if negated:
+                body += "\\n"
+            out.append("[" + body + "]")
+            i = j + 1
+        else:
+            out.append(_case_variants(char) if ord(char) > 127 else char)
+            i += 1
+    return "".join(out)
+
+
+def _longest_glob_literal(pattern: str) -> str:
+    return max(re.split(r"\*|\?|\[[^\]]*\]?", pattern), key=len, default="")
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a glob into a regex matching within a single line: `*`, `?` and `[...]`."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            out.append(".*")
+        elif char == "?":
+            out.append(".")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append("\\[")
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body + "]")
+                i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return "".join(out)
+
+
+@functools.lru_cache(maxsize=COMPILED_PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str, mode: str = "grep") -> CompiledPattern:
+    """
+    Compile a body search pattern, case-insensitively.
+
+    `mode` is "grep" (a grep basic regular expression), "literal", "regex"
+    (Python `re` syntax, with `^` and `$` matching at line boundaries) or
+    "glob" (`*`, `?` and `[...]`, matching within a line). Raises `re.error`
+    for non-ASCII characters in a bracket expression.
+    """
+    check_mode(mode)
+    literal = mode == "literal" or (mode == "grep" and is_literal(pattern))
+    # Lowercasing bytes folds only ASCII, so text with other cased letters
+    # goes through a regex.
+    if literal and all(
+        char.lower() == char.upper() for char in pattern if ord(char) > 127
+    ):
+        return CompiledPattern(None, pattern.encode("utf-8").lower())
+
+    if literal:
+        source = re.escape(pattern)
+    elif mode == "grep":
+        source = translate_bre(pattern)
+    elif mode == "regex":
+        source = pattern
+    else:
+        source = translate_glob(pattern)
+    source = _encodable_source(source, pattern)
+    flags = re.IGNORECASE | re.MULTILINE
+    regex = re.compile(source.encode("utf-8"), flags)
+    literal = required_literal(source, flags)
+    return CompiledPattern(regex, literal.encode("utf-8").lower())
+
+
+@functools.lru_cache(maxsize=COMPILED_PATTERN_CACHE_SIZE)
+def compile_name_pattern(pattern: str, mode: str = "literal") -> NamePattern:
+    """
+    Compile a file name pattern, case-insensitively.
+
+    "literal" matches names containing the text, "regex" names with a match
+    anywhere in them and "glob" whole names, like the shell.
+    """
+    check_mode(mode, NAME_SEARCH_MODES)
+    if mode == "literal":
+        needle = pattern.lower()
+        return NamePattern(lambda name: needle in name.lower(), needle)
+
+    if mode == "regex":
+        regex = re.compile(pattern, re.IGNORECASE)
+        return NamePattern(
+            lambda name: regex.search(name) is not None,
+            required_literal(pattern, re.IGNORECASE).lower(),
+        )
+
+    regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+    return NamePattern(
+        lambda name: regex.match(name) is not None,
+        _longest_glob_literal(pattern).lower(),
+    )
@@ -3,17 +3,31 @@ Server module.
 """
 
 import logging
-from typing import List, Optional
+import socket
+import types
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from pathlib import Path
-from venv import logger
 
 from easy_mcp.server import BaseMCPServer
 from easy_mcp.model import TransportType
 
+from mcp_fs.index.content_sniffer import ContentSniffer
+from mcp_fs.index.search_cache import SearchResultCache
+from mcp_fs.index.tree_summary import TreeSummaryCache
 from mcp_fs.tools.directory_tools import DirectoryService
 from mcp_fs.tools.file_tools import FileService
 from mcp_fs.tools.search_tools import SearchService
-from mcp_fs.resources import sample_resource
+from mcp_fs.resources import sample_resource, server_stats, tool_metrics
+from mcp_fs.utils import tool_manifest, tracing
+from mcp_fs.utils.async_utils import DEFAULT_TOOL_WORKERS, ToolRunner
+from mcp_fs.utils.atomic_write import Durability
+from mcp_fs.utils.metrics import ToolMetrics
+from mcp_fs.utils.pagination import CursorStore
+from mcp_fs.utils.profiling import default_profile_specs, parse_profile_specs
+from mcp_fs.utils.path_utils import AllowedRoots
+
+if TYPE_CHECKING:
+    from mcp_fs.index.path_index import PathIndexClient
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +50,16 @@ class FileSystemMCP(BaseMCPServer):
         port: Optional[int] = None,
         allowed_tools: Optional[List[str]] = None,
         allowed_resources: Optional[List[str]] = None,
+        use_content_index: bool = True,
+        watch_dirs: bool = False,
+        tool_workers: int = DEFAULT_TOOL_WORKERS,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        write_durability: Durability = Durability.NONE,
+        metrics_port: Optional[int] = None,
+        trace_file: Optional[Path] = None,
+        profile_tools: Optional[Dict[str, int]] = None,
+        profile_dir: Optional[Path] = None,
+        path_index_client: Optional["PathIndexClient"] = None,
     ):
         super().__init__(
             name=name,
@@ -46,6 +70,7 @@ class FileSystemMCP(BaseMCPServer):
             allowed_resources=allowed_resources,
         )
 
+        self.allowed_tool_names = allowed_tools
         self.allowed_dirs = [
             Path(dir_path) if isinstance(dir_path, str) else dir_path
             for dir_path in allowed_dirs
@@ -55,11 +80,121 @@ class FileSystemMCP(BaseMCPServer):
             f"FileSystemMCP initialized with allowed directories: {self.allowed_dirs}"
         )
 
-        directory_service = DirectoryService(self.allowed_dirs)
-        file_service = FileService(self.allowed_dirs)
-        search_service = SearchService(self.allowed_dirs)
+        # Started before the services, so search workers inherit the trace file.
+        trace_file = trace_file or tracing.default_trace_file()
+        if trace_file is not None:
+            tracing.start(trace_file)
+        if profile_tools is None:
+            profile_tools = parse_profile_specs(default_profile_specs())
+        self.profiler = None
+        if profile_tools:
+            from mcp_fs.utils.profiling import ToolProfiler
+
+            self.profiler = ToolProfiler(profile_tools, profile_dir)
+
+        self.allowed_roots = AllowedRoots(self.allowed_dirs)
+        self.tool_runner = ToolRunner(
+            max_workers=tool_workers,
+            concurrency_limits=tool_concurrency,
+            profiler=self.profiler,
+        )
+        self.cursor_store = CursorStore()
+        self.tree_summary = TreeSummaryCache()
+        self.search_cache = SearchResultCache()
+        self.content_sniffer = ContentSniffer()
+        self.tool_metrics = ToolMetrics()
+        self.metrics_host = host or "127.0.0.1"
+        self.metrics_port = metrics_port
+
+        self.tree_watcher = None
+        if watch_dirs:
+            from mcp_fs.index.tree_watcher import TreeWatcher
+
+            self.tree_watcher = TreeWatcher(list(self.allowed_roots.roots))
+            self.tree_watcher.start()
+
+        directory_service = DirectoryService(
+            self.allowed_dirs,
+            allowed_roots=self.allowed_roots,
+            tree_watcher=self.tree_watcher,
+            tool_runner=self.tool_runner,
+            cursor_store=self.cursor_store,
+            tree_summary=self.tree_summary,
+        )
+        search_service = SearchService(
+            self.allowed_dirs,
+            allowed_roots=self.allowed_roots,
+            use_content_index=use_content_index,
+            tree_watcher=self.tree_watcher,
+            tool_runner=self.tool_runner,
+            cursor_store=self.cursor_store,
+            search_cache=self.search_cache,
+            sniffer=self.content_sniffer,
+            path_index_client=path_index_client,
+        )
+        file_service = FileService(
+            self.allowed_dirs,
+            allowed_roots=self.allowed_roots,
+            tool_runner=self.tool_runner,
+            durability=write_durability,
+            search_cache=self.search_cache,
+            sniffer=self.content_sniffer,
+            on_file_changed=search_service.file_changed,
+        )
+
+        server_stats.register_stats("read_cache", file_service.read_cache.stats)
+        server_stats.register_stats("tree_summary", self.tree_summary.stats)
+        server_stats.register_stats("search_cache", self.search_cache.stats)
+        server_stats.register_stats("content_sniffer", self.content_sniffer.stats)
 
         self._register_tools(
             class_instances=[directory_service, file_service, search_service]
         )
-        self._register_resources(modules=[sample_resource])
+        tool_metrics.set_metrics(self.tool_metrics)
+        self._register_resources(modules=[sample_resource, server_stats, tool_metrics])
+
+    def _register_tools(self, class_instances: List[Any]) -> None:
+        """
+        Register the tools of `class_instances`, each wrapped to record its metrics and trace its calls.
+
+        On FastMCP, their names, descriptions and argument schemas come from
+        the tool manifest rather than from parsing their docstrings and
+        signatures.
+        """
+        for instance in class_instances:
+            for tool_name in tool_manifest.tool_methods(type(instance)):
+                instrumented = self.tool_metrics.instrument(
+                    tool_name,
+                    tracing.instrument(tool_name, getattr(type(instance), tool_name)),
+                )
+                setattr(instance, tool_name, types.MethodType(instrumented, instance))
+        if not tool_manifest.register(
+            self, class_instances, allowed_tools=self.allowed_tool_names
+        ):
+            super()._register_tools(class_instances=class_instances)
+
+    def start(self, sock: Optional[socket.socket] = None) -> None:
+        """
+        Start serving.
+
+        With `sock`, a listening socket, the SSE transport accepts its
+        connections on it instead of binding a port itself. That needs the
+        server to run on FastMCP.
+        """
+        if self.metrics_port is not None:
+            from mcp_fs.utils.metrics import serve_prometheus
+
+            serve_prometheus(self.tool_metrics, self.metrics_host, self.metrics_port)
+        if sock is None:
+            super().start()
+            return
+
+        app = tool_manifest.fastmcp_app(self)
+        if app is None:
+            raise RuntimeError(
+                "Serving on a given socket needs a server running on FastMCP."
+            )
+        import uvicorn
+
+        config = uvicorn.Config(app.sse_app(), log_level=app.settings.log_level.lower())
+        uvicorn.Server(config).run(sockets=[sock])
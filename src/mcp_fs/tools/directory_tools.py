@@ -1,47 +1,396 @@
+import fnmatch
 import logging
+import os
+import stat
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Union
 
 from easy_mcp.registration.tools import mcp_tool
 
-from mcp_fs.utils.path_utils import validate_path
+from mcp_fs.index.tree_summary import TreeSummaryCache
+from mcp_fs.utils.async_utils import ToolRunner, offload
+from mcp_fs.utils.ignore import scope_for
+from mcp_fs.utils.pagination import CursorStore
+from mcp_fs.utils.path_utils import AllowedRoots
+
+if TYPE_CHECKING:
+    from mcp_fs.index.tree_watcher import TreeWatcher
 
 
 logger = logging.getLogger(__name__)
 
 
+ENTRY_TYPES = ("file", "directory", "symlink", "other")
+
+DEFAULT_TREE_DEPTH = 3
+DEFAULT_TREE_FANOUT = 20
+MAX_TREE_DEPTH = 64
+
+# Directories and symlinks sort before files of the same key; size is None for them.
+_SORT_KEYS = {
+    "name": lambda entry: entry["path"],
+    "size": lambda entry: (entry["size"] is not None, entry["size"] or 0),
+    "mtime": lambda entry: entry["mtime"],
+    "type": lambda entry: (entry["type"], entry["path"]),
+}
+
+
+def _entry_details(entry: os.DirEntry, rel_path: str) -> Optional[dict]:
+    """Describe a directory entry from its lstat data, or None if it vanished."""
+    try:
+        entry_stat = entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
+    mode = entry_stat.st_mode
+    if stat.S_ISLNK(mode):
+        entry_type = "symlink"
+    elif stat.S_ISDIR(mode):
+        entry_type = "directory"
+    elif stat.S_ISREG(mode):
+        entry_type = "file"
+    else:
+        entry_type = "other"
+
+    details = {
+        "name": entry.name,
+        "path": rel_path,
+        "type": entry_type,
+        "size": entry_stat.st_size if entry_type == "file" else None,
+        "mtime": entry_stat.st_mtime,
+    }
+    if entry_type == "symlink":
+        try:
+            details["target"] = os.readlink(entry.path)
+        except OSError:
+            details["target"] = None
+    return details
+
+
 class DirectoryService:
-    def __init__(self, allowed_dirs: List[Path]):
+    def __init__(
+        self,
+        allowed_dirs: List[Path],
+        allowed_roots: Optional[AllowedRoots] = None,
+        tree_watcher: Optional["TreeWatcher"] = None,
+        tool_runner: Optional[ToolRunner] = None,
+        cursor_store: Optional[CursorStore] = None,
+        tree_summary: Optional[TreeSummaryCache] = None,
+    ):
         self.allowed_dirs = allowed_dirs
+        self.allowed_roots = allowed_roots or AllowedRoots(allowed_dirs)
+        self.tree_watcher = tree_watcher
+        self.tool_runner = tool_runner or ToolRunner()
+        self.cursor_store = cursor_store or CursorStore()
+        self.tree_summary = tree_summary or TreeSummaryCache()
+
+    def _iter_directory(self, validated_path: Path) -> Iterator[str]:
+        """Yield the entry names of a directory, preferring the watched tree."""
+        if self.tree_watcher is not None:
+            names = self.tree_watcher.list_directory(validated_path)
+            if names is not None:
+                yield from names
+                return
+
+        if not validated_path.exists() or not validated_path.is_dir():
+            raise ValueError(f"Path {validated_path} is not a valid directory.")
+
+        with os.scandir(validated_path) as entries:
+            for entry in entries:
+                yield entry.name
 
     @mcp_tool
-    def list_directory(self, dir_path: Path) -> List[str]:
+    @offload
+    def list_directory(
+        self,
+        dir_path: Path,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[str], dict]:
         """
         name: list_directory
         description: >
             List the contents of a directory.
+            Pass `limit` to get the listing one page at a time, and the returned `next_cursor`
+            to get the next page.
 
         Arguments:
             dir_path (Path): The path to the directory to list.
+            limit (int): Maximum number of names per page. Enables pagination.
+            cursor (str): The `next_cursor` of the previous page. Enables pagination.
 
         Returns:
             List[str]: A list of file and directory names in the specified directory.
+            dict: With pagination, a page with `results`, `next_cursor` and `truncated`.
 
         Example:
             >>> list_directory("/path/to/directory")
             ['file1.txt', 'file2.txt', 'subdir']
+            >>> list_directory("/path/to/directory", limit=2)
+            {'results': ['file1.txt', 'file2.txt'], 'next_cursor': 'Qm9...', 'truncated': True}
         """
         if isinstance(dir_path, str):
             dir_path = Path(dir_path)
 
-        validated_path = validate_path(dir_path, self.allowed_dirs)
+        validated_path = self.allowed_roots.validate(dir_path)
 
-        if not validated_path.exists() or not validated_path.is_dir():
+        if limit is None and cursor is None:
+            return list(self._iter_directory(validated_path))
+
+        return self.cursor_store.page(
+            ("list_directory", validated_path),
+            lambda: self._iter_directory(validated_path),
+            limit=limit,
+            cursor=cursor,
+        )
+
+    def _iter_detailed(
+        self,
+        validated_path: Path,
+        depth: int,
+        entry_type: Optional[str],
+        pattern: Optional[str],
+    ) -> Iterator[dict]:
+        """
+        Yield the details of every entry down to `depth` levels below the directory.
+
+        Symlinked and ignored directories, by name or by `.gitignore`, are listed
+        but not descended into.
+        """
+        if not validated_path.is_dir():
+            raise ValueError(f"Path {validated_path} is not a valid directory.")
+
+        top = str(validated_path)
+        stack = [(top, "", 0, scope_for(top) if depth > 0 else None)]
+        while stack:
+            dir_path, rel_dir, level, scope = stack.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError as e:
+                if level == 0:
+                    raise
+                logger.debug(f"Skipping unreadable directory {dir_path}: {e}")
+                continue
+            subdirs = []
+            with entries:
+                for entry in entries:
+                    rel_path = os.path.join(rel_dir, entry.name)
+                    details = _entry_details(entry, rel_path)
+                    if details is None:
+                        continue
+                    if (
+                        level < depth
+                        and details["type"] == "directory"
+                        and not scope.ignores(entry.path, entry.name, True)
+                    ):
+                        subdirs.append(
+                            (entry.path, rel_path, level + 1, scope.enter(entry.path))
+                        )
+                    if entry_type is not None and details["type"] != entry_type:
+                        continue
+                    if pattern is not None and not fnmatch.fnmatch(entry.name, pattern):
+                        continue
+                    yield details
+            stack.extend(reversed(subdirs))
+
+    @mcp_tool
+    @offload
+    def list_directory_detailed(
+        self,
+        dir_path: Path,
+        depth: int = 0,
+        sort_by: Optional[str] = "name",
+        reverse: bool = False,
+        entry_type: Optional[str] = None,
+        pattern: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Union[List[dict], dict]:
+        """
+        name: list_directory_detailed
+        description: >
+            List the contents of a directory with the type, size, modification time and
+            symlink target of every entry, optionally recursing into subdirectories.
+            Filtering and sorting happen on the server, so there is no need to call
+            file_exists for each entry. Ignored directories (e.g. node_modules, or those
+            matched by a .gitignore) and symlinked directories are listed but not
+            descended into.
+            Pass `limit` to get the listing one page at a time, and the returned `next_cursor`
+            to get the next page.
+
+        Arguments:
+            dir_path (Path): The path to the directory to list.
+            depth (int): How many levels of subdirectories to descend into (default 0, the directory only).
+            sort_by (str): One of "name" (by relative path), "size", "mtime" or "type", or null to keep
+                the order of the directory walk.
+            reverse (bool): Sort in descending order.
+            entry_type (str): Only list entries of this type: "file", "directory", "symlink" or "other".
+            pattern (str): Only list entries whose name matches this glob, e.g. "*.py".
+            limit (int): Maximum number of entries per page. Enables pagination.
+            cursor (str): The `next_cursor` of the previous page. Enables pagination.
+
+        Returns:
+            List[dict]: One dictionary per entry with
+            - name (str): The entry name.
+            - path (str): The path relative to dir_path.
+            - type (str): "file", "directory", "symlink" or "other". Symlinks are not followed.
+            - size (int): Size in bytes, for files only; null otherwise.
+            - mtime (float): Modification time in seconds since the epoch.
+            - target (str): Where a symlink points (symlinks only).
+            dict: With pagination, a page with `results`, `next_cursor` and `truncated`.
+
+        Raises:
+            ValueError: If the path is not allowed, not a directory, or an argument is invalid.
+
+        Example:
+            >>> list_directory_detailed("/path/to/project", depth=1, entry_type="file", sort_by="size", reverse=True)
+            [
+                {"name": "data.csv", "path": "data/data.csv", "type": "file", "size": 48213, "mtime": 1718200000.5},
+                {"name": "main.py", "path": "main.py", "type": "file", "size": 2112, "mtime": 1718100000.0}
+            ]
+        """
+        if isinstance(dir_path, str):
+            dir_path = Path(dir_path)
+        if depth < 0:
+            raise ValueError("depth must not be negative.")
+        if sort_by is not None and sort_by not in _SORT_KEYS:
+            raise ValueError(
+                f"sort_by must be one of {', '.join(_SORT_KEYS)}, not {sort_by!r}."
+            )
+        if entry_type is not None and entry_type not in ENTRY_TYPES:
+            raise ValueError(
+                f"entry_type must be one of {', '.join(ENTRY_TYPES)}, not {entry_type!r}."
+            )
+
+        validated_path = self.allowed_roots.validate(dir_path)
+
+        def listing() -> Iterable[dict]:
+            entries = self._iter_detailed(validated_path, depth, entry_type, pattern)
+            if sort_by is None:
+                return entries
+            return sorted(entries, key=_SORT_KEYS[sort_by], reverse=reverse)
+
+        if limit is None and cursor is None:
+            return list(listing())
+
+        return self.cursor_store.page(
+            (
+                "list_directory_detailed",
+                validated_path,
+                depth,
+                sort_by,
+                reverse,
+                entry_type,
+                pattern,
+            ),
+            listing,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    @mcp_tool
+    @offload
+    def directory_tree(
+        self,
+        dir_path: Path,
+        depth: int = DEFAULT_TREE_DEPTH,
+        max_children: int = DEFAULT_TREE_FANOUT,
+    ) -> dict:
+        """
+        name: directory_tree
+        description: >
+            Summarize a directory as a tree of subdirectories with the number of files, the number
+            of directories and the total bytes below each of them, in one call.
+            Ignored directories (e.g. node_modules, .git) are left out. Counts always cover the
+            whole subtree; `depth` only limits how many levels are shown. Directories with more
+            than `max_children` subdirectories show the largest ones and fold the rest into one
+            `collapsed` entry. Repeat calls on unchanged directories are served from memory.
+
+        Arguments:
+            dir_path (Path): The directory to summarize.
+            depth (int): How many levels of subdirectories to show (default 3, at most 64).
+            max_children (int): Most subdirectories to show per directory (default 20).
+
+        Returns:
+            A nested dictionary; every directory node has
+            - name (str): The directory name.
+            - path (str): The path relative to dir_path ("." for dir_path itself).
+            - files (int): Number of files in the subtree.
+            - dirs (int): Number of directories in the subtree.
+            - bytes (int): Total size of the files in the subtree.
+            - children (List[dict]): Subdirectory nodes, largest first; absent beyond `depth`.
+            - collapsed (dict): Combined files, dirs and bytes of the subdirectories that were
+              not shown, with their number under `count` (only when some were folded).
+
+        Raises:
+            ValueError: If the path is not allowed, not a directory, or an argument is invalid.
+
+        Example:
+            >>> directory_tree("/path/to/project", depth=1, max_children=1)
+            {
+                "name": "project", "path": ".", "files": 1250, "dirs": 96, "bytes": 8312044,
+                "children": [
+                    {"name": "src", "path": "src", "files": 1100, "dirs": 80, "bytes": 7000120}
+                ],
+                "collapsed": {"count": 3, "files": 149, "dirs": 12, "bytes": 1311800}
+            }
+        """
+        if isinstance(dir_path, str):
+            dir_path = Path(dir_path)
+        if depth < 0:
+            raise ValueError("depth must not be negative.")
+        if max_children < 0:
+            raise ValueError("max_children must not be negative.")
+
+        depth = min(depth, MAX_TREE_DEPTH)
+
+        validated_path = self.allowed_roots.validate(dir_path)
+        if not validated_path.is_dir():
             raise ValueError(f"Path {validated_path} is not a valid directory.")
 
-        return [str(item.name) for item in validated_path.iterdir()]
+        top = str(validated_path)
+        totals, summaries = self.tree_summary.subtree_totals(top)
+        if top not in totals:
+            raise ValueError(f"Directory {validated_path} cannot be read.")
+
+        def node(path: str, rel_path: str, level: int) -> dict:
+            files, dirs, total_bytes = totals[path]
+            result = {
+                "name": os.path.basename(path),
+                "path": rel_path,
+                "files": files,
+                "dirs": dirs,
+                "bytes": total_bytes,
+            }
+            if level >= depth:
+                return result
+            children = [
+                (name, os.path.join(path, name))
+                for name in summaries[path].subdirs
+                if os.path.join(path, name) in totals
+            ]
+            children.sort(key=lambda child: totals[child[1]].bytes, reverse=True)
+            shown, folded = children[:max_children], children[max_children:]
+            result["children"] = [
+                node(
+                    child,
+                    name if level == 0 else os.path.join(rel_path, name),
+                    level + 1,
+                )
+                for name, child in shown
+            ]
+            if folded:
+                result["collapsed"] = {
+                    "count": len(folded),
+                    "files": sum(totals[child].files for _, child in folded),
+                    "dirs": sum(totals[child].dirs + 1 for _, child in folded),
+                    "bytes": sum(totals[child].bytes for _, child in folded),
+                }
+            return result
+
+        return node(top, ".", 0)
 
     @mcp_tool
+    @offload
     def create_directory(self, dir_path: Path) -> str:
         """
         name: create_directory
@@ -62,7 +411,7 @@ class DirectoryService:
         if isinstance(dir_path, str):
             dir_path = Path(dir_path)
 
-        validated_path = validate_path(dir_path, self.allowed_dirs)
+        validated_path = self.allowed_roots.validate(dir_path)
 
         if validated_path.exists() and validated_path.is_dir():
             logger.info
@@ -1,19 +1,106 @@
+import base64
+import codecs
+import io
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
 
 from easy_mcp.registration.tools import mcp_tool
 
-from mcp_fs.utils.path_utils import validate_path
+from mcp_fs.index.content_sniffer import SNIFF_SIZE, ContentSniffer, FileKind
+from mcp_fs.index.line_index import LineIndexCache, file_signature
+from mcp_fs.index.read_cache import ReadCache
+from mcp_fs.index.search_cache import SearchResultCache
+from mcp_fs.utils import metrics
+from mcp_fs.utils.async_utils import ToolRunner, offload
+from mcp_fs.utils.atomic_write import (
+    Durability,
+    GroupCommitAppender,
+    atomic_rewrite,
+    atomic_write,
+)
+from mcp_fs.utils.edits import (
+    EditError,
+    locate,
+    map_file,
+    replacements_from_diff,
+    replacements_from_pairs,
+    write_edited,
+)
+from mcp_fs.utils.path_utils import AllowedRoots
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_RANGE_BYTES = 64 * 1024
+MAX_RANGE_BYTES = 1024 * 1024
+DEFAULT_LINE_COUNT = 200
+DEFAULT_BATCH_MAX_BYTES = 256 * 1024
+MAX_BATCH_FILES = 100
+DEFAULT_IO_WORKERS = 8
+RANGE_ENCODINGS = ("text", "base64")
+
+
+def _decode_window(
+    data: bytes, at_eof: bool, encoding: str = "utf-8"
+) -> Tuple[str, int]:
+    """
+    Decode a byte window without splitting a multi-byte character.
+
+    Returns the text and the number of bytes it covers; an incomplete
+    character at the end of the window is left for the next window.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    text = decoder.decode(data, final=at_eof)
+    pending, _ = decoder.getstate()
+    return text, len(data) - len(pending)
+
+
+def _not_text_error(file_path: str, kind: FileKind) -> ValueError:
+    return ValueError(
+        f"{file_path} is not a text file ({kind.describe()}); "
+        f"use read_file_range with encoding='base64' to read its bytes."
+    )
+
+
 class FileService:
-    def __init__(self, allowed_dirs: List[Path]):
+    def __init__(
+        self,
+        allowed_dirs: List[Path],
+        allowed_roots: Optional[AllowedRoots] = None,
+        tool_runner: Optional[ToolRunner] = None,
+        read_cache: Optional[ReadCache] = None,
+        durability: Durability = Durability.NONE,
+        search_cache: Optional[SearchResultCache] = None,
+        sniffer: Optional[ContentSniffer] = None,
+        on_file_changed: Optional[Callable[[str], None]] = None,
+    ):
         self.allowed_dirs = allowed_dirs
+        self.allowed_roots = allowed_roots or AllowedRoots(allowed_dirs)
+        self.tool_runner = tool_runner or ToolRunner()
+        self.line_indexes = LineIndexCache()
+        self.read_cache = read_cache or ReadCache()
+        self.durability = Durability(durability)
+        self.appender = GroupCommitAppender(self.durability)
+        self.search_cache = search_cache
+        self.sniffer = sniffer or ContentSniffer()
+        self.on_file_changed = on_file_changed
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=DEFAULT_IO_WORKERS, thread_name_prefix="mcp-fs-io"
+        )
+
+    def _file_changed(self, path_obj: Path) -> None:
+        """Drop cached state that depends on the contents of a file just written."""
+        self.read_cache.invalidate(str(path_obj))
+        if self.search_cache is not None:
+            self.search_cache.touch(str(path_obj))
+        if self.on_file_changed is not None:
+            self.on_file_changed(str(path_obj))
 
     @mcp_tool
+    @offload
     def file_exists(self, file_path: str) -> bool:
         """
         name: file_exists
@@ -31,7 +118,7 @@ class FileService:
             True
         """
         try:
-            path_obj = validate_path(file_path, self.allowed_dirs)
+            path_obj = self.allowed_roots.validate(file_path)
             exists = path_obj.exists() and path_obj.is_file()
             logger.debug(f"File exists check for {file_path}: {exists}")
             return exists
@@ -43,11 +130,15 @@ class FileService:
             return False
 
     @mcp_tool
+    @offload
     def read_file(self, file_path: str) -> str:
         """
         name: read_file
         description: >
-            Read the contents of a file at the specified path.
+            Read the contents of a text file at the specified path.
+            UTF-8, UTF-16 and UTF-32 files with a byte order mark and Latin-1 files are decoded.
+            Binary and compressed files are refused without being read; use read_file_range with
+            encoding "base64" for them.
 
         Arguments:
             file_path (Path): The path to the file to read.
@@ -56,7 +147,7 @@ class FileService:
             str: The contents of the file.
 
         Raises:
-            ValueError: If the file path is not allowed.
+            ValueError: If the file path is not allowed or the file is not a text file.
             FileNotFoundError: If the file does not exist.
 
         Example:
@@ -64,10 +155,34 @@ class FileService:
             "File contents here."
         """
         try:
-            path_obj = validate_path(file_path, self.allowed_dirs)
+            path_obj = self.allowed_roots.validate(file_path)
+            path = str(path_obj)
+            stat_result = os.stat(path)
+            content = self.read_cache.get(path, stat_result)
+            if content is not None:
+                logger.debug(f"Serving cached contents of {file_path}")
+                metrics.record(metrics.CACHE_HITS)
+                return content
+            metrics.record(metrics.CACHE_MISSES)
+            kind = self.sniffer.lookup(path, stat_result)
+            if kind is not None and not kind.is_text:
+                raise _not_text_error(file_path, kind)
+
             logger.debug(f"Attempting to read file: {file_path}")
-            with path_obj.open("r", encoding="utf-8") as file:
-                content = file.read()
+            with path_obj.open("rb") as file:
+                file_stat = os.fstat(file.fileno())
+                if kind is None:
+                    kind = self.sniffer.record(path, file_stat, file.read(SNIFF_SIZE))
+                    if not kind.is_text:
+                        raise _not_text_error(file_path, kind)
+                    file.seek(0)
+                text_file = io.TextIOWrapper(file, encoding=kind.encoding)
+                try:
+                    content = text_file.read()
+                finally:
+                    text_file.detach()
+            metrics.record(metrics.BYTES_READ, file_stat.st_size)
+            self.read_cache.put(path, file_stat, content)
             return content
         except FileNotFoundError as e:
             logger.error(f"File not found: {file_path}.")
@@ -77,11 +192,259 @@ class FileService:
             raise
 
     @mcp_tool
+    @offload
+    def read_file_range(
+        self,
+        file_path: str,
+        offset: int = 0,
+        length: int = DEFAULT_RANGE_BYTES,
+        start_line: Optional[int] = None,
+        line_count: Optional[int] = None,
+        encoding: str = "text",
+    ) -> dict:
+        """
+        name: read_file_range
+        description: >
+            Read a window of a file, by byte offset or by line number, without loading the whole file.
+            Large files can be read chunk by chunk by passing the returned next_offset or next_line
+            back in until eof is True. A line longer than length is cut at the end of the window and
+            line_truncated is set; next_offset then continues inside that line, while next_line skips
+            the rest of it. With encoding "base64" the raw bytes of the window are returned
+            base64-encoded, which is how binary files are read.
+
+        Arguments:
+            file_path (Path): The path to the file to read.
+            offset (int): Byte offset to start reading at. Ignored when start_line is given.
+            length (int): Maximum number of bytes to return (capped at 1 MiB).
+            start_line (int): 1-based line number to start reading at.
+            line_count (int): Number of lines to return when start_line is given (default 200).
+            encoding (str): "text" (the default) to decode the window as UTF-8, or "base64".
+
+        Returns:
+            A dictionary describing the window:
+            - path (str): Resolved path of the file read.
+            - content (str): The text of the window, or its bytes in base64.
+            - offset (int): Byte offset the window starts at.
+            - bytes_read (int): Number of bytes covered by content.
+            - next_offset (int): Byte offset to continue reading from.
+            - start_line (int): Line the window starts at (line mode only).
+            - next_line (int): Line to continue reading from (line mode only).
+            - truncated (bool): True if fewer than line_count lines fit in length bytes (line mode only).
+            - line_truncated (bool): True if the window ends inside a line longer than length (line mode only).
+            - file_size (int): Size of the file in bytes.
+            - eof (bool): True if the window reaches the end of the file.
+
+        Raises:
+            ValueError: If the file path is not allowed or the window is invalid.
+            FileNotFoundError: If the file does not exist.
+
+        Example:
+            >>> read_file_range("/path/to/app.log", start_line=5000000, line_count=2)
+            {
+                "path": "/path/to/app.log",
+                "content": "line five million\\nline five million and one\\n",
+                "offset": 412390211,
+                "bytes_read": 42,
+                "next_offset": 412390253,
+                "start_line": 5000000,
+                "next_line": 5000002,
+                "truncated": False,
+                "line_truncated": False,
+                "file_size": 2147483648,
+                "eof": False
+            }
+        """
+        try:
+            path_obj = self.allowed_roots.validate(file_path)
+            if offset < 0 or length < 0:
+                raise ValueError("offset and length must not be negative.")
+            if encoding not in RANGE_ENCODINGS:
+                raise ValueError(
+                    f"Unknown encoding {encoding!r}, expected one of {', '.join(RANGE_ENCODINGS)}."
+                )
+            length = min(length, MAX_RANGE_BYTES)
+            logger.debug(f"Attempting to read range of file: {file_path}")
+
+            with path_obj.open("rb") as file:
+                stat_result = os.fstat(file.fileno())
+                file_size = stat_result.st_size
+
+                if start_line is None:
+                    file.seek(offset)
+                    data = file.read(length)
+                    metrics.record(metrics.BYTES_READ, len(data))
+                    if encoding == "base64":
+                        content = base64.b64encode(data).decode("ascii")
+                        bytes_read = len(data)
+                    else:
+                        content, bytes_read = _decode_window(
+                            data, at_eof=offset + len(data) >= file_size
+                        )
+                    return {
+                        "path": str(path_obj),
+                        "content": content,
+                        "offset": offset,
+                        "bytes_read": bytes_read,
+                        "next_offset": offset + bytes_read,
+                        "file_size": file_size,
+                        "eof": offset + bytes_read >= file_size,
+                    }
+
+                if line_count is None:
+                    line_count = DEFAULT_LINE_COUNT
+                line_index = self.line_indexes.get(str(path_obj), stat_result)
+                line_offset = line_index.offset_of_line(file, start_line)
+                if line_offset is None:
+                    line_offset = file_size
+                file.seek(line_offset)
+                data = file.read(length)
+                metrics.record(metrics.BYTES_READ, len(data))
+
+            at_eof = line_offset + len(data) >= file_size
+            end = lines = 0
+            line_truncated = False
+            while lines < line_count:
+                newline = data.find(b"\n", end)
+                if newline == -1:
+                    break
+                end = newline + 1
+                lines += 1
+            if lines < line_count and end < len(data) and (at_eof or lines == 0):
+                # Either the unterminated last line of the file, or a single
+                # line longer than the window, which is returned truncated.
+                # Either way next_line moves past it, so paging by line ends.
+                line_truncated = not at_eof
+                end = len(data)
+                lines += 1
+
+            if encoding == "base64":
+                content = base64.b64encode(data[:end]).decode("ascii")
+            else:
+                # A truncated line may end inside a multi-byte character.
+                content, end = _decode_window(
+                    data[:end], at_eof=line_offset + end >= file_size
+                )
+            return {
+                "path": str(path_obj),
+                "content": content,
+                "offset": line_offset,
+                "bytes_read": end,
+                "next_offset": line_offset + end,
+                "start_line": start_line,
+                "next_line": start_line + lines,
+                "truncated": line_truncated or (lines < line_count and not at_eof),
+                "line_truncated": line_truncated,
+                "file_size": file_size,
+                "eof": line_offset + end >= file_size,
+            }
+        except FileNotFoundError as e:
+            logger.error(f"File not found: {file_path}.")
+            raise
+        except Exception as e:
+            logger.error(f"Error reading range of file {file_path}: {e}")
+            raise
+
+    def _read_capped(self, file_path: str, max_bytes: int) -> dict:
+        try:
+            path_obj = self.allowed_roots.validate(file_path)
+            with path_obj.open("rb") as file:
+                file_stat = os.fstat(file.fileno())
+                file_size = file_stat.st_size
+                kind = self.sniffer.lookup(str(path_obj), file_stat)
+                if kind is None:
+                    head = file.read(SNIFF_SIZE)
+                    kind = self.sniffer.record(str(path_obj), file_stat, head)
+                    file.seek(0)
+                if not kind.is_text:
+                    raise _not_text_error(file_path, kind)
+                data = file.read(max_bytes)
+            content, bytes_read = _decode_window(
+                data, at_eof=len(data) >= file_size, encoding=kind.encoding
+            )
+            return {
+                "path": file_path,
+                "resolved_path": str(path_obj),
+                "content": content,
+                "bytes_read": bytes_read,
+                "file_size": file_size,
+                "truncated": bytes_read < file_size,
+                "error": None,
+            }
+        except Exception as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            return {"path": file_path, "error": f"{type(e).__name__}: {e}"}
+
+    @mcp_tool
+    @offload
+    def read_many_files(
+        self, file_paths: List[str], max_bytes: int = DEFAULT_BATCH_MAX_BYTES
+    ) -> List[dict]:
+        """
+        name: read_many_files
+        description: >
+            Read several files in one call. Files are read concurrently and each one is
+            capped at max_bytes. A failure to read one file, or a binary or compressed file, is
+            reported in its entry and does not fail the others.
+
+        Arguments:
+            file_paths (List[str]): The paths of the files to read (at most 100).
+            max_bytes (int): Maximum number of bytes to return per file (default 256 KiB).
+
+        Returns:
+            A list with one dictionary per requested path, in the same order:
+            - path (str): The path as requested.
+            - resolved_path (str): Resolved path of the file read.
+            - content (str): The contents of the file, up to max_bytes.
+            - bytes_read (int): Number of bytes covered by content.
+            - file_size (int): Size of the file in bytes.
+            - truncated (bool): True if the file is larger than max_bytes.
+            - error (str): None on success, otherwise why the file could not be read.
+
+        Raises:
+            ValueError: If too many paths are requested.
+
+        Example:
+            >>> read_many_files(["/path/to/a.txt", "/path/to/missing.txt"])
+            [
+                {
+                    "path": "/path/to/a.txt",
+                    "resolved_path": "/path/to/a.txt",
+                    "content": "File contents here.",
+                    "bytes_read": 19,
+                    "file_size": 19,
+                    "truncated": False,
+                    "error": None
+                },
+                {
+                    "path": "/path/to/missing.txt",
+                    "error": "FileNotFoundError: [Errno 2] No such file or directory"
+                }
+            ]
+        """
+        if len(file_paths) > MAX_BATCH_FILES:
+            raise ValueError(
+                f"Cannot read {len(file_paths)} files at once, the limit is {MAX_BATCH_FILES}."
+            )
+        max_bytes = max(0, min(max_bytes, MAX_RANGE_BYTES))
+        logger.debug(f"Attempting to read {len(file_paths)} files")
+        results = list(
+            self.io_executor.map(
+                lambda file_path: self._read_capped(file_path, max_bytes), file_paths
+            )
+        )
+        metrics.record(
+            metrics.BYTES_READ, sum(result.get("bytes_read", 0) for result in results)
+        )
+        return results
+
+    @mcp_tool
+    @offload
     def write_file(self, file_path: str, content: str) -> str:
         """
         name: write_file
         description: >
             Write content to a file at the specified path.
+            The file is replaced atomically: readers see either the old or the new contents.
 
         Arguments:
             file_path (Path): The path to the file to write.
@@ -104,15 +467,18 @@ class FileService:
             }
         """
         try:
-            path_obj = validate_path(file_path, self.allowed_dirs)
+            path_obj = self.allowed_roots.validate(file_path)
             logger.debug(f"Attempting to write to file: {file_path}")
-            with path_obj.open("w", encoding="utf-8") as file:
-                file.write(content)
+            bytes_written = atomic_write(
+                path_obj, content.encode("utf-8"), self.durability
+            )
+            self._file_changed(path_obj)
+            metrics.record(metrics.BYTES_WRITTEN, bytes_written)
             return {
                 "success": True,
                 "path": str(path_obj),
                 "message": "File written successfully.",
-                "bytes_written": len(content.encode("utf-8")),
+                "bytes_written": bytes_written,
             }
         except FileNotFoundError as e:
             logger.error(f"File not found for writing: {file_path}.")
@@ -122,6 +488,7 @@ class FileService:
             raise
 
     @mcp_tool
+    @offload
     def append_to_file(self, file_path: str, content: str) -> dict:
         """
         name: append_to_file
@@ -149,15 +516,16 @@ class FileService:
             }
         """
         try:
-            path_obj = validate_path(file_path, self.allowed_dirs)
+            path_obj = self.allowed_roots.validate(file_path)
             logger.debug(f"Attempting to append to file: {file_path}")
 
             if not path_obj.exists():
                 logger.warning(f"File {file_path} does not exist. Creating a new file.")
                 path_obj.parent.mkdir(parents=True, exist_ok=True)
 
-            with path_obj.open("a", encoding="utf-8") as file:
-                bytes_written = file.write(content)
+            bytes_written = self.appender.append(path_obj, content.encode("utf-8"))
+            self._file_changed(path_obj)
+            metrics.record(metrics.BYTES_WRITTEN, bytes_written)
             return {
                 "success": True,
                 "path": str(path_obj),
@@ -167,3 +535,91 @@ class FileService:
         except Exception as e:
             logger.error(f"Error appending to file {file_path}: {e}")
             raise
+
+    @mcp_tool
+    @offload
+    def apply_edits(
+        self,
+        file_path: str,
+        edits: Optional[List[Any]] = None,
+        diff: Optional[str] = None,
+    ) -> dict:
+        """
+        name: apply_edits
+        description: >
+            Change parts of an existing file without sending its whole content.
+            Pass either edits, a list of {"old_text": ..., "new_text": ...} replacements (or [old, new]
+            pairs) where each old text must occur exactly once in the file, or diff, the hunks of a
+            unified diff against the file. Either every edit applies or the file is left untouched.
+
+        Arguments:
+            file_path (Path): The path to the file to edit.
+            edits (List[dict]): Replacements of unique snippets of the file.
+            diff (str): A unified diff against the file.
+
+        Returns:
+            A dictionary with information about the operation:
+            - success (bool): True if the edits were applied.
+            - path (str): Resolved path of the edited file.
+            - message (str): A message indicating the result of the operation.
+            - edits_applied (int): Number of replacements or hunks applied.
+            - file_size (int): Size of the file after the edits, in bytes.
+
+        Raises:
+            ValueError: If the path is not allowed, or an edit does not match the file.
+            FileNotFoundError: If the file does not exist.
+
+        Example:
+            >>> apply_edits("/path/to/config.py", edits=[{"old_text": "DEBUG = True", "new_text": "DEBUG = False"}])
+            {
+                "success": True,
+                "path": "/path/to/config.py",
+                "message": "Applied 1 edit.",
+                "edits_applied": 1,
+                "file_size": 5242880
+            }
+        """
+        try:
+            path_obj = self.allowed_roots.validate(file_path)
+            if (edits is None) == (diff is None):
+                raise EditError("Pass exactly one of edits or diff.")
+            if diff is not None:
+                replacements = replacements_from_diff(diff)
+            else:
+                replacements = replacements_from_pairs(edits)
+
+            logger.debug(f"Applying {len(replacements)} edits to {file_path}")
+            with path_obj.open("rb") as file:
+                file_stat = os.fstat(file.fileno())
+                line_index = self.line_indexes.get(str(path_obj), file_stat)
+                buffer = map_file(file)
+                try:
+                    spans = locate(
+                        buffer,
+                        replacements,
+                        lambda line: line_index.offset_of_line(file, line),
+                    )
+                finally:
+                    if not isinstance(buffer, bytes):
+                        buffer.close()
+
+                def write_contents(target) -> int:
+                    return write_edited(file.fileno(), file_stat.st_size, spans, target)
+
+                # Refuse to replace the file if it changed since it was read.
+                if file_signature(os.stat(path_obj)) != file_signature(file_stat):
+                    raise EditError(f"{file_path} changed while it was being edited.")
+                file_size = atomic_rewrite(path_obj, write_contents, self.durability)
+
+            self._file_changed(path_obj)
+            metrics.record(metrics.BYTES_WRITTEN, file_size)
+            return {
+                "success": True,
+                "path": str(path_obj),
+                "message": f"Applied {len(spans)} edit{'s' if len(spans) != 1 else ''}.",
+                "edits_applied": len(spans),
+                "file_size": file_size,
+            }
+        except Exception as e:
+            logger.error(f"Error applying edits to {file_path}: {e}")
+            raise
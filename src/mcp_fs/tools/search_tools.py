@@ -1,61 +1,269 @@
 import logging
 import os
-import subprocess
+import re
+import threading
+import time
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Union
 from easy_mcp.registration.tools import mcp_tool
 
-from mcp_fs.utils.path_utils import validate_path, expand_path
-from mcp_fs.config.constants.grep_ignore_dirs import GREP_IGNORE_DIRS
+from mcp_fs.utils import metrics, tracing
+from mcp_fs.utils.async_utils import ToolRunner, offload
+from mcp_fs.utils.ignore import WalkFilter, walk
+from mcp_fs.utils.pagination import CursorStore, InvalidCursorError, check_limit
+from mcp_fs.utils.path_utils import AllowedRoots
+from mcp_fs.index.content_sniffer import ContentSniffer
+from mcp_fs.index.search_cache import DEFAULT_MAX_AGE, SearchResultCache
+from mcp_fs.search.content_search import (
+    DEFAULT_MAX_HITS,
+    DEFAULT_MAX_HITS_PER_FILE,
+    ContentSearchEngine,
+    Hit,
+    SearchDeadline,
+    SearchTimeoutError,
+    file_hits,
+)
+from mcp_fs.search.patterns import (
+    NAME_SEARCH_MODES,
+    SEARCH_MODES,
+    check_mode,
+    compile_name_pattern,
+    compile_pattern,
+)
+
+if TYPE_CHECKING:
+    from mcp_fs.index.content_index import ContentIndex
+    from mcp_fs.index.path_index import PathIndex, PathIndexClient
+    from mcp_fs.index.tree_watcher import TreeWatcher
 
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_FUZZY_RESULTS = 50
+DEFAULT_SEARCH_TIMEOUT = 30.0
+
+
 class SearchService:
     """Service for searching files and directories."""
 
-    def __init__(self, allowed_dirs: List[Path]):
+    def __init__(
+        self,
+        allowed_dirs: List[Path],
+        allowed_roots: Optional[AllowedRoots] = None,
+        use_content_index: bool = True,
+        tree_watcher: Optional["TreeWatcher"] = None,
+        tool_runner: Optional[ToolRunner] = None,
+        content_search: Optional[ContentSearchEngine] = None,
+        cursor_store: Optional[CursorStore] = None,
+        search_cache: Optional[SearchResultCache] = None,
+        sniffer: Optional[ContentSniffer] = None,
+        path_index_client: Optional["PathIndexClient"] = None,
+    ):
         self.allowed_dirs = allowed_dirs
+        self.allowed_roots = allowed_roots or AllowedRoots(allowed_dirs)
+        self.use_content_index = use_content_index
+        self.tree_watcher = tree_watcher
+        self.tool_runner = tool_runner or ToolRunner()
+        self.sniffer = sniffer or ContentSniffer()
+        self.content_search = content_search or ContentSearchEngine(
+            sniffer=self.sniffer
+        )
+        self.cursor_store = cursor_store or CursorStore()
+        self.search_cache = search_cache or SearchResultCache()
+        self._content_indexes: Dict[Path, "ContentIndex"] = {}
+        self._content_indexes_lock = threading.Lock()
+        self._path_indexes: Dict[Path, "PathIndex"] = {}
+        self.path_index_client = path_index_client
+
+    def _content_index_for(self, path: Path) -> Optional["ContentIndex"]:
+        """Return the content index of the innermost allowed directory containing `path`."""
+        # sqlite3 is loaded by the first search that uses the index.
+        from mcp_fs.index.content_index import ContentIndex
+
+        allowed_dir = self.allowed_roots.root_for(path)
+        if allowed_dir is None:
+            return None
+        with self._content_indexes_lock:
+            if allowed_dir not in self._content_indexes:
+                self._content_indexes[allowed_dir] = ContentIndex(allowed_dir)
+            return self._content_indexes[allowed_dir]
+
+    def file_changed(self, path: str) -> None:
+        """Have the content index re-read a file the server just wrote on the next query."""
+        allowed_dir = self.allowed_roots.root_for(Path(path))
+        with self._content_indexes_lock:
+            content_index = self._content_indexes.get(allowed_dir)
+        if content_index is not None:
+            content_index.mark_changed(path)
+
+    def _path_index_for(self, path: Path) -> Optional["PathIndex"]:
+        """Return the path index of the innermost allowed directory containing `path`."""
+        # Loaded by the first fuzzy search.
+        from mcp_fs.index.path_index import PathIndex, SharedPathIndex
+
+        allowed_dir = self.allowed_roots.root_for(path)
+        if allowed_dir is None:
+            return None
+        with self._content_indexes_lock:
+            if allowed_dir not in self._path_indexes:
+                if self.path_index_client is not None:
+                    self._path_indexes[allowed_dir] = SharedPathIndex(
+                        allowed_dir, self.path_index_client
+                    )
+                else:
+                    self._path_indexes[allowed_dir] = PathIndex(allowed_dir)
+            return self._path_indexes[allowed_dir]
+
+    def _cached(
+        self,
+        validated_search_path: Path,
+        key: tuple,
+        search,
+        max_age: Optional[float] = None,
+    ) -> list:
+        """
+        Return the results of `search()`, reusing those of an identical earlier
+        search while nothing below `validated_search_path` changed.
+        """
+        root = self.allowed_roots.root_for(validated_search_path)
+        if root is None:
+            return search()
+        key = (str(root), str(validated_search_path)) + key
+        digest = self.search_cache.digest(str(validated_search_path))
+        results = self.search_cache.get(key, digest)
+        if results is not None:
+            metrics.record(metrics.CACHE_HITS)
+            return results
+        metrics.record(metrics.CACHE_MISSES)
+        results = search()
+        self.search_cache.put(key, digest, results, max_age=max_age)
+        return results
+
+    def _iter_files_with_substring(
+        self,
+        validated_search_path: Path,
+        substring: str,
+        mode: str = "literal",
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Yield files below `validated_search_path` whose name matches `substring`."""
+        name_pattern = compile_name_pattern(substring, mode)
+        deadline = SearchDeadline(timeout)
+        if self.tree_watcher is not None:
+            # The watched tree finds names containing the pattern's literal text.
+            matching_files = self.tree_watcher.find_files(
+                validated_search_path, name_pattern.literal
+            )
+            if matching_files is not None:
+                # The tree holds names the walk skips: those .gitignore rules
+                # exclude and those outside the allowed roots.
+                walk_filter = WalkFilter(str(validated_search_path))
+                for path in matching_files:
+                    if deadline.expired():
+                        raise SearchTimeoutError(
+                            f"Search of {validated_search_path} timed out after {timeout}s."
+                        )
+                    if (
+                        (
+                            mode == "literal"
+                            or name_pattern.matches(os.path.basename(path))
+                        )
+                        and self.allowed_roots.contains(os.path.dirname(path))
+                        and walk_filter.reaches(path)
+                    ):
+                        paused_at = time.monotonic()
+                        yield path
+                        deadline.extend(time.monotonic() - paused_at)
+                return
+
+        # Ignored directories are pruned and ignored files skipped by the walk.
+        for root, _, files in walk(str(validated_search_path)):
+            if deadline.expired():
+                raise SearchTimeoutError(
+                    f"Search of {validated_search_path} timed out after {timeout}s."
+                )
+            if not self.allowed_roots.contains(root):
+                continue
+
+            for entry in files:
+                if name_pattern.matches(entry.name):
+                    paused_at = time.monotonic()
+                    yield entry.path
+                    deadline.extend(time.monotonic() - paused_at)
 
     @mcp_tool
+    @offload
     def find_files_with_substring_in_path(
-        self, search_path: Path, substring: str
-    ) -> List[str]:
+        self,
+        search_path: Path,
+        substring: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        mode: str = "literal",
+        timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+    ) -> Union[List[str], dict]:
         """
         name: find_files_with_substring_in_path
         description: >
             Search for files in a directory and its subdirectories that contain a specific substring in their names.
+            Matching is case-insensitive. With `mode` "regex" the substring is a Python regular expression
+            searched for in each name, and with `mode` "glob" a shell pattern such as "*.py" that must match
+            the whole name.
+            Pass `limit` to get the results one page at a time, and the returned `next_cursor` to continue
+            the search where the previous page stopped.
         Arguments:
             search_path (Path): The path to the directory where the search will be performed.
             substring (str): The substring to search for in file names.
+            limit (int): Maximum number of file paths per page. Enables pagination.
+            cursor (str): The `next_cursor` of the previous page. Enables pagination.
+            mode (str): How to interpret substring: "literal" (default), "regex" or "glob".
+            timeout (float): Give up after this many seconds of searching (default 30); null for no limit.
         Returns:
             List[str]: A list of file paths that match the search criteria.
+            dict: With pagination, a page with `results`, `next_cursor` and `truncated`.
+        Raises:
+            ValueError: If the mode is unknown or limit is less than 1.
+            re.error: If the regex or glob is invalid.
+            InvalidCursorError: If the cursor is unknown, expired, or belongs to another search.
+            SearchTimeoutError: If the search takes longer than `timeout` seconds.
         Example:
             >>> find_files_with_substring_in_path("/path/to/search", "example")
             ['/path/to/search/example_file.txt', '/path/to/search/subdir/example_file2.txt']
+            >>> find_files_with_substring_in_path("/path/to/search", "test_*.py", mode="glob")
+            ['/path/to/search/tests/test_main.py']
         """
+        check_mode(mode, NAME_SEARCH_MODES)
+        check_limit(limit)
         try:
-            validated_search_path = validate_path(search_path, self.allowed_dirs)
-            allowed_dirs = [expand_path(dir_path) for dir_path in self.allowed_dirs]
-
-            matching_files = []
-            for root, dirs, files in os.walk(validated_search_path):
-                # Filter out ignored directories
-                dirs[:] = [d for d in dirs if d not in GREP_IGNORE_DIRS]
-                path_obj = Path(root)
-
-                if not any(
-                    str(path_obj).startswith(str(allowed_dir))
-                    for allowed_dir in allowed_dirs
-                ):
-                    continue
+            with tracing.span("validate"):
+                validated_search_path = self.allowed_roots.validate(search_path)
 
-                for file in files:
-                    if substring.lower() in file.lower():
-                        matching_files.append(os.path.join(root, file))
+            def start():
+                return self._iter_files_with_substring(
+                    validated_search_path, substring, mode, timeout
+                )
+
+            if limit is None and cursor is None:
+                return self._cached(
+                    validated_search_path,
+                    ("find_files_with_substring_in_path", substring, mode),
+                    lambda: list(start()),
+                )
 
-            return matching_files
+            return self.cursor_store.page(
+                (
+                    "find_files_with_substring_in_path",
+                    validated_search_path,
+                    substring,
+                    mode,
+                ),
+                start,
+                limit=limit,
+                cursor=cursor,
+            )
+        except (InvalidCursorError, SearchTimeoutError, re.error):
+            raise
         except ValueError as e:
             logger.error(f"Access denied for {search_path}: {e}")
             return []
@@ -64,47 +272,319 @@ class SearchService:
             return []
 
     @mcp_tool
-    def search_file_bodies_for_substring(
-        self, search_path: Path, text: str
-    ) -> List[str]:
+    @offload
+    def fuzzy_find_files(
+        self,
+        search_path: Path,
+        query: str,
+        limit: int = DEFAULT_FUZZY_RESULTS,
+    ) -> List[dict]:
+        """
+        name: fuzzy_find_files
+        description: >
+            Find files by fuzzy matching their paths, like fzf, and return the best matches first.
+            The characters of the query must appear in the path relative to the allowed directory
+            in order, case-insensitively, but not necessarily next to each other. Matches at the
+            start of path components and words, runs of consecutive characters and matches in the
+            file name rank higher; shorter paths win ties. Ignored files are not searched.
+        Arguments:
+            search_path (Path): The directory to search below.
+            query (str): The characters to look for, e.g. "dirtools" or "src/srv".
+            limit (int): Maximum number of matches to return (default 50).
+        Returns:
+            List[dict]: The best matches, each with `path` and `score`, highest score first.
+        Raises:
+            ValueError: If limit is less than 1.
+        Example:
+            >>> fuzzy_find_files("/path/to/project", "dirtool", limit=2)
+            [{'path': '/path/to/project/src/tools/directory_tools.py', 'score': 182},
+             {'path': '/path/to/project/docs/directory-tools.md', 'score': 170}]
+        """
+        check_limit(limit)
         try:
-            validated_search_path = validate_path(search_path, self.allowed_dirs)
-            allowed_dirs = [expand_path(dir_path) for dir_path in self.allowed_dirs]
-            excluded_dirs = [
-                item
-                for pattern in GREP_IGNORE_DIRS
-                for item in ["--exclude-dir", pattern]
+            with tracing.span("validate"):
+                validated_search_path = self.allowed_roots.validate(search_path)
+            path_index = self._path_index_for(validated_search_path)
+            if path_index is None:
+                return []
+            return [
+                {"path": path, "score": score}
+                for score, path in path_index.search(
+                    query, str(validated_search_path), top_k=limit
+                )
             ]
+        except ValueError as e:
+            logger.error(f"Invalid fuzzy search in {search_path}: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error fuzzy searching files in {search_path}: {e}")
+            return []
+
+    def _iter_file_bodies_with_text(
+        self,
+        validated_search_path: Path,
+        text: str,
+        max_results: Optional[int],
+        mode: str = "grep",
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Yield files below `validated_search_path` whose contents match `text`."""
+        content_index = None
+        if self.use_content_index and compile_pattern(text, mode).regex is None:
+            content_index = self._content_index_for(validated_search_path)
 
-            result = subprocess.run(
-                ["grep", "-irl", text, str(validated_search_path)] + excluded_dirs,
-                capture_output=True,
-                text=True,
+        if content_index is not None:
+            matching_files = content_index.search(
+                text,
+                validated_search_path,
+                max_results=max_results,
+                deadline=SearchDeadline(timeout),
             )
+        else:
+            matching_files = self.content_search.iter_matches(
+                validated_search_path,
+                text,
+                max_results=max_results,
+                mode=mode,
+                timeout=timeout,
+            )
+
+        # Filter out symbolic links that point outside allowed directories
+        filter_stage = tracing.stage("filter")
+        kept = 0
+        try:
+            for path in matching_files:
+                with filter_stage:
+                    allowed = self.allowed_roots.contains(path)
+                if allowed:
+                    kept += 1
+                    yield path
+        finally:
+            filter_stage.close(kept=kept)
+
+    def _iter_hits(
+        self,
+        validated_search_path: Path,
+        text: str,
+        context_lines: int,
+        max_hits_per_file: int,
+        max_hits: int,
+        mode: str = "grep",
+        timeout: Optional[float] = None,
+    ) -> Iterator[Hit]:
+        """Yield matching lines below `validated_search_path` with their context."""
+        content_index = None
+        if self.use_content_index and compile_pattern(text, mode).regex is None:
+            content_index = self._content_index_for(validated_search_path)
+
+        if content_index is not None:
+            hits = self._iter_indexed_hits(
+                content_index,
+                validated_search_path,
+                text,
+                context_lines,
+                max_hits_per_file,
+                mode,
+                timeout,
+            )
+        else:
+            hits = self.content_search.iter_hits(
+                validated_search_path,
+                text,
+                context_lines=context_lines,
+                max_hits_per_file=max_hits_per_file,
+                max_hits=max_hits,
+                mode=mode,
+                timeout=timeout,
+            )
+
+        filter_stage = tracing.stage("filter")
+        found = 0
+        try:
+            for hit in hits:
+                # Filter out symbolic links that point outside allowed directories
+                with filter_stage:
+                    allowed = self.allowed_roots.contains(hit["path"])
+                if not allowed:
+                    continue
+                yield hit
+                found += 1
+                if found >= max_hits:
+                    return
+        finally:
+            filter_stage.close(kept=found)
+
+    def _iter_indexed_hits(
+        self,
+        content_index: "ContentIndex",
+        validated_search_path: Path,
+        text: str,
+        context_lines: int,
+        max_hits_per_file: int,
+        mode: str,
+        timeout: Optional[float],
+    ) -> Iterator[Hit]:
+        """Yield the hits in the files the content index finds candidates for `text`."""
+        deadline = SearchDeadline(timeout)
+        for path in content_index.candidate_paths(
+            text, validated_search_path, deadline
+        ):
+            if deadline.expired():
+                raise SearchTimeoutError(
+                    f"Search of {validated_search_path} timed out after {timeout}s."
+                )
+            for hit in self._file_hits(
+                path, text, context_lines, max_hits_per_file, mode
+            ):
+                paused_at = time.monotonic()
+                yield hit
+                deadline.extend(time.monotonic() - paused_at)
+
+    def _file_hits(
+        self,
+        path: str,
+        text: str,
+        context_lines: int,
+        max_hits_per_file: int,
+        mode: str,
+    ) -> List[Hit]:
+        metrics.record(metrics.FILES_SCANNED)
+        try:
+            return file_hits(
+                path, text, context_lines, max_hits_per_file, mode, self.sniffer
+            )
+        except OSError as e:
+            logger.debug(f"Skipping unreadable candidate {path}: {e}")
+            return []
+
+    @mcp_tool
+    @offload
+    def search_file_bodies_for_substring(
+        self,
+        search_path: Path,
+        text: str,
+        max_results: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        context_lines: Optional[int] = None,
+        max_hits_per_file: int = DEFAULT_MAX_HITS_PER_FILE,
+        max_hits: int = DEFAULT_MAX_HITS,
+        mode: str = "grep",
+        timeout: Optional[float] = DEFAULT_SEARCH_TIMEOUT,
+    ) -> Union[List[str], List[Hit], dict]:
+        r"""
+        name: search_file_bodies_for_substring
+        description: >
+            Search for files in a directory and its subdirectories whose contents contain a specific text.
+            The text is matched case-insensitively. By default (`mode` "grep") it is interpreted as a grep
+            basic regular expression; pass `mode` "literal" for plain text, "regex" for a Python regular
+            expression, or "glob" for a pattern with `*`, `?` and `[...]` matched within a line.
+            Binary files are skipped.
+            Pass `limit` to get the results one page at a time, and the returned `next_cursor` to continue
+            the search where the previous page stopped. Paged results are not sorted.
+            Pass `context_lines` to get the matching lines instead of file names: each hit has the `path`,
+            the 1-based `line_number`, the `line` and the `context_lines` lines `before` and `after` it,
+            so the files do not need to be read afterwards.
+        Arguments:
+            search_path (Path): The path to the directory where the search will be performed.
+            text (str): The text to search for in file contents.
+            max_results (int): Stop after this many matching files. Defaults to no limit.
+            limit (int): Maximum number of file paths per page. Enables pagination.
+            cursor (str): The `next_cursor` of the previous page. Enables pagination.
+            context_lines (int): Lines of context around each matching line. Enables hit results.
+            max_hits_per_file (int): With hit results, the maximum number of hits per file. Defaults to 10.
+            max_hits (int): With hit results, the maximum number of hits overall. Defaults to 200.
+            mode (str): How to interpret text: "grep" (default), "literal", "regex" or "glob".
+            timeout (float): Give up after this many seconds of searching (default 30); null for no limit.
+        Returns:
+            List[str]: A list of file paths whose contents match the search criteria.
+            List[dict]: With `context_lines`, the matching lines, in line order within each file.
+            dict: With pagination, a page with `results`, `next_cursor` and `truncated`.
+        Raises:
+            ValueError: If the mode is unknown, a limit is less than 1 or context_lines is negative.
+            re.error: If the pattern is invalid, or has non-ASCII characters in a bracket expression.
+            InvalidCursorError: If the cursor is unknown, expired, or belongs to another search.
+            SearchTimeoutError: If the search takes longer than `timeout` seconds.
+        Example:
+            >>> search_file_bodies_for_substring("/path/to/search", "TODO", max_results=2)
+            ['/path/to/search/main.py', '/path/to/search/subdir/utils.py']
+            >>> search_file_bodies_for_substring("/path/to/search", "TODO", context_lines=1)
+            [{'path': '/path/to/search/main.py', 'line_number': 12, 'line': '    # TODO: retry',
+              'before': ['def fetch():'], 'after': ['    return get()']}]
+            >>> search_file_bodies_for_substring("/path/to/search", r"def \w+_test\(", mode="regex")
+            ['/path/to/search/tests/helpers.py']
+        """
+        check_mode(mode, SEARCH_MODES)
+        check_limit(limit)
+        if context_lines is not None and (
+            context_lines < 0 or max_hits_per_file < 1 or max_hits < 1
+        ):
+            raise ValueError(
+                "context_lines must not be negative and hit limits must be at least 1."
+            )
+        try:
+            with tracing.span("validate"):
+                validated_search_path = self.allowed_roots.validate(search_path)
 
-            matches_found, no_matches_found = 0, 1
-            if result.returncode not in {
-                matches_found,
-                no_matches_found,
-            }:
-                raise RuntimeError(
-                    f"grep failed with return code {result.returncode}: {result.stderr}"
+            if context_lines is None:
+                request_key = (
+                    "search_file_bodies_for_substring",
+                    validated_search_path,
+                    text,
+                    max_results,
+                    mode,
                 )
 
-            matching_files = [line for line in result.stdout.splitlines()]
+                def start():
+                    return self._iter_file_bodies_with_text(
+                        validated_search_path, text, max_results, mode, timeout
+                    )
 
-            # Filter out symbolic links that point outside allowed directories
-            matching_files = [
-                path
-                for path in matching_files
-                if any(
-                    str(Path(path)).startswith(str(allowed_dir))
-                    for allowed_dir in allowed_dirs
+            else:
+                request_key = (
+                    "search_file_bodies_for_substring",
+                    validated_search_path,
+                    text,
+                    context_lines,
+                    max_hits_per_file,
+                    max_hits,
+                    mode,
                 )
-            ]
 
-            return matching_files
+                def start():
+                    return self._iter_hits(
+                        validated_search_path,
+                        text,
+                        context_lines,
+                        max_hits_per_file,
+                        max_hits,
+                        mode,
+                        timeout,
+                    )
+
+            if limit is None and cursor is None:
+
+                def search():
+                    results = list(start())
+                    with tracing.span("serialize", results=len(results)):
+                        if context_lines is None:
+                            return sorted(results)
+                        return sorted(
+                            results, key=lambda hit: (hit["path"], hit["line_number"])
+                        )
+
+                # Files edited in place by other processes leave no trace in
+                # directory mtimes, so body results also expire with age.
+                return self._cached(
+                    validated_search_path, request_key, search, max_age=DEFAULT_MAX_AGE
+                )
+
+            return self.cursor_store.page(
+                request_key, start, limit=limit, cursor=cursor
+            )
 
+        except (InvalidCursorError, SearchTimeoutError, re.error):
+            raise
         except ValueError as e:
             logger.error(f"Access denied for {search_path}: {e}")
             return []
@@ -0,0 +1,94 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from mcp_fs.utils.profiling import ToolProfiler
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TOOL_WORKERS = 32
+
+
+class ToolRunner:
+    """
+    Runs blocking tool work off the event loop.
+
+    All services share one thread pool. Each tool can additionally be given a
+    concurrency limit, so a handful of slow searches cannot occupy every worker
+    while cheap calls wait behind them, and a profiler can be given that
+    profiles the next calls of chosen tools.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_TOOL_WORKERS,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        profiler: Optional[ToolProfiler] = None,
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mcp-fs-tool"
+        )
+        self.concurrency_limits = dict(concurrency_limits or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.profiler = profiler
+
+    @contextlib.asynccontextmanager
+    async def limit(self, tool_name: str) -> AsyncIterator[None]:
+        """Hold one of the concurrency slots configured for `tool_name`, if any."""
+        max_concurrency = self.concurrency_limits.get(tool_name)
+        if not max_concurrency:
+            yield
+            return
+
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = self._semaphores[tool_name] = asyncio.Semaphore(max_concurrency)
+        async with semaphore:
+            yield
+
+    async def to_thread(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # Like asyncio.to_thread, run in a copy of the caller's context so
+        # per-call state such as the metrics of the current tool call follows.
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    async def run_tool(
+        self, tool_name: str, func: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """Run the blocking implementation of `tool_name` in a worker thread, profiled if wanted."""
+        if self.profiler is not None and self.profiler.wants(tool_name):
+            return await self.to_thread(
+                self.profiler.run, tool_name, func, *args, **kwargs
+            )
+        return await self.to_thread(func, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def offload(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Turn a blocking service method into a coroutine run on the service's `ToolRunner`.
+
+    The method name doubles as the tool name for concurrency limits and
+    profiling. The blocking implementation stays reachable through
+    `__wrapped__`.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        async with self.tool_runner.limit(func.__name__):
+            return await self.tool_runner.run_tool(
+                func.__name__, func, self, *args, **kwargs
+            )
+
+    return wrapper
@@ -0,0 +1,176 @@
+"""
+Crash-safe writes and batched appends.
+
+`atomic_write` and `atomic_rewrite` write the new contents to a temporary
+file next to the target and rename it over the target, so readers and
+crashes see either the old or the new file, never a torn one. A symlink is
+followed and the file it points to replaced, so the link survives. A file
+with several hard links is detached from the others, which keep the old
+contents: renaming replaces only the one name.
+
+`GroupCommitAppender` funnels concurrent appends to the same file through
+one writer, which writes every queued chunk and syncs once per batch
+instead of once per call.
+
+How hard both try to reach stable storage is set by a `Durability` mode.
+"""
+
+import enum
+import os
+import secrets
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+
+class Durability(str, enum.Enum):
+    NONE = "none"  # rely on the OS to flush page cache
+    FILE = "file"  # fsync the file before reporting success
+    DIRECTORY = "directory"  # also fsync the directory holding a renamed or new file
+
+
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
+
+
+def _fsync_directory(dir_path: Path) -> None:
+    fd = os.open(dir_path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _create_temp(path: Path) -> Tuple[int, Path]:
+    """
+    Create a temporary file next to `path`; return its descriptor and path.
+
+    It is created with the mode `open` gives new files, under the umask in
+    effect at that moment.
+    """
+    while True:
+        tmp_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(tmp_path, _TEMP_FLAGS, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def atomic_rewrite(
+    path: Path,
+    write_contents: Callable[[BinaryIO], int],
+    durability: Durability = Durability.NONE,
+) -> int:
+    """
+    Replace the contents of `path` atomically with what `write_contents` writes.
+
+    `write_contents` receives the temporary file opened for binary writing and
+    returns the number of bytes it wrote, which is returned. The file keeps its
+    permission bits, or gets the default ones if it is new.
+    """
+    if os.path.islink(path):
+        path = Path(os.path.realpath(path))
+    try:
+        mode: Optional[int] = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+
+    fd, tmp_path = _create_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            written = write_contents(file)
+            file.flush()
+            if mode is not None:
+                os.fchmod(file.fileno(), mode)
+            if durability is not Durability.NONE:
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if durability is Durability.DIRECTORY:
+        _fsync_directory(path.parent)
+    return written
+
+
+def atomic_write(
+    path: Path, data: bytes, durability: Durability = Durability.NONE
+) -> int:
+    """Replace the contents of `path` with `data` atomically; return the bytes written."""
+    return atomic_rewrite(path, lambda file: file.write(data), durability)
+
+
+class _PendingAppend:
+    __slots__ = ("data", "done", "error")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommitAppender:
+    """
+    Appends to files, batching concurrent appends to the same file.
+
+    The first caller for a file becomes its writer: it takes every append
+    queued for the file, writes them in arrival order with one `write` and
+    one sync, wakes their callers, and repeats until the queue is empty.
+    Callers arriving while a batch is being synced wait for the next batch.
+    """
+
+    def __init__(self, durability: Durability = Durability.NONE):
+        self.durability = durability
+        self._queues: Dict[Path, List[_PendingAppend]] = {}
+        self._writing = set()
+        self._lock = threading.Lock()
+
+    def append(self, path: Path, data: bytes) -> int:
+        """Append `data` to `path`, creating it if needed; return the number of bytes appended."""
+        request = _PendingAppend(data)
+        with self._lock:
+            self._queues.setdefault(path, []).append(request)
+            is_writer = path not in self._writing
+            if is_writer:
+                self._writing.add(path)
+
+        if is_writer:
+            self._drain(path)
+        else:
+            request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return len(data)
+
+    def _drain(self, path: Path) -> None:
+        while True:
+            with self._lock:
+                batch = self._queues.pop(path, None)
+                if not batch:
+                    self._writing.discard(path)
+                    return
+            try:
+                self._write_batch(path, batch)
+            except BaseException as e:
+                for request in batch:
+                    request.error = e
+            for request in batch:
+                request.done.set()
+
+    def _write_batch(self, path: Path, batch: List[_PendingAppend]) -> None:
+        created = not path.exists()
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            data = b"".join(request.data for request in batch)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            if self.durability is not Durability.NONE:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        if created and self.durability is Durability.DIRECTORY:
+            _fsync_directory(path.parent)
@@ -0,0 +1,211 @@
+"""
+Targeted edits of existing files.
+
+Edits are given either as (old text, new text) replacements or as the hunks
+of a unified diff. Every edit is first located in the original bytes; only
+if all of them match exactly once and do not overlap is the file rewritten.
+The rewrite streams the untouched byte ranges from the original into a
+temporary file, with `os.copy_file_range` where the platform has it, and
+renames the result over the original.
+"""
+
+import mmap
+import os
+import re
+from typing import BinaryIO, Callable, Iterable, List, NamedTuple, Optional, Sequence
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+_HUNK_HEADER = re.compile(rb"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditError(ValueError):
+    """Raised when an edit does not apply to the file; the file is left untouched."""
+
+
+class Replacement(NamedTuple):
+    old: bytes
+    new: bytes
+    # 1-based line the old text is expected to start at, for diff hunks
+    line: Optional[int] = None
+
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    new: bytes
+
+
+def replacements_from_pairs(edits: Iterable) -> List[Replacement]:
+    """Accept edits as {"old_text", "new_text"} dictionaries or [old, new] pairs."""
+    replacements = []
+    for index, edit in enumerate(edits):
+        if isinstance(edit, dict):
+            old, new = edit.get("old_text"), edit.get("new_text")
+        elif isinstance(edit, (list, tuple)) and len(edit) == 2:
+            old, new = edit
+        else:
+            raise EditError(f"Edit {index} must be an (old_text, new_text) pair.")
+        if not isinstance(old, str) or not isinstance(new, str) or not old:
+            raise EditError(f"Edit {index} needs a non-empty old_text and a new_text.")
+        replacements.append(Replacement(old.encode("utf-8"), new.encode("utf-8")))
+    return replacements
+
+
+def replacements_from_diff(diff: str) -> List[Replacement]:
+    """Turn the hunks of a unified diff against a single file into replacements."""
+    replacements = []
+    lines = diff.encode("utf-8").splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        header = _HUNK_HEADER.match(lines[i])
+        i += 1
+        if header is None:
+            continue
+        old_start = int(header.group(1))
+        old_count = int(header.group(2) or 1)
+        new_count = int(header.group(4) or 1)
+        old, new = [], []
+        targets = ()
+        while i < len(lines) and (
+            len(old) < old_count or len(new) < new_count or lines[i].startswith(b"\\")
+        ):
+            line = lines[i]
+            i += 1
+            marker, text = line[:1], line[1:]
+            if marker == b"\\":
+                # "\ No newline at end of file" applies to the previous line.
+                for block in targets:
+                    block[-1] = block[-1].rstrip(b"\n")
+                continue
+            if marker == b"\n":
+                # An empty context line whose leading space was stripped.
+                marker, text = b" ", b"\n"
+            elif not text.endswith(b"\n"):
+                text += b"\n"
+            if marker == b" ":
+                targets = (old, new)
+            elif marker == b"-":
+                targets = (old,)
+            elif marker == b"+":
+                targets = (new,)
+            else:
+                raise EditError(f"Malformed hunk line: {line!r}")
+            for block in targets:
+                block.append(text)
+        if len(old) != old_count or len(new) != new_count:
+            raise EditError(f"Hunk at line {old_start} is truncated.")
+        # A hunk that only inserts names the line it inserts after.
+        line_number = old_start + 1 if old_count == 0 else old_start
+        replacements.append(
+            Replacement(b"".join(old), b"".join(new), line=max(line_number, 1))
+        )
+    if not replacements:
+        raise EditError("The diff contains no hunks.")
+    return replacements
+
+
+def _line_offset(buffer, line: int) -> Optional[int]:
+    offset = 0
+    for _ in range(line - 1):
+        newline = buffer.find(b"\n", offset)
+        if newline == -1:
+            return None
+        offset = newline + 1
+    return offset
+
+
+def _find_unique(buffer, needle: bytes, index: int) -> int:
+    start = buffer.find(needle)
+    if start == -1:
+        raise EditError(f"Edit {index}: the old text was not found.")
+    if buffer.find(needle, start + 1) != -1:
+        raise EditError(
+            f"Edit {index}: the old text occurs more than once; include more context."
+        )
+    return start
+
+
+def locate(
+    buffer,
+    replacements: Sequence[Replacement],
+    line_offset: Optional[Callable[[int], Optional[int]]] = None,
+) -> List[Span]:
+    """
+    Find where every replacement applies and return the spans in file order.
+
+    Plain replacements must match exactly once. Diff hunks are tried at the
+    line they name first and anywhere else in the file if that is unique.
+    `line_offset` maps a 1-based line number to its byte offset; by default
+    the buffer is scanned from the start.
+    """
+    line_offset = line_offset or (lambda line: _line_offset(buffer, line))
+    spans = []
+    for index, replacement in enumerate(replacements):
+        start = None
+        if replacement.line is not None:
+            offset = line_offset(replacement.line)
+            end = None if offset is None else offset + len(replacement.old)
+            if offset is not None and buffer[offset:end] == replacement.old:
+                start = offset
+            elif not replacement.old:
+                raise EditError(
+                    f"Hunk {index}: line {replacement.line} is past the end."
+                )
+        if start is None:
+            start = _find_unique(buffer, replacement.old, index)
+        spans.append(Span(start, start + len(replacement.old), replacement.new))
+
+    spans.sort()
+    for previous, current in zip(spans, spans[1:]):
+        if current.start < previous.end:
+            raise EditError("Edits overlap.")
+    return spans
+
+
+def _copy_range(source_fd: int, target: BinaryIO, start: int, end: int) -> None:
+    if start >= end:
+        return
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        target.flush()
+        target_fd = target.fileno()
+        try:
+            while start < end:
+                copied = copy_file_range(
+                    source_fd, target_fd, end - start, start, target.tell()
+                )
+                if copied == 0:
+                    break
+                start += copied
+                target.seek(copied, os.SEEK_CUR)
+        except OSError:
+            # Not supported across these filesystems; fall back to read/write.
+            pass
+    while start < end:
+        chunk = os.pread(source_fd, min(_COPY_CHUNK_SIZE, end - start), start)
+        if not chunk:
+            raise EditError("The file shrank while it was being edited.")
+        target.write(chunk)
+        start += len(chunk)
+
+
+def write_edited(
+    source_fd: int, size: int, spans: Sequence[Span], target: BinaryIO
+) -> int:
+    """Write the source with `spans` applied to `target`; return the bytes written."""
+    position = 0
+    for span in spans:
+        _copy_range(source_fd, target, position, span.start)
+        target.write(span.new)
+        position = span.end
+    _copy_range(source_fd, target, position, size)
+    target.flush()
+    return size + sum(len(span.new) - (span.end - span.start) for span in spans)
+
+
+def map_file(file) -> "mmap.mmap | bytes":
+    """Map an open file read-only; empty files, which cannot be mapped, give b""."""
+    if os.fstat(file.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,299 @@
+"""
+Precompiled ignore rules shared by every directory walk.
+
+Two layers decide whether an entry is skipped:
+
+* The global patterns of GREP_IGNORE_DIRS, applied to the names of both
+  directories and files. Plain names are looked up in a set and the glob
+  patterns are folded into one regular expression.
+* `.gitignore` files found along the walk, with the usual semantics: rules
+  apply to the directory holding the file and everything below it, later
+  rules win, `!` re-includes, a trailing `/` matches directories only and a
+  pattern containing a `/` is anchored to the directory of the `.gitignore`.
+
+Ignored directories are pruned, so the walk never descends into them.
+"""
+
+import fnmatch
+import functools
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mcp_fs.config.constants.grep_ignore_dirs import GREP_IGNORE_DIRS
+
+
+GITIGNORE_FILE = ".gitignore"
+
+_GLOB_CHARACTERS = frozenset("*?[")
+
+
+class IgnoreMatcher:
+    """Matches entry names against a fixed list of names and glob patterns."""
+
+    def __init__(self, patterns: Iterable[str] = GREP_IGNORE_DIRS):
+        patterns = list(dict.fromkeys(patterns))
+        self.names = frozenset(p for p in patterns if not _GLOB_CHARACTERS & set(p))
+        globs = [p for p in patterns if _GLOB_CHARACTERS & set(p)]
+        self.glob = (
+            re.compile("|".join(fnmatch.translate(p) for p in globs)) if globs else None
+        )
+
+    def ignores_name(self, name: str) -> bool:
+        return name in self.names or (
+            self.glob is not None and self.glob.match(name) is not None
+        )
+
+
+def _translate_gitignore(pattern: str) -> str:
+    """Translate one `.gitignore` glob into a regex over `/`-separated relative paths."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif char == "*":
+            out.append("[^/]*")
+            i += 1
+        elif char == "?":
+            out.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append("\\[")
+                i += 1
+                continue
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif char == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
+
+
+class GitignoreRules:
+    """The compiled rules of one `.gitignore` file."""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base
+        # (regex, negated, directories only), in file order
+        self.rules: List[Tuple["re.Pattern[str]", bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated or line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate_gitignore(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex + r"\Z"), negated, dir_only))
+        self._any = re.compile(
+            "|".join(f"(?:{regex.pattern})" for regex, _, _ in self.rules)
+        )
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Return True if `path` is ignored, False if re-included, None if no rule applies."""
+        rel_path = path[len(self.base) + 1 :].replace(os.sep, "/")
+        # Most paths match no rule at all; one combined regex rules them out.
+        if self._any.match(rel_path) is None:
+            return None
+        for regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negated
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _load_gitignore(path: str, mtime_ns: int, size: int) -> Optional[GitignoreRules]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            rules = GitignoreRules(os.path.dirname(path), file)
+    except OSError:
+        return None
+    return rules if rules.rules else None
+
+
+def _gitignore_rules(dir_path: str) -> Optional[GitignoreRules]:
+    path = os.path.join(dir_path, GITIGNORE_FILE)
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return _load_gitignore(path, file_stat.st_mtime_ns, file_stat.st_size)
+
+
+class IgnoreScope:
+    """
+    The ignore rules in effect inside one directory.
+
+    Scopes are immutable; `enter` returns the scope of a subdirectory with
+    that directory's `.gitignore` appended.
+    """
+
+    __slots__ = ("matcher", "gitignores", "use_gitignore")
+
+    def __init__(
+        self,
+        matcher: Optional[IgnoreMatcher] = None,
+        gitignores: Tuple[GitignoreRules, ...] = (),
+        use_gitignore: bool = True,
+    ):
+        self.matcher = matcher or default_matcher()
+        self.gitignores = gitignores
+        self.use_gitignore = use_gitignore
+
+    def enter(self, dir_path: str) -> "IgnoreScope":
+        if not self.use_gitignore:
+            return self
+        rules = _gitignore_rules(dir_path)
+        if rules is None:
+            return self
+        return IgnoreScope(self.matcher, self.gitignores + (rules,), True)
+
+    def ignores(self, path: str, name: str, is_dir: bool) -> bool:
+        if self.matcher.ignores_name(name):
+            return True
+        for rules in reversed(self.gitignores):
+            decision = rules.match(path, is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def default_matcher() -> IgnoreMatcher:
+    """Return the matcher for GREP_IGNORE_DIRS, compiled once per process."""
+    return IgnoreMatcher(GREP_IGNORE_DIRS)
+
+
+def is_ignored_name(name: str) -> bool:
+    """Match a file or directory name against GREP_IGNORE_DIRS."""
+    return default_matcher().ignores_name(name)
+
+
+def _repository_root(path: str) -> Optional[str]:
+    current = path
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def scope_for(dir_path: str, use_gitignore: bool = True) -> IgnoreScope:
+    """
+    Return the scope in effect inside `dir_path`.
+
+    Inside a git repository, the `.gitignore` files from the repository root
+    down to `dir_path` are applied, so searching a subdirectory honours the
+    rules of its parents.
+    """
+    scope = IgnoreScope(use_gitignore=use_gitignore)
+    if not use_gitignore:
+        return scope
+    dir_path = os.path.abspath(dir_path)
+    top = _repository_root(dir_path) or dir_path
+    scope = scope.enter(top)
+    if top != dir_path:
+        current = top
+        for part in os.path.relpath(dir_path, top).split(os.sep):
+            current = os.path.join(current, part)
+            scope = scope.enter(current)
+    return scope
+
+
+class WalkFilter:
+    """
+    Tells whether `walk(top)` reaches a path, for paths found some other way.
+
+    The scope of every directory looked at is kept, so checking many paths
+    of the same directories costs one lookup each.
+    """
+
+    def __init__(self, top: str, scope: Optional[IgnoreScope] = None):
+        self.top = top
+        self._scopes: Dict[str, Optional[IgnoreScope]] = {top: scope or scope_for(top)}
+
+    def scope(self, dir_path: str) -> Optional[IgnoreScope]:
+        """Return the scope inside `dir_path`, or None if the walk does not enter it."""
+        if dir_path in self._scopes:
+            return self._scopes[dir_path]
+        parent, name = os.path.split(dir_path)
+        if not name or not dir_path.startswith(self.top + os.sep):
+            return None
+        parent_scope = self.scope(parent)
+        scope = None
+        if (
+            parent_scope is not None
+            and not os.path.islink(dir_path)
+            and not parent_scope.ignores(dir_path, name, True)
+        ):
+            scope = parent_scope.enter(dir_path)
+        self._scopes[dir_path] = scope
+        return scope
+
+    def reaches(self, path: str, is_dir: bool = False) -> bool:
+        parent, name = os.path.split(path)
+        scope = self.scope(parent)
+        return scope is not None and not scope.ignores(path, name, is_dir)
+
+
+def walk(
+    top: str, scope: Optional[IgnoreScope] = None
+) -> Iterator[Tuple[str, List[os.DirEntry], List[os.DirEntry]]]:
+    """
+    Walk the tree below `top`, like `os.walk`, skipping ignored entries.
+
+    Yields (directory path, directory entries, other entries) with `os.DirEntry`
+    objects so callers can reuse their cached type and stat information.
+    Symlinked directories are listed but not descended into. Directories may
+    be removed from the yielded list to prune them.
+    """
+    stack = [(top, scope or scope_for(top))]
+    while stack:
+        dir_path, dir_scope = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+        dirs, others = [], []
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if dir_scope.ignores(entry.path, entry.name, is_dir):
+                    continue
+                (dirs if is_dir else others).append(entry)
+        yield dir_path, dirs, others
+        for entry in reversed(dirs):
+            if not entry.is_symlink():
+                stack.append((entry.path, dir_scope.enter(entry.path)))
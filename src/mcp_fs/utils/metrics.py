@@ -0,0 +1,242 @@
+"""
+Per-tool latency and I/O metrics.
+
+`ToolMetrics.instrument` wraps a tool so every call records its latency in a
+fixed-bucket histogram and counts errors. While a call runs, code anywhere
+below it can attribute work to it with `record`, e.g. bytes read or files
+scanned; the counters of the current call travel in a context variable,
+which `ToolRunner` carries into its worker threads. Outside a tool call
+`record` does nothing.
+
+Calls are recorded on the event loop thread that awaits them, so the
+aggregates need no lock; a call costs two clock reads, a context variable
+set and reset, a bisect and a few dictionary updates.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+BYTES_READ = "bytes_read"
+BYTES_WRITTEN = "bytes_written"
+FILES_SCANNED = "files_scanned"
+CACHE_HITS = "cache_hits"
+CACHE_MISSES = "cache_misses"
+COUNTERS = (BYTES_READ, BYTES_WRITTEN, FILES_SCANNED, CACHE_HITS, CACHE_MISSES)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_call: contextvars.ContextVar[
+    Optional[Dict[str, int]]
+] = contextvars.ContextVar("mcp_fs_tool_call", default=None)
+
+
+def record(counter: str, amount: int = 1) -> None:
+    """Add `amount` to `counter` of the tool call in progress, if any."""
+    counters = _current_call.get()
+    if counters is not None:
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+class _ToolStats:
+    __slots__ = ("buckets", "count", "errors", "seconds", "counters")
+
+    def __init__(self):
+        # one count per bucket of LATENCY_BUCKETS, plus one for slower calls
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.counters: Dict[str, int] = {}
+
+    def add(self, seconds: float, failed: bool, counters: Dict[str, int]) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.seconds += seconds
+        if failed:
+            self.errors += 1
+        for name, amount in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the `q` quantile as the upper bound of the bucket holding it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class ToolMetrics:
+    """Latency histograms, error counts and I/O counters of every instrumented tool."""
+
+    def __init__(self):
+        self._tools: Dict[str, _ToolStats] = {}
+
+    def instrument(
+        self, tool_name: str, func: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        """Wrap the tool `func`, a coroutine function or a plain function, to record its calls."""
+        stats = self._tools.setdefault(tool_name, _ToolStats())
+        clock = time.perf_counter
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def instrumented(*args, **kwargs):
+                counters: Dict[str, int] = {}
+                token = _current_call.set(counters)
+                failed = True
+                start = clock()
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    stats.add(clock() - start, failed, counters)
+                    _current_call.reset(token)
+
+        else:
+
+            @functools.wraps(func)
+            def instrumented(*args, **kwargs):
+                counters: Dict[str, int] = {}
+                token = _current_call.set(counters)
+                failed = True
+                start = clock()
+                try:
+                    result = func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    stats.add(clock() - start, failed, counters)
+                    _current_call.reset(token)
+
+        return instrumented
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return the metrics of every tool as plain data."""
+        snapshot = {}
+        for tool_name, stats in sorted(self._tools.items()):
+            snapshot[tool_name] = {
+                "calls": stats.count,
+                "errors": stats.errors,
+                "seconds_total": stats.seconds,
+                "seconds_mean": stats.seconds / stats.count if stats.count else None,
+                "seconds_p50": stats.quantile(0.5),
+                "seconds_p90": stats.quantile(0.9),
+                "seconds_p99": stats.quantile(0.99),
+                "latency_buckets": {
+                    str(bound): count
+                    for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], stats.buckets)
+                },
+                **stats.counters,
+            }
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        tools = sorted(self._tools.items())
+        lines = [
+            "# HELP mcp_fs_tool_call_seconds Latency of tool calls.",
+            "# TYPE mcp_fs_tool_call_seconds histogram",
+        ]
+        for tool_name, stats in tools:
+            cumulative = 0
+            for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], stats.buckets):
+                cumulative += count
+                lines.append(
+                    f'mcp_fs_tool_call_seconds_bucket{{tool="{tool_name}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'mcp_fs_tool_call_seconds_sum{{tool="{tool_name}"}} {stats.seconds}'
+            )
+            lines.append(
+                f'mcp_fs_tool_call_seconds_count{{tool="{tool_name}"}} {stats.count}'
+            )
+
+        lines.append("# HELP mcp_fs_tool_errors_total Tool calls that raised.")
+        lines.append("# TYPE mcp_fs_tool_errors_total counter")
+        for tool_name, stats in tools:
+            lines.append(
+                f'mcp_fs_tool_errors_total{{tool="{tool_name}"}} {stats.errors}'
+            )
+
+        for counter in COUNTERS:
+            metric = f"mcp_fs_tool_{counter}_total"
+            lines.append(
+                f"# HELP {metric} {counter.replace('_', ' ').capitalize()} by tool calls."
+            )
+            lines.append(f"# TYPE {metric} counter")
+            for tool_name, stats in tools:
+                lines.append(
+                    f'{metric}{{tool="{tool_name}"}} {stats.counters.get(counter, 0)}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(
+    metrics: ToolMetrics, host: str, port: int
+) -> "ThreadingHTTPServer":
+    """Serve `metrics` as Prometheus text at `/metrics` from a daemon thread."""
+    # http.server pulls in email and ssl; only load it when metrics are served.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"Metrics request: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="mcp-fs-metrics", daemon=True
+    )
+    thread.start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
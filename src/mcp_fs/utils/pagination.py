@@ -0,0 +1,138 @@
+import itertools
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional
+
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CURSOR_TTL = 300.0
+DEFAULT_MAX_CURSORS = 256
+
+_END = object()
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that is unknown, expired or used with another request."""
+
+
+def check_limit(limit: Optional[int]) -> Optional[int]:
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1.")
+    return limit
+
+
+class _Walk:
+    """A partially consumed result iterator plus the request it belongs to."""
+
+    def __init__(self, request_key: Hashable, iterator: Iterator[Any]):
+        self.request_key = request_key
+        self.iterator = iterator
+        self.peeked: List[Any] = []
+        self.last_used = time.monotonic()
+
+    def take(self, limit: int) -> List[Any]:
+        items = self.peeked[:limit]
+        self.peeked = self.peeked[limit:]
+        items.extend(itertools.islice(self.iterator, limit - len(items)))
+        return items
+
+    def has_more(self) -> bool:
+        if not self.peeked:
+            item = next(self.iterator, _END)
+            if item is _END:
+                return False
+            self.peeked.append(item)
+        return True
+
+    def close(self) -> None:
+        close = getattr(self.iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class CursorStore:
+    """
+    Keeps the state of paginated walks between tool calls.
+
+    A page hands back an opaque cursor for the rest of the walk. The walk is
+    resumed where it stopped instead of being redone, and walks that are not
+    resumed within `ttl` seconds, or that are the least recently used once
+    `max_entries` walks are open, are closed and dropped.
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_CURSOR_TTL, max_entries: int = DEFAULT_MAX_CURSORS
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._walks: OrderedDict[str, _Walk] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> List[_Walk]:
+        evicted = []
+        while self._walks:
+            cursor, walk = next(iter(self._walks.items()))
+            if now - walk.last_used < self.ttl and len(self._walks) <= self.max_entries:
+                break
+            del self._walks[cursor]
+            evicted.append(walk)
+        return evicted
+
+    def _take(self, cursor: str, request_key: Hashable) -> _Walk:
+        with self._lock:
+            evicted = self._evict(time.monotonic())
+            walk = self._walks.pop(cursor, None)
+        for stale in evicted:
+            stale.close()
+        if walk is None:
+            raise InvalidCursorError(f"Unknown or expired cursor: {cursor}")
+        if walk.request_key != request_key:
+            walk.close()
+            raise InvalidCursorError("Cursor does not belong to this request.")
+        return walk
+
+    def _put(self, walk: _Walk) -> str:
+        cursor = secrets.token_urlsafe(16)
+        walk.last_used = time.monotonic()
+        with self._lock:
+            self._walks[cursor] = walk
+            evicted = self._evict(walk.last_used)
+        for stale in evicted:
+            stale.close()
+        return cursor
+
+    def page(
+        self,
+        request_key: Hashable,
+        start: Callable[[], Iterable[Any]],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Return the next page of a walk.
+
+        Without a cursor a new walk is started by calling `start`. The page is
+        a dictionary with the `results`, the `next_cursor` to pass back for the
+        following page (None once the walk is exhausted) and whether the
+        results were `truncated`.
+        """
+        limit = DEFAULT_PAGE_SIZE if check_limit(limit) is None else limit
+
+        if cursor is None:
+            walk = _Walk(request_key, iter(start()))
+        else:
+            walk = self._take(cursor, request_key)
+
+        results = walk.take(limit)
+        next_cursor = None
+        if walk.has_more():
+            next_cursor = self._put(walk)
+        else:
+            walk.close()
+        return {
+            "results": results,
+            "next_cursor": next_cursor,
+            "truncated": next_cursor is not None,
+        }
@@ -1,6 +1,9 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
 
 
 def expand_path(path: str | Path) -> Path:
@@ -32,3 +35,79 @@ def validate_path(path: str | Path, allowed_dirs: List[Path]) -> Path:
             f"Path {resolved_path} is not allowed. Allowed directories are: {allowed_dirs}"
         )
     return resolved_path
+
+
+class AllowedRoots:
+    """
+    The allowed directories, resolved once and shared by every service.
+
+    Membership checks compare plain strings against precomputed root prefixes
+    instead of resolving every allowed directory again. Resolved input paths
+    are kept in a bounded LRU cache; entries expire after `cache_ttl` seconds
+    so a symlink that is later swapped to point elsewhere is picked up.
+    """
+
+    def __init__(
+        self,
+        allowed_dirs: List[Path],
+        cache_size: int = 4096,
+        cache_ttl: float = 2.0,
+    ):
+        self.allowed_dirs = list(allowed_dirs)
+        # Innermost roots first so `root_for` finds the closest match.
+        self.roots: Tuple[Path, ...] = tuple(
+            sorted(
+                {expand_path(dir_path) for dir_path in self.allowed_dirs},
+                key=lambda root: len(root.parts),
+                reverse=True,
+            )
+        )
+        self._root_strs = tuple(str(root) for root in self.roots)
+        self._prefixes = tuple(
+            root if root.endswith(os.sep) else root + os.sep for root in self._root_strs
+        )
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: OrderedDict[str, Tuple[Path, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, path: str | Path) -> Path:
+        """Expand and resolve `path`, using the cache when possible."""
+        key = str(path)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[1] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                return cached[0]
+
+        resolved_path = expand_path(key)
+        with self._lock:
+            self._cache[key] = (resolved_path, now)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return resolved_path
+
+    def contains(self, resolved_path: str | Path) -> bool:
+        """Check whether an already resolved path lies inside one of the roots."""
+        path_str = str(resolved_path)
+        return path_str in self._root_strs or path_str.startswith(self._prefixes)
+
+    def root_for(self, resolved_path: str | Path) -> Optional[Path]:
+        """Return the innermost root containing an already resolved path."""
+        path_str = str(resolved_path)
+        for root, root_str, prefix in zip(self.roots, self._root_strs, self._prefixes):
+            if path_str == root_str or path_str.startswith(prefix):
+                return root
+        return None
+
+    def validate(self, path: str | Path) -> Path:
+        """Resolve `path` and make sure it is allowed, like `validate_path`."""
+        resolved_path = self.resolve(path)
+
+        if not self.contains(resolved_path):
+            raise ValueError(
+                f"Path {resolved_path} is not allowed. Allowed directories are: {self.allowed_dirs}"
+            )
+        return resolved_path
@@ -0,0 +1,107 @@
+"""
+cProfile profiling of the next calls of chosen tools.
+
+A `ToolProfiler` holds a budget of calls per tool name, e.g. from
+`--profile-tool search_file_bodies_for_substring=5`. Until a tool's budget
+is spent, each of its calls runs under cProfile in its worker thread; the
+stats are dumped to `<tool>-<timestamp>-<n>.prof` in the output directory,
+readable with `pstats` or snakeviz, and the most expensive functions are
+logged.
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_TOOLS_ENV = "MCP_FS_PROFILE_TOOLS"
+PROFILE_DIR_ENV = "MCP_FS_PROFILE_DIR"
+DEFAULT_PROFILE_CALLS = 1
+LOGGED_FUNCTIONS = 15
+
+
+def default_profile_dir() -> Path:
+    path = os.environ.get(PROFILE_DIR_ENV)
+    if path:
+        return Path(path).expanduser()
+    return Path.home() / ".cache" / "mcp_fs" / "profiles"
+
+
+def parse_profile_specs(specs: Iterable[str]) -> Dict[str, int]:
+    """Parse `TOOL=N` specs, with N defaulting to one call, into call budgets."""
+    budgets = {}
+    for spec in specs:
+        tool_name, _, calls = spec.partition("=")
+        if not tool_name:
+            raise ValueError(f"Invalid tool profile spec: {spec!r}")
+        try:
+            budgets[tool_name] = int(calls) if calls else DEFAULT_PROFILE_CALLS
+        except ValueError:
+            raise ValueError(f"Invalid call count in tool profile spec: {spec!r}")
+    return budgets
+
+
+def default_profile_specs() -> list:
+    """Return the `TOOL=N` specs in `MCP_FS_PROFILE_TOOLS`, separated by commas."""
+    value = os.environ.get(PROFILE_TOOLS_ENV, "")
+    return [spec.strip() for spec in value.split(",") if spec.strip()]
+
+
+class ToolProfiler:
+    """Profiles the next calls of chosen tools with cProfile and dumps the stats."""
+
+    def __init__(self, budgets: Dict[str, int], output_dir: Optional[Path] = None):
+        self.budgets = {name: calls for name, calls in budgets.items() if calls > 0}
+        self.output_dir = output_dir or default_profile_dir()
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def wants(self, tool_name: str) -> bool:
+        """Claim one of the calls left to profile for `tool_name`, if any."""
+        with self._lock:
+            calls = self.budgets.get(tool_name)
+            if not calls:
+                return False
+            self.budgets[tool_name] = calls - 1
+            return True
+
+    def run(self, tool_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `func` under cProfile and dump the stats, whether or not it raises."""
+        import cProfile
+
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            self._dump(tool_name, sequence, profile)
+
+    def _dump(self, tool_name: str, sequence: int, profile: "cProfile.Profile") -> None:
+        import pstats
+
+        path = self.output_dir / (
+            f"{tool_name}-{time.strftime('%Y%m%dT%H%M%S')}-{sequence}.prof"
+        )
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not write profile of {tool_name} to {path}: {e}")
+            return
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(LOGGED_FUNCTIONS)
+        logger.info(f"Profile of {tool_name} written to {path}\n{summary.getvalue()}")
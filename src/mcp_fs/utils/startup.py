@@ -0,0 +1,136 @@
+"""
+Import timing of server startup, for `--startup-profile`.
+
+`profile_imports` puts an `ImportProfiler` at the front of `sys.meta_path`.
+It lets the other finders locate each module and times the loader's
+`create_module` and `exec_module` calls, so, like `python -X importtime`, it
+knows how long every module took to load, with and without the modules it
+imported in turn. `report` logs the slowest modules and the time spent per
+top-level package, then removes the profiler. Both do nothing unless
+profiling was started.
+
+Only imports made by the thread that started profiling are timed. Built-in
+and frozen modules, whose loaders are shared classes, are counted in the
+time of the module importing them.
+"""
+
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+REPORTED_MODULES = 25
+REPORTED_PACKAGES = 10
+
+
+class ImportProfiler:
+    """A `sys.meta_path` finder timing how long each module imported after it takes to load."""
+
+    def __init__(self):
+        self.started = time.perf_counter_ns()
+        # module name -> [cumulative, self] nanoseconds
+        self.times: Dict[str, List[int]] = {}
+        # Time spent loading nested imports, per module being loaded.
+        self._nested: List[int] = []
+        self._thread = threading.get_ident()
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        if threading.get_ident() != self._thread:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None:
+                    self._instrument(spec.loader)
+                return spec
+        return None
+
+    def _instrument(self, loader: Any) -> None:
+        """Time the loader's calls, once per loader instance."""
+        attributes = getattr(loader, "__dict__", None)
+        # Loader classes serve many modules, and slotted loaders cannot be patched.
+        if (
+            isinstance(loader, type)
+            or attributes is None
+            or "exec_module" in attributes
+        ):
+            return
+        exec_module = loader.exec_module
+        loader.exec_module = lambda module: self._timed(
+            module.__name__, exec_module, module
+        )
+        create_module = getattr(loader, "create_module", None)
+        if create_module is not None:
+            loader.create_module = lambda spec: self._timed(
+                spec.name, create_module, spec
+            )
+
+    def _timed(self, name: str, call, argument):
+        if threading.get_ident() != self._thread:
+            return call(argument)
+        self._nested.append(0)
+        start = time.perf_counter_ns()
+        try:
+            return call(argument)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            times = self.times.setdefault(name, [0, 0])
+            times[0] += elapsed
+            times[1] += elapsed - nested
+
+    def slowest(self, count: int = REPORTED_MODULES) -> List[Tuple[str, int, int]]:
+        """Return (module, cumulative ns, self ns) of the `count` slowest modules."""
+        ranked = sorted(self.times.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, total, own) for name, (total, own) in ranked[:count]]
+
+    def by_package(self, count: int = REPORTED_PACKAGES) -> List[Tuple[str, int]]:
+        """Return (top-level package, self ns summed over its modules) of the `count` costliest."""
+        packages: Dict[str, int] = {}
+        for name, (_, own) in self.times.items():
+            package = name.partition(".")[0]
+            packages[package] = packages.get(package, 0) + own
+        return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+_profiler: Optional[ImportProfiler] = None
+
+
+def profile_imports() -> None:
+    """Start timing the imports made from now on."""
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+
+
+def report(stage: str = "Server built") -> None:
+    """Log the slowest imports since `profile_imports` and stop profiling."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return
+    sys.meta_path.remove(profiler)
+
+    elapsed = (time.perf_counter_ns() - profiler.started) / 1e6
+    imported = sum(own for _, own in profiler.times.values()) / 1e6
+    lines = [
+        f"{stage} {elapsed:.1f} ms after profiling started; "
+        f"{len(profiler.times)} modules took {imported:.1f} ms to import.",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    for name, total, own in profiler.slowest():
+        lines.append(f"{total / 1e6:14.1f} {own / 1e6:9.1f}  {name}")
+    lines.append(f"{'self ms':>14}  package")
+    for package, own in profiler.by_package():
+        lines.append(f"{own / 1e6:14.1f}  {package}")
+    logger.info("Startup profile:\n" + "\n".join(lines))
@@ -0,0 +1,341 @@
+"""
+Tool registration from a precomputed manifest.
+
+Registering a tool means reading its name and description from its YAML-ish
+docstring and building a pydantic model of its signature, whose JSON schema
+describes the tool's arguments; done for every tool on every start, that is
+most of the time a short-lived stdio server spends before it can answer.
+The manifest records the name, description and argument schema of every tool
+of the server's services. It is keyed on a hash of the sources of
+`mcp_fs.tools` (and of any other module defining a service), of this module,
+of every tool's default values and of the pydantic and mcp versions, so any
+edit to a tool or upgrade makes it stale.
+It is built on the first start after a change, or ahead of time with
+`python -m mcp_fs.utils.tool_manifest`, and stored under
+`~/.cache/mcp_fs/manifests` (override with `MCP_FS_MANIFEST_DIR`).
+
+`register` adds the tools to the server's FastMCP tool manager straight from
+the manifest, and each tool's argument model is only built when the tool is
+first called. A server not running on FastMCP, or on a FastMCP whose `Tool`
+has other fields than the ones filled in here, registers its tools as usual.
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from types import CodeType
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_DIR_ENV = "MCP_FS_MANIFEST_DIR"
+# Bump when the format of the manifest changes.
+MANIFEST_VERSION = 1
+
+_TOOLS_PACKAGE = Path(__file__).resolve().parent.parent / "tools"
+_KEY = re.compile(r"^(\w+):\s*(.*)$")
+# The fields of FastMCP's `Tool` that `register` fills in.
+_TOOL_FIELDS = frozenset(
+    {
+        "fn",
+        "name",
+        "description",
+        "parameters",
+        "fn_metadata",
+        "is_async",
+        "context_kwarg",
+        "annotations",
+    }
+)
+
+
+def default_manifest_dir() -> Path:
+    path = os.environ.get(MANIFEST_DIR_ENV)
+    if path:
+        return Path(path).expanduser()
+    return Path.home() / ".cache" / "mcp_fs" / "manifests"
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_marker() -> Tuple[FrozenSet[str], Optional[CodeType]]:
+    """
+    Return what `mcp_tool` leaves on the functions it decorates.
+
+    That is the attributes it sets on them, and the code of the wrapper it
+    returns if it returns one, found by decorating a probe function.
+    """
+    from easy_mcp.registration.tools import mcp_tool
+
+    def probe():
+        pass
+
+    marked = mcp_tool(probe)
+    attributes = frozenset(vars(marked)) - {"__wrapped__"}
+    code = getattr(marked, "__code__", None)
+    return attributes, None if code is probe.__code__ else code
+
+
+def is_tool(func: Any) -> bool:
+    """Return whether `func` was decorated with `mcp_tool`."""
+    attributes, code = _tool_marker()
+    if attributes:
+        return not attributes.isdisjoint(getattr(func, "__dict__", ()))
+    if code is not None:
+        return getattr(func, "__code__", None) is code
+    # `mcp_tool` leaves no trace to tell its functions apart, so every public one counts.
+    return not func.__name__.startswith("_")
+
+
+def tool_methods(cls: type) -> List[str]:
+    """Return the names of the tool methods of a service class: those decorated with `mcp_tool`."""
+    return [
+        name
+        for name, func in inspect.getmembers(cls, inspect.isfunction)
+        if not name.startswith("_") and is_tool(func)
+    ]
+
+
+def _fold(lines: List[str]) -> str:
+    """Join lines like a YAML folded block: paragraphs become lines, blank lines separate them."""
+    paragraphs: List[List[str]] = [[]]
+    for line in lines:
+        if line:
+            paragraphs[-1].append(line)
+        elif paragraphs[-1]:
+            paragraphs.append([])
+    return "\n".join(" ".join(paragraph) for paragraph in paragraphs if paragraph)
+
+
+def parse_docstring(doc: Optional[str]) -> Dict[str, str]:
+    """
+    Return the top-level `key: value` fields of a tool's YAML-ish docstring.
+
+    A value of `>` folds the indented lines below it into one line per
+    paragraph, `|` keeps them as they are, and any other value is continued
+    by them.
+    """
+    lines = inspect.cleandoc(doc or "").splitlines()
+    fields = {}
+    i = 0
+    while i < len(lines):
+        match = _KEY.match(lines[i])
+        i += 1
+        if not match:
+            continue
+        key, value = match.groups()
+        block = []
+        while i < len(lines) and (not lines[i].strip() or lines[i][0].isspace()):
+            block.append(lines[i].strip())
+            i += 1
+
+        if value in (">", ">-"):
+            value = _fold(block)
+        elif value in ("|", "|-"):
+            value = "\n".join(block).strip()
+        else:
+            value = " ".join([value, *block]).strip()
+        fields[key] = value
+    return fields
+
+
+def source_hash(classes: Iterable[type]) -> str:
+    """Hash the sources defining the tools of `classes`, and their default values."""
+    classes = sorted(classes, key=lambda cls: (cls.__module__, cls.__qualname__))
+    sources = set(_TOOLS_PACKAGE.glob("*.py"))
+    sources.add(Path(__file__).resolve())
+    sources.update(Path(inspect.getfile(cls)).resolve() for cls in classes)
+
+    # The argument schemas are built by mcp with pydantic, so they depend on both versions.
+    from importlib.metadata import version
+
+    from pydantic.version import VERSION as pydantic_version
+
+    digest = hashlib.sha256(
+        f"{MANIFEST_VERSION} {pydantic_version} {version('mcp')}".encode("ascii")
+    )
+    for path in sorted(sources):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    # Defaults may be constants imported from modules outside the hashed sources.
+    for cls in classes:
+        for name in tool_methods(cls):
+            func = inspect.unwrap(getattr(cls, name))
+            digest.update(
+                repr(
+                    (cls.__qualname__, name, func.__defaults__, func.__kwdefaults__)
+                ).encode("utf-8")
+            )
+    return digest.hexdigest()[:16]
+
+
+def build(classes: Iterable[type]) -> Dict[str, Dict[str, Any]]:
+    """Return the name, description and argument schema of every tool of `classes`, by `Class.method`."""
+    from mcp.server.fastmcp.utilities.func_metadata import func_metadata
+
+    tools = {}
+    for cls in classes:
+        for method in tool_methods(cls):
+            func = getattr(cls, method)
+            fields = parse_docstring(func.__doc__)
+            arguments = func_metadata(func, skip_names=["self"]).arg_model
+            tools[f"{cls.__qualname__}.{method}"] = {
+                "name": fields.get("name") or method,
+                "description": fields.get("description")
+                or inspect.cleandoc(func.__doc__ or ""),
+                "parameters": arguments.model_json_schema(),
+            }
+    return tools
+
+
+def manifest_path(classes: Iterable[type], manifest_dir: Optional[Path] = None) -> Path:
+    manifest_dir = manifest_dir or default_manifest_dir()
+    return manifest_dir / f"tools-{source_hash(classes)}.json"
+
+
+def write(path: Path, tools: Dict[str, Dict[str, Any]]) -> None:
+    """Write a manifest atomically, so concurrently starting servers never read half of one."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(tools, file)
+    os.replace(temp_path, path)
+
+
+def load(
+    classes: List[type], manifest_dir: Optional[Path] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Return the manifest of the tools of `classes`, building and caching it if it is stale."""
+    path = manifest_path(classes, manifest_dir)
+    try:
+        with open(path, encoding="utf-8") as file:
+            tools = json.load(file)
+    except (OSError, ValueError):
+        tools = {}
+    if all(
+        f"{cls.__qualname__}.{method}" in tools
+        for cls in classes
+        for method in tool_methods(cls)
+    ):
+        return tools
+
+    logger.info(f"Building the tool manifest {path}")
+    tools = build(classes)
+    try:
+        write(path, tools)
+    except OSError as e:
+        logger.warning(f"Could not write the tool manifest to {path}: {e}")
+    return tools
+
+
+@functools.lru_cache(maxsize=None)
+def _manifest_tool_class() -> type:
+    from mcp.server.fastmcp.tools.base import Tool
+    from mcp.server.fastmcp.utilities.func_metadata import func_metadata
+
+    class ManifestTool(Tool):
+        """A FastMCP tool whose argument model is built when it is first needed."""
+
+        def __getattr__(self, name: str) -> Any:
+            if name != "fn_metadata":
+                return super().__getattr__(name)
+            fn_metadata = func_metadata(self.fn)
+            self.__dict__["fn_metadata"] = fn_metadata
+            return fn_metadata
+
+    return ManifestTool
+
+
+def fastmcp_app(server: Any) -> Optional[Any]:
+    """Return the FastMCP server held by `server`, or None if it holds none."""
+    fastmcp = sys.modules.get("mcp.server.fastmcp")
+    if fastmcp is None:
+        return None
+    return next(
+        (
+            value
+            for value in vars(server).values()
+            if isinstance(value, fastmcp.FastMCP)
+        ),
+        None,
+    )
+
+
+def register(
+    server: Any,
+    instances: List[Any],
+    allowed_tools: Optional[List[str]] = None,
+    manifest_dir: Optional[Path] = None,
+) -> bool:
+    """
+    Add the tools of `instances` to the FastMCP server held by `server`, from the manifest.
+
+    Returns False, registering nothing, if `server` holds no FastMCP server.
+    """
+    app = fastmcp_app(server)
+    registered = getattr(getattr(app, "_tool_manager", None), "_tools", None)
+    if not isinstance(registered, dict):
+        return False
+    manifest_tool = _manifest_tool_class()
+    fields = set(manifest_tool.model_fields)
+    if fields != _TOOL_FIELDS:
+        logger.info(
+            f"Registering tools without the manifest: FastMCP's Tool has the fields {sorted(fields)}"
+        )
+        return False
+
+    tools = load([type(instance) for instance in instances], manifest_dir)
+    for instance in instances:
+        cls = type(instance)
+        for method in tool_methods(cls):
+            entry = tools[f"{cls.__qualname__}.{method}"]
+            name = entry["name"]
+            if allowed_tools and name not in allowed_tools:
+                continue
+            if name in registered:
+                logger.warning(f"Tool already exists: {name}")
+                continue
+            fn = getattr(instance, method)
+            registered[name] = manifest_tool.model_construct(
+                fn=fn,
+                name=name,
+                description=entry["description"],
+                parameters=entry["parameters"],
+                is_async=inspect.iscoroutinefunction(fn),
+                context_kwarg=None,
+                annotations=None,
+            )
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the tool manifest before the server's first start."
+    )
+    parser.add_argument(
+        "--manifest-dir",
+        type=Path,
+        help="Directory to write the manifest to. Defaults to ~/.cache/mcp_fs/manifests.",
+    )
+    args = parser.parse_args()
+
+    from mcp_fs.tools.directory_tools import DirectoryService
+    from mcp_fs.tools.file_tools import FileService
+    from mcp_fs.tools.search_tools import SearchService
+
+    classes = [DirectoryService, FileService, SearchService]
+    path = manifest_path(classes, args.manifest_dir)
+    write(path, build(classes))
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
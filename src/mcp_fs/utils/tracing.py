@@ -0,0 +1,224 @@
+"""
+Span tracing in the Chrome trace-event format.
+
+When tracing is started, spans are appended to a local file as complete
+("X") events that chrome://tracing and Perfetto load directly. Each event is
+written with a single `write` to a file opened for appending, so search
+worker processes attached to the same file can add their spans alongside the
+server's. Timestamps come from the monotonic clock, which all processes on a
+machine share. The file is a JSON array that is never closed, which both
+viewers accept.
+
+Stages of a search run interleaved: the walk produces one file, the scan
+reads it, the filter checks the match, and the walk continues. A `Stage`
+adds up the time spent in each of its intervals and is written as one span
+covering that total, starting where the stage was first entered.
+
+With tracing off, `span` and `stage` return shared no-op objects.
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+TRACE_FILE_ENV = "MCP_FS_TRACE_FILE"
+
+
+class Tracer:
+    """Appends trace events to one file."""
+
+    def __init__(
+        self, path: Path, append: bool = False, process_name: str = "mcp-fs server"
+    ):
+        self.path = Path(path)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        if not append:
+            flags |= os.O_TRUNC
+        self._fd = os.open(self.path, flags, 0o644)
+        self._pid = os.getpid()
+        self._named_threads = set()
+        if not append:
+            os.write(self._fd, b"[\n")
+        self._metadata("process_name", {"name": process_name})
+
+    def _metadata(self, name: str, args: Dict[str, Any], tid: int = 0) -> None:
+        event = {"name": name, "ph": "M", "pid": self._pid, "tid": tid, "args": args}
+        os.write(self._fd, (json.dumps(event) + ",\n").encode())
+
+    def emit(
+        self, name: str, start_ns: int, duration_ns: int, args: Dict[str, Any]
+    ) -> None:
+        """Write one complete event; times are monotonic nanoseconds."""
+        tid = threading.get_ident()
+        if tid not in self._named_threads:
+            self._named_threads.add(tid)
+            self._metadata(
+                "thread_name", {"name": threading.current_thread().name}, tid
+            )
+        event = {
+            "name": name,
+            "cat": "mcp_fs",
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": duration_ns / 1000,
+            "pid": self._pid,
+            "tid": tid,
+            "args": args,
+        }
+        os.write(self._fd, (json.dumps(event, default=str) + ",\n").encode())
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def default_trace_file() -> Optional[Path]:
+    path = os.environ.get(TRACE_FILE_ENV)
+    return Path(path).expanduser() if path else None
+
+
+def start(path: Path) -> None:
+    """Start writing spans of this process to a new trace file at `path`."""
+    global _tracer
+    _tracer = Tracer(path)
+    logger.info(f"Writing trace events to {path}")
+
+
+def attach(path: Optional[Path]) -> None:
+    """Add the spans of this process, e.g. a search worker, to the trace file at `path`."""
+    global _tracer
+    if path is not None:
+        _tracer = Tracer(path, append=True, process_name="mcp-fs search worker")
+
+
+def trace_file() -> Optional[Path]:
+    """Return the file spans are written to, or None if tracing is off."""
+    return _tracer.path if _tracer is not None else None
+
+
+@contextlib.contextmanager
+def _span(tracer: Tracer, name: str, args: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    start_ns = time.monotonic_ns()
+    try:
+        yield args
+    finally:
+        tracer.emit(name, start_ns, time.monotonic_ns() - start_ns, args)
+
+
+def span(name: str, **args: Any):
+    """
+    Time the enclosed block as a span named `name`.
+
+    The context manager yields the span's arguments, which the block can add
+    to, e.g. the number of results it produced.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return contextlib.nullcontext({})
+    return _span(tracer, name, args)
+
+
+class Stage:
+    """A span made of the intervals spent in one stage of interleaved work."""
+
+    __slots__ = ("name", "_tracer", "_first_ns", "_entered_ns", "_total_ns", "_count")
+
+    def __init__(self, name: str, tracer: Tracer):
+        self.name = name
+        self._tracer = tracer
+        self._first_ns: Optional[int] = None
+        self._entered_ns = 0
+        self._total_ns = 0
+        self._count = 0
+
+    def __enter__(self) -> "Stage":
+        self._entered_ns = time.monotonic_ns()
+        if self._first_ns is None:
+            self._first_ns = self._entered_ns
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._total_ns += time.monotonic_ns() - self._entered_ns
+        self._count += 1
+
+    def iterate(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Yield from `iterable`, counting the time spent producing each item toward this stage."""
+        iterator = iter(iterable)
+        while True:
+            with self:
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def close(self, **args: Any) -> None:
+        """Write the stage as one span, if it was ever entered."""
+        if self._first_ns is not None:
+            args["intervals"] = self._count
+            self._tracer.emit(self.name, self._first_ns, self._total_ns, args)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def iterate(self, iterable: Iterable[Any]) -> Iterable[Any]:
+        return iterable
+
+    def close(self, **args: Any) -> None:
+        pass
+
+
+_END = object()
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """Return a `Stage` named `name`, or a no-op stand-in with tracing off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_STAGE
+    return Stage(name, tracer)
+
+
+def instrument(tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap the tool `func`, a coroutine function or a plain function, so each call is a span."""
+    span_name = f"tool:{tool_name}"
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def traced(*args, **kwargs):
+            if _tracer is None:
+                return await func(*args, **kwargs)
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+    return traced
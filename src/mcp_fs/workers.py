@@ -0,0 +1,414 @@
+"""
+Multi-worker serving of the SSE transport.
+
+`serve` starts several server processes, each accepting connections on a
+socket the supervising process listens on at a private port of 127.0.0.1,
+and a proxy on the public address that spreads connections over them. As
+the supervisor holds the sockets, no other process can take their ports,
+and a restarted worker takes over its predecessor's port and the
+connections queued while it started.
+
+An SSE session lives in the worker holding its event stream, so the
+proxy learns the id of every session from the endpoint event that opens its
+stream and forwards the messages posted to that session to the same worker;
+new streams go to the worker with the fewest open connections. Each proxied
+request asks for its connection to be closed once answered, so a kept-alive
+client connection never carries one session's message to another's worker.
+
+Workers share the directory listings of the path index through a
+`PathIndexPublisher` in the supervising process, which writes its snapshots
+to shared memory, and the content index through its database on disk.
+Workers that exit are restarted, and their sessions forgotten by the proxy.
+A worker that keeps exiting soon after it starts is restarted with an
+exponentially growing delay, and after `_MAX_RESTARTS` such exits in a row
+the pool gives up and `serve` raises.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from mcp_fs.index.path_index import PathIndexClient, PathIndexPublisher
+from mcp_fs.utils import tracing
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+WORKER_HOST = "127.0.0.1"
+
+# tmpfs, so path index snapshots are written to and loaded from memory.
+_SHARED_MEMORY_DIR = "/dev/shm"
+_SESSION_ID = re.compile(rb"session_id=([0-9A-Za-z_-]+)")
+# The endpoint event opens the stream; stop looking for it after this many bytes.
+_SESSION_SNIFF_BYTES = 64 * 1024
+_CHUNK_SIZE = 64 * 1024
+_BACKLOG = 2048
+# How long to retry connecting to a worker that is starting or restarting.
+_CONNECT_TIMEOUT = 10.0
+_WATCH_INTERVAL = 1.0
+# A worker that exits within _STABLE_AFTER seconds of starting is restarted
+# after _RESTART_DELAY seconds, doubled for each such exit in a row up to
+# _MAX_RESTART_DELAY; once it has done so _MAX_RESTARTS times, the pool stops.
+_STABLE_AFTER = 30.0
+_RESTART_DELAY = 1.0
+_MAX_RESTART_DELAY = 60.0
+_MAX_RESTARTS = 5
+_BAD_GATEWAY = (
+    b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+)
+
+
+def _listen() -> socket.socket:
+    """Return a socket listening on a free port of WORKER_HOST."""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((WORKER_HOST, 0))
+    sock.listen(_BACKLOG)
+    return sock
+
+
+def _worker_kwargs(server_kwargs: Dict[str, Any], worker: int) -> Dict[str, Any]:
+    """Give each worker its own metrics port and trace file."""
+    kwargs = dict(server_kwargs)
+    if kwargs.get("metrics_port") is not None:
+        kwargs["metrics_port"] += worker
+    trace_file = kwargs.get("trace_file") or tracing.default_trace_file()
+    if trace_file is not None:
+        trace_file = Path(trace_file)
+        kwargs["trace_file"] = trace_file.with_name(
+            f"{trace_file.stem}.worker{worker}{trace_file.suffix}"
+        )
+    return kwargs
+
+
+def _run_worker(
+    server_kwargs: Dict[str, Any], sock: socket.socket, channel: Connection
+) -> None:
+    # The supervisor only proxies, so only workers load the server.
+    from easy_mcp.model import TransportType
+
+    from mcp_fs.server import FileSystemMCP
+
+    server = FileSystemMCP(
+        transport=TransportType("sse"),
+        host=WORKER_HOST,
+        port=sock.getsockname()[1],
+        path_index_client=PathIndexClient(channel),
+        **server_kwargs,
+    )
+    server.start(sock)
+
+
+class WorkerPool:
+    """Server processes, each serving its own listening socket, restarted when they exit."""
+
+    def __init__(
+        self,
+        workers: int,
+        server_kwargs: Dict[str, Any],
+        publisher: PathIndexPublisher,
+    ):
+        # Workers run process pools of their own, so they are started fresh
+        # rather than forked from a process running threads.
+        self.context = multiprocessing.get_context("spawn")
+        self.server_kwargs = server_kwargs
+        self.publisher = publisher
+        self.sockets = [_listen() for _ in range(workers)]
+        self.ports = [sock.getsockname()[1] for sock in self.sockets]
+        self.processes: List[Optional[multiprocessing.process.BaseProcess]] = [
+            None
+        ] * workers
+        self.publishers: List[Optional[threading.Thread]] = [None] * workers
+        # Called from the watch thread with the number of a worker that exited,
+        # and without arguments once the pool gives up.
+        self.on_exit: Optional[Callable[[int], None]] = None
+        self.on_failure: Optional[Callable[[], None]] = None
+        # Why the pool gave up, if it did
+        self.error: Optional[str] = None
+        self._started_at = [0.0] * workers
+        self._failures = [0] * workers
+        self._restart_at: List[Optional[float]] = [None] * workers
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        for worker in range(len(self.ports)):
+            self._spawn(worker)
+        threading.Thread(
+            target=self._watch, name="mcp-fs-worker-watch", daemon=True
+        ).start()
+
+    def _spawn(self, worker: int) -> None:
+        parent_end, child_end = self.context.Pipe()
+        process = self.context.Process(
+            target=_run_worker,
+            args=(
+                _worker_kwargs(self.server_kwargs, worker),
+                self.sockets[worker],
+                child_end,
+            ),
+            name=f"mcp-fs-worker-{worker}",
+        )
+        process.start()
+        child_end.close()
+        self.publishers[worker] = self.publisher.serve(parent_end)
+        self.processes[worker] = process
+        self._started_at[worker] = time.monotonic()
+        logger.info(
+            f"Started worker {worker} (pid {process.pid}) on port {self.ports[worker]}"
+        )
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(_WATCH_INTERVAL):
+            for worker, process in enumerate(self.processes):
+                restart_at = self._restart_at[worker]
+                if restart_at is not None:
+                    if time.monotonic() >= restart_at:
+                        self._restart_at[worker] = None
+                        self._spawn(worker)
+                    continue
+                if process is None or process.is_alive():
+                    continue
+                if not self._exited(worker, process):
+                    if self.on_failure is not None:
+                        self.on_failure()
+                    return
+
+    def _exited(
+        self, worker: int, process: multiprocessing.process.BaseProcess
+    ) -> bool:
+        """Schedule the restart of a worker that exited; return False to give up on the pool."""
+        # Its publisher thread sees the pipe close and ends.
+        publisher = self.publishers[worker]
+        if publisher is not None:
+            publisher.join(timeout=_WATCH_INTERVAL)
+        if self.on_exit is not None:
+            self.on_exit(worker)
+
+        if time.monotonic() - self._started_at[worker] >= _STABLE_AFTER:
+            self._failures[worker] = 0
+        else:
+            self._failures[worker] += 1
+        failures = self._failures[worker]
+        if failures > _MAX_RESTARTS:
+            self.error = (
+                f"Worker {worker} exited with code {process.exitcode} within "
+                f"{_STABLE_AFTER:g} seconds of starting {failures} times in a row."
+            )
+            logger.error(f"{self.error} Giving up.")
+            return False
+
+        delay = (
+            min(_RESTART_DELAY * 2 ** (failures - 1), _MAX_RESTART_DELAY)
+            if failures
+            else 0.0
+        )
+        logger.warning(
+            f"Worker {worker} exited with code {process.exitcode}; "
+            f"restarting it in {delay:g} seconds."
+        )
+        self._restart_at[worker] = time.monotonic() + delay
+        return True
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+        for sock in self.sockets:
+            sock.close()
+
+
+def _close_after(head: bytes) -> bytes:
+    """Rewrite a request head to ask for the connection to be closed once answered."""
+    request_line, *headers = head[:-4].split(b"\r\n")
+    headers = [
+        header for header in headers if not header.lower().startswith(b"connection:")
+    ]
+    return b"\r\n".join([request_line, *headers, b"Connection: close"]) + b"\r\n\r\n"
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while chunk := await reader.read(_CHUNK_SIZE):
+            writer.write(chunk)
+            await writer.drain()
+    except ConnectionError:
+        pass
+
+
+class SessionProxy:
+    """Forwards HTTP connections to worker ports, keeping each SSE session on its worker."""
+
+    def __init__(self, ports: List[int]):
+        self.ports = ports
+        self.connections = [0] * len(ports)
+        self.sessions: Dict[str, int] = {}
+
+    def forget_worker(self, worker: int) -> None:
+        """Drop the sessions of a worker that exited; their streams are gone with it."""
+        self.sessions = {
+            session_id: owner
+            for session_id, owner in self.sessions.items()
+            if owner != worker
+        }
+
+    def _pick(self, target: str) -> int:
+        session_ids = parse_qs(urlsplit(target).query).get("session_id")
+        if session_ids:
+            worker = self.sessions.get(session_ids[0])
+            if worker is not None:
+                return worker
+        return min(range(len(self.ports)), key=self.connections.__getitem__)
+
+    async def _connect(
+        self, worker: int
+    ) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        deadline = time.monotonic() + _CONNECT_TIMEOUT
+        while True:
+            try:
+                return await asyncio.open_connection(WORKER_HOST, self.ports[worker])
+            except OSError as e:
+                if time.monotonic() >= deadline:
+                    logger.error(f"Could not connect to worker {worker}: {e}")
+                    return None
+                await asyncio.sleep(0.1)
+
+    async def _relay(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        worker: int,
+        sniff: bool,
+    ) -> None:
+        """Copy a worker's response to the client, registering the session it opens, if any."""
+        session_id = None
+        seen = b""
+        try:
+            while chunk := await reader.read(_CHUNK_SIZE):
+                if sniff and session_id is None and len(seen) < _SESSION_SNIFF_BYTES:
+                    seen += chunk
+                    match = _SESSION_ID.search(seen)
+                    if match:
+                        session_id = match.group(1).decode("ascii")
+                        self.sessions[session_id] = worker
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            if session_id is not None:
+                self.sessions.pop(session_id, None)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ConnectionError,
+        ):
+            writer.close()
+            return
+
+        method, _, rest = head.split(b"\r\n", 1)[0].decode("latin-1").partition(" ")
+        target = rest.partition(" ")[0] or "/"
+        worker = self._pick(target)
+        self.connections[worker] += 1
+        try:
+            upstream = await self._connect(worker)
+            if upstream is None:
+                writer.write(_BAD_GATEWAY)
+                await writer.drain()
+                return
+            upstream_reader, upstream_writer = upstream
+            upstream_writer.write(_close_after(head))
+            forward = asyncio.create_task(_pipe(reader, upstream_writer))
+            try:
+                # Streams are opened by a GET without a session id.
+                sniff = method == "GET" and "session_id=" not in target
+                await self._relay(upstream_reader, writer, worker, sniff)
+            finally:
+                forward.cancel()
+                upstream_writer.close()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections[worker] -= 1
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(
+            f"Proxying http://{host}:{port} to {len(self.ports)} workers on ports {self.ports}"
+        )
+        async with server:
+            await server.serve_forever()
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+async def _serve_proxy(pool: WorkerPool, host: str, port: int) -> None:
+    """Run the proxy in front of `pool` until the pool gives up."""
+    loop = asyncio.get_running_loop()
+    proxy = SessionProxy(pool.ports)
+    serving = asyncio.create_task(proxy.serve(host, port))
+    pool.on_exit = lambda worker: loop.call_soon_threadsafe(proxy.forget_worker, worker)
+    pool.on_failure = lambda: loop.call_soon_threadsafe(serving.cancel)
+    try:
+        await serving
+    except asyncio.CancelledError:
+        if pool.error is None:
+            raise
+
+
+def serve(
+    workers: int,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    **server_kwargs: Any,
+) -> None:
+    """
+    Serve the SSE transport from `workers` server processes behind one address.
+
+    `server_kwargs` are passed on to every worker's `FileSystemMCP`; each
+    worker serves its metrics on `metrics_port` plus its number and writes
+    its spans to a trace file of its own. Blocks until interrupted, or
+    raises RuntimeError if a worker keeps exiting right after it starts.
+    """
+    host = host or os.getenv("FASTMCP_HOST", DEFAULT_HOST)
+    port = port or int(os.getenv("FASTMCP_PORT", DEFAULT_PORT))
+    shared_dir = _SHARED_MEMORY_DIR if os.path.isdir(_SHARED_MEMORY_DIR) else None
+    snapshot_dir = Path(tempfile.mkdtemp(prefix="mcp-fs-", dir=shared_dir))
+
+    pool = WorkerPool(workers, server_kwargs, PathIndexPublisher(snapshot_dir))
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        pool.start()
+        asyncio.run(_serve_proxy(pool, host, port))
+        if pool.error is not None:
+            raise RuntimeError(pool.error)
+    except KeyboardInterrupt:
+        logger.info("Stopping workers...")
+    finally:
+        pool.stop()
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from mcp_fs.index.search_cache import SearchResultCache
+from mcp_fs.tools.file_tools import FileService
+from mcp_fs.tools.search_tools import SearchService
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch) -> Path:
+    """An allowed directory, with content indexes kept out of the user cache."""
+    monkeypatch.setenv("MCP_FS_INDEX_DIR", str(tmp_path / "index"))
+    root = tmp_path / "root"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def services(root):
+    """A file and a search service wired together like the server wires them."""
+    search_cache = SearchResultCache()
+    search_service = SearchService([root], search_cache=search_cache)
+    file_service = FileService(
+        [root],
+        search_cache=search_cache,
+        on_file_changed=search_service.file_changed,
+    )
+    return file_service, search_service
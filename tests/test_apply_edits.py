@@ -0,0 +1,113 @@
+import difflib
+from asyncio import run
+
+import pytest
+
+from mcp_fs.tools.file_tools import FileService
+from mcp_fs.utils.edits import EditError
+
+
+@pytest.fixture
+def file_service(tmp_path):
+    return FileService([tmp_path])
+
+
+def test_pairs(tmp_path, file_service):
+    path = tmp_path / "config.py"
+    path.write_text("DEBUG = True\nNAME = 'a'\nPORT = 80\n")
+
+    result = run(
+        file_service.apply_edits(
+            str(path),
+            edits=[
+                {"old_text": "DEBUG = True", "new_text": "DEBUG = False"},
+                ["PORT = 80", "PORT = 8080"],
+            ],
+        )
+    )
+
+    assert result["edits_applied"] == 2
+    assert path.read_text() == "DEBUG = False\nNAME = 'a'\nPORT = 8080\n"
+    assert result["file_size"] == path.stat().st_size
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [{"old_text": "missing", "new_text": "x"}],
+        [{"old_text": "a", "new_text": "x"}],
+        [["one", "1"], ["one two", "12"]],
+        [{"old_text": "", "new_text": "x"}],
+    ],
+)
+def test_pairs_that_do_not_apply_leave_the_file_untouched(
+    tmp_path, file_service, edits
+):
+    path = tmp_path / "file.txt"
+    path.write_text("one two\nabc\na\n")
+
+    with pytest.raises(EditError):
+        run(file_service.apply_edits(str(path), edits=edits))
+    assert path.read_text() == "one two\nabc\na\n"
+
+
+def test_unified_diff(tmp_path, file_service):
+    old = "".join(f"line {i}\n" for i in range(1, 21))
+    new = old.replace("line 3\n", "line three\n").replace(
+        "line 17\n", "line 17\nline 17.5\n"
+    )
+    path = tmp_path / "file.txt"
+    path.write_text(old)
+    diff = "".join(
+        difflib.unified_diff(
+            old.splitlines(keepends=True), new.splitlines(keepends=True), "a", "b", n=1
+        )
+    )
+
+    result = run(file_service.apply_edits(str(path), diff=diff))
+
+    assert result["edits_applied"] == 2
+    assert path.read_text() == new
+
+
+def test_unified_diff_without_newline_at_end_of_file(tmp_path, file_service):
+    path = tmp_path / "file.txt"
+    path.write_text("first\nlast")
+    diff = (
+        "--- a/file.txt\n"
+        "+++ b/file.txt\n"
+        "@@ -1,2 +1,2 @@\n"
+        " first\n"
+        "-last\n"
+        "\\ No newline at end of file\n"
+        "+final\n"
+        "\\ No newline at end of file\n"
+    )
+
+    run(file_service.apply_edits(str(path), diff=diff))
+
+    assert path.read_text() == "first\nfinal"
+
+
+def test_unified_diff_adding_newline_at_end_of_file(tmp_path, file_service):
+    path = tmp_path / "file.txt"
+    path.write_text("first\nlast")
+    diff = "@@ -2 +2 @@\n" "-last\n" "\\ No newline at end of file\n" "+last\n"
+
+    run(file_service.apply_edits(str(path), diff=diff))
+
+    assert path.read_text() == "first\nlast\n"
+
+
+def test_edits_and_diff_are_exclusive(tmp_path, file_service):
+    path = tmp_path / "file.txt"
+    path.write_text("text\n")
+
+    with pytest.raises(EditError):
+        run(file_service.apply_edits(str(path)))
+    with pytest.raises(EditError):
+        run(
+            file_service.apply_edits(
+                str(path), edits=[["text", "x"]], diff="@@ -1 +1 @@\n-text\n+x\n"
+            )
+        )
@@ -0,0 +1,39 @@
+import os
+
+from mcp_fs.utils.atomic_write import atomic_write
+
+
+def test_new_file_gets_the_current_umask(tmp_path):
+    path = tmp_path / "new.txt"
+    previous = os.umask(0o077)
+    try:
+        atomic_write(path, b"new")
+    finally:
+        os.umask(previous)
+
+    assert path.read_bytes() == b"new"
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_existing_file_keeps_its_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_bytes(b"old")
+    path.chmod(0o750)
+
+    atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert path.stat().st_mode & 0o777 == 0o750
+
+
+def test_symlink_is_kept_and_its_target_replaced(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_bytes(b"old")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    atomic_write(link, b"new")
+
+    assert link.is_symlink()
+    assert target.read_bytes() == b"new"
+    assert sorted(os.listdir(tmp_path)) == ["link.txt", "target.txt"]
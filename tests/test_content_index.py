@@ -0,0 +1,83 @@
+import pytest
+
+from mcp_fs.index import content_index
+from mcp_fs.index.content_index import ContentIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    index = ContentIndex(root, index_dir=tmp_path / "index", max_file_size=1024)
+    yield index
+    index.close()
+
+
+def write(index, rel_path, content):
+    path = index.root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def test_candidates_are_the_files_with_every_trigram(index):
+    write(index, "a.txt", "the needle is here")
+    write(index, "b.txt", "needs no needle")
+    write(index, "c.txt", "nothing to see")
+    write(index, "large.txt", "x" * 2048)
+    index.refresh(force=True)
+
+    assert sorted(index.candidates("needle")) == ["a.txt", "b.txt", "large.txt"]
+    assert sorted(index.candidates("see")) == ["c.txt", "large.txt"]
+    assert index.candidates("absent") == ["large.txt"]
+
+
+def test_candidates_below_a_target(index):
+    write(index, "a/needle.txt", "needle")
+    write(index, "ab/needle.txt", "needle")
+    write(index, "a/b/needle.txt", "needle")
+    index.refresh(force=True)
+
+    assert sorted(index.candidates("needle", "a")) == ["a/b/needle.txt", "a/needle.txt"]
+    assert index.candidates("needle", "a/needle.txt") == ["a/needle.txt"]
+    assert sorted(index.candidates("", "a")) == ["a/b/needle.txt", "a/needle.txt"]
+
+
+def test_removed_files_are_no_candidates(index):
+    write(index, "a.txt", "needle")
+    index.refresh(force=True)
+    (index.root / "a.txt").unlink()
+    index.refresh(force=True)
+
+    assert index.candidates("needle") == []
+
+
+def test_search_folds_non_ascii_case(index):
+    write(index, "upper.txt", "STRASSE ÉTÉ ÅNGSTRÖM")
+    write(index, "lower.txt", "été")
+    write(index, "other.txt", "ete")
+
+    assert sorted(index.search("été")) == [
+        str(index.root / "lower.txt"),
+        str(index.root / "upper.txt"),
+    ]
+    assert index.search("ångström") == [str(index.root / "upper.txt")]
+
+
+def test_search_folds_characters_split_between_chunks(index, monkeypatch):
+    monkeypatch.setattr(content_index, "_READ_CHUNK_SIZE", 4)
+    write(index, "large.txt", "abÉTÉ" * 300)
+
+    assert index.search("été") == [str(index.root / "large.txt")]
+
+
+def test_walk_of_root_with_trailing_separator(tmp_path):
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "a.txt").write_text("needle")
+    index = ContentIndex(root, index_dir=tmp_path / "index")
+    # A root of "/" is the one path that keeps its separator.
+    index.root = str(root) + "/"
+    try:
+        assert [rel_path for rel_path, _ in index._walk(str(root))] == ["sub/a.txt"]
+    finally:
+        index.close()
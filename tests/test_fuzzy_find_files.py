@@ -0,0 +1,24 @@
+from asyncio import run
+
+import pytest
+
+
+def test_best_match_comes_first(root, services):
+    _, search_service = services
+    (root / "src").mkdir()
+    (root / "src" / "directory_tools.py").write_text("")
+    (root / "src" / "data.py").write_text("")
+
+    matches = run(search_service.fuzzy_find_files(root, "dirtool"))
+
+    assert [match["path"] for match in matches] == [
+        str(root / "src" / "directory_tools.py")
+    ]
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_invalid_limit_is_rejected(root, services, limit):
+    _, search_service = services
+
+    with pytest.raises(ValueError, match="limit must be at least 1"):
+        run(search_service.fuzzy_find_files(root, "a", limit=limit))
@@ -0,0 +1,151 @@
+import os
+from asyncio import run
+
+import pytest
+
+from mcp_fs.index.tree_watcher import DirectoryTree
+from mcp_fs.tools.directory_tools import DirectoryService
+from mcp_fs.utils.ignore import IgnoreScope, scope_for, walk
+
+
+def write(path, content=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def walked(top, scope=None):
+    files = []
+    for dir_path, dirs, others in walk(str(top), scope):
+        files.extend(os.path.relpath(entry.path, top) for entry in others)
+    return sorted(path.replace(os.sep, "/") for path in files)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git").mkdir()
+    write(
+        tmp_path / ".gitignore",
+        "*.gen\n"
+        "!keep.gen\n"
+        "/output/\n"
+        "cache/\n"
+        "docs/*.draft\n"
+        "# a comment\n"
+        "\\#hash\n",
+    )
+    write(tmp_path / "src" / ".gitignore", "util.py\n!other.gen\n")
+    write(tmp_path / "src" / "main.py")
+    write(tmp_path / "src" / "util.py")
+    write(tmp_path / "src" / "debug.gen")
+    write(tmp_path / "src" / "keep.gen")
+    write(tmp_path / "src" / "other.gen")
+    write(tmp_path / "output" / "a.o")
+    write(tmp_path / "src" / "output" / "generated.py")
+    write(tmp_path / "src" / "cache" / "entry")
+    write(tmp_path / "cache")
+    write(tmp_path / "docs" / "notes.draft")
+    write(tmp_path / "docs" / "deep" / "notes.draft")
+    write(tmp_path / "#hash")
+    write(tmp_path / "node_modules" / "dep" / "index.js")
+    return tmp_path
+
+
+def test_walk_applies_gitignore_rules(repo):
+    assert walked(repo) == [
+        ".gitignore",
+        "cache",
+        "docs/deep/notes.draft",
+        "src/.gitignore",
+        "src/keep.gen",
+        "src/main.py",
+        "src/other.gen",
+        "src/output/generated.py",
+    ]
+
+
+def test_walking_a_subdirectory_applies_the_rules_of_its_parents(repo):
+    assert walked(repo / "src") == [
+        ".gitignore",
+        "keep.gen",
+        "main.py",
+        "other.gen",
+        "output/generated.py",
+    ]
+
+
+def test_gitignore_can_be_disabled(repo):
+    files = walked(repo, scope_for(str(repo), use_gitignore=False))
+
+    assert "src/debug.gen" in files
+    assert "src/util.py" in files
+    assert "output/a.o" in files
+    assert "#hash" in files
+    # The global ignore list still applies.
+    assert not any(path.startswith("node_modules/") for path in files)
+
+
+def test_ignored_directories_are_pruned(repo, monkeypatch):
+    scanned = []
+    scandir = os.scandir
+
+    def recording_scandir(path):
+        scanned.append(os.path.relpath(path, repo))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    walked(repo)
+
+    assert "output" not in scanned
+    assert "node_modules" not in scanned
+    assert "src/cache" not in scanned
+    assert "src/output" in scanned
+
+
+def test_changed_gitignore_is_reloaded(repo):
+    assert "src/debug.gen" not in walked(repo)
+
+    stat = os.stat(repo / ".gitignore")
+    (repo / ".gitignore").write_text("/output/\n")
+    os.utime(repo / ".gitignore", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert "src/debug.gen" in walked(repo)
+
+
+def test_scope_without_gitignore_files(tmp_path):
+    write(tmp_path / "a.txt")
+    write(tmp_path / "__pycache__" / "a.pyc")
+
+    assert walked(tmp_path, IgnoreScope()) == ["a.txt"]
+
+
+def test_directory_tools_skip_gitignored_directories(repo):
+    service = DirectoryService([repo])
+
+    listed = run(service.list_directory_detailed(repo, depth=3, sort_by="name"))
+    paths = [entry["path"].replace(os.sep, "/") for entry in listed]
+    assert "output" in paths
+    assert "output/a.o" not in paths
+    assert "src/output/generated.py" in paths
+
+    tree = run(service.directory_tree(repo, depth=1))
+    children = {child["name"]: child for child in tree["children"]}
+    assert "output" not in children
+    assert children["src"]["files"] == 5
+
+
+def test_watched_tree_skips_gitignored_directories(repo):
+    tree = DirectoryTree(repo)
+    tree.scan(str(repo))
+
+    assert not tree.is_tracked(str(repo / "output"))
+    assert tree.is_tracked(str(repo / "src" / "output"))
+    assert sorted(tree.find_files(str(repo / "src"), ".gen")) == [
+        str(repo / "src" / "keep.gen"),
+        str(repo / "src" / "other.gen"),
+    ]
+
+    (repo / "src" / ".gitignore").write_text("util.py\n")
+    tree.rescan_directory(str(repo / "src"))
+    assert tree.find_files(str(repo / "src"), ".gen") == [
+        str(repo / "src" / "keep.gen")
+    ]
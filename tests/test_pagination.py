@@ -0,0 +1,137 @@
+from asyncio import run
+
+import pytest
+
+from mcp_fs.tools.search_tools import SearchService
+from mcp_fs.utils.pagination import CursorStore, InvalidCursorError
+
+
+class Walk:
+    """An iterator over a range that records whether it was closed."""
+
+    def __init__(self, count: int):
+        self.items = iter(range(count))
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.items)
+
+    def close(self):
+        self.closed = True
+
+
+def pages(store, request_key, start, limit):
+    cursor = None
+    while True:
+        page = store.page(request_key, start, limit=limit, cursor=cursor)
+        yield page
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def test_pages_resume_the_walk():
+    store = CursorStore()
+    starts = []
+
+    def start():
+        starts.append(1)
+        return range(10)
+
+    results = list(pages(store, "key", start, limit=4))
+
+    assert [page["results"] for page in results] == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8, 9],
+    ]
+    assert [page["truncated"] for page in results] == [True, True, False]
+    assert len(starts) == 1
+
+
+def test_exact_multiple_of_the_limit_ends_without_an_empty_page():
+    results = list(pages(CursorStore(), "key", lambda: range(8), limit=4))
+
+    assert [page["results"] for page in results] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_exhausted_walk_is_closed():
+    walk = Walk(3)
+
+    page = CursorStore().page("key", lambda: walk, limit=5)
+
+    assert page["next_cursor"] is None
+    assert walk.closed
+
+
+def test_expired_cursor_is_rejected_and_closed():
+    store = CursorStore(ttl=0)
+    walk = Walk(10)
+    page = store.page("key", lambda: walk, limit=2)
+
+    with pytest.raises(InvalidCursorError):
+        store.page("key", lambda: walk, limit=2, cursor=page["next_cursor"])
+    assert walk.closed
+
+
+def test_least_recently_used_walk_is_evicted():
+    store = CursorStore(max_entries=1)
+    first_walk, second_walk = Walk(10), Walk(10)
+    first = store.page("first", lambda: first_walk, limit=2)
+    second = store.page("second", lambda: second_walk, limit=2)
+
+    assert first_walk.closed
+    with pytest.raises(InvalidCursorError):
+        store.page("first", lambda: first_walk, limit=2, cursor=first["next_cursor"])
+    page = store.page(
+        "second", lambda: second_walk, limit=2, cursor=second["next_cursor"]
+    )
+    assert page["results"] == [2, 3]
+
+
+def test_cursor_of_another_request_is_rejected():
+    store = CursorStore()
+    page = store.page("key", lambda: range(10), limit=2)
+
+    with pytest.raises(InvalidCursorError):
+        store.page("other", lambda: range(10), limit=2, cursor=page["next_cursor"])
+    # The cursor is spent.
+    with pytest.raises(InvalidCursorError):
+        store.page("key", lambda: range(10), limit=2, cursor=page["next_cursor"])
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_invalid_limit(limit):
+    with pytest.raises(ValueError):
+        CursorStore().page("key", lambda: range(10), limit=limit)
+
+
+def test_search_tool_pages(tmp_path):
+    for i in range(25):
+        (tmp_path / f"match_{i:02}.txt").write_text("")
+    (tmp_path / "other.txt").write_text("")
+    search_service = SearchService([tmp_path])
+
+    results = []
+    cursor = None
+    while True:
+        page = run(
+            search_service.find_files_with_substring_in_path(
+                tmp_path, "match_", limit=10, cursor=cursor
+            )
+        )
+        results.extend(page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(results) == [str(tmp_path / f"match_{i:02}.txt") for i in range(25)]
+    with pytest.raises(InvalidCursorError):
+        run(
+            search_service.find_files_with_substring_in_path(
+                tmp_path, "other", limit=10, cursor="unknown"
+            )
+        )
@@ -0,0 +1,148 @@
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from mcp_fs.search.patterns import (
+    compile_bre,
+    compile_pattern,
+    is_literal,
+    translate_bre,
+)
+
+
+LINES = [
+    "foo bar baz",
+    "foobar",
+    "aa aaa aaaa",
+    "abab ab",
+    "x|y",
+    "price: $42",
+    "end$",
+    "*star",
+    "a.b axb",
+    "tab\there",
+    "[bracket] x]",
+    "word words sword",
+    "digits 12345",
+    "UPPER lower",
+    "back\\slash",
+    "(parens) {braces}",
+    "^caret",
+    "",
+]
+
+PATTERNS = [
+    "foo",
+    "foo.*baz",
+    "^foo",
+    "bar$",
+    "^$",
+    "a\\{3\\}",
+    "a\\{2,3\\}",
+    "\\(ab\\)\\+",
+    "\\(ab\\)\\1",
+    "x\\|y",
+    "x|y",
+    "a\\?b",
+    "[[:digit:]]\\+",
+    "[[:upper:]]\\{5\\}",
+    "[^a-z ]",
+    "[]x]",
+    "[a.]b",
+    "a\\.b",
+    "\\$4",
+    "$4",
+    "end\\$",
+    "end$",
+    "*star",
+    "^*",
+    "a*",
+    "\\<word\\>",
+    "\\bsword",
+    "\\w\\+s\\b",
+    "\\s",
+    "(parens)",
+    "{braces}",
+    "back\\\\slash",
+    "\\^caret",
+    "^^",
+    "upper",
+]
+
+
+@pytest.fixture(scope="module")
+def lines_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("patterns") / "lines.txt"
+    path.write_text("".join(line + "\n" for line in LINES), encoding="utf-8")
+    return path
+
+
+@pytest.mark.skipif(shutil.which("grep") is None, reason="grep is not installed")
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_translate_bre_matches_like_grep(lines_file, pattern):
+    grep = subprocess.run(
+        ["grep", "-n", "-i", "-e", pattern, str(lines_file)],
+        capture_output=True,
+        text=True,
+    )
+    assert grep.returncode in (0, 1), grep.stderr
+    expected = [int(line.split(":", 1)[0]) for line in grep.stdout.splitlines()]
+
+    regex = compile_bre(pattern)
+    matched = [
+        number
+        for number, line in enumerate(LINES, 1)
+        if regex.search(line.encode("utf-8"))
+    ]
+    assert matched == expected
+
+
+def search(compiled, text):
+    data = text.encode("utf-8")
+    if compiled.regex is None:
+        return compiled.literal in data.lower()
+    return compiled.regex.search(data) is not None
+
+
+def test_unterminated_bracket_is_an_error():
+    with pytest.raises(re.error):
+        translate_bre("[abc")
+
+
+@pytest.mark.parametrize(
+    "pattern, literal",
+    [("foo bar", True), ("x|y", True), ("a.b", False), ("a*", False), ("$", False)],
+)
+def test_is_literal(pattern, literal):
+    assert is_literal(pattern) is literal
+
+
+@pytest.mark.parametrize(
+    "pattern, mode, text",
+    [
+        ("café", "literal", "CAFÉ au lait"),
+        ("CAFÉ", "grep", "un café"),
+        ("é+t", "regex", "ÉéÉt"),
+        ("straße*", "glob", "STRAßE 1"),
+    ],
+)
+def test_non_ascii_letters_match_in_either_case(pattern, mode, text):
+    assert search(compile_pattern(pattern, mode), text)
+
+
+@pytest.mark.parametrize("mode", ["grep", "regex", "glob"])
+def test_non_ascii_in_brackets_is_an_error(mode):
+    with pytest.raises(re.error, match="non-ASCII"):
+        compile_pattern("[éè]", mode)
+
+
+@pytest.mark.parametrize(
+    "pattern, mode", [("a[^x]b", "grep"), ("a[^x]b", "regex"), ("a[!x]b", "glob")]
+)
+def test_negated_brackets_do_not_match_newlines(pattern, mode):
+    compiled = compile_pattern(pattern, mode)
+
+    assert not search(compiled, "a\nb")
+    assert search(compiled, "a-b")
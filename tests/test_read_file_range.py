@@ -0,0 +1,97 @@
+import base64
+from asyncio import run
+
+import pytest
+
+from mcp_fs.tools.file_tools import FileService
+
+
+CONTENT = "x" * 5000 + "\nshort\n" + "é" * 80 + "\n\nlast"
+
+
+@pytest.fixture
+def file_service(root):
+    return FileService([root])
+
+
+@pytest.fixture
+def path(root):
+    path = root / "lines.txt"
+    path.write_text(CONTENT, encoding="utf-8")
+    return path
+
+
+def test_line_pages_reach_eof(file_service, path):
+    pages = []
+    line = 1
+    while True:
+        window = run(
+            file_service.read_file_range(
+                str(path), start_line=line, line_count=1, length=101
+            )
+        )
+        assert window["next_line"] > line
+        pages.append(window)
+        line = window["next_line"]
+        if window["eof"]:
+            break
+
+    assert len(pages) == 5
+    assert pages[0]["line_truncated"]
+    assert pages[0]["content"] == "x" * 101
+    assert [page["content"] for page in pages[1:]] == [
+        "short\n",
+        "é" * 50,
+        "\n",
+        "last",
+    ]
+
+
+def test_line_windows_do_not_split_characters(file_service, path):
+    window = run(file_service.read_file_range(str(path), start_line=3, length=101))
+
+    assert window["content"] == "é" * 50
+    assert window["bytes_read"] == 100
+    assert window["line_truncated"]
+
+
+def test_line_window_with_several_lines(file_service, path):
+    window = run(file_service.read_file_range(str(path), start_line=2, line_count=3))
+
+    assert window["content"] == "short\n" + "é" * 80 + "\n\n"
+    assert window["next_line"] == 5
+    assert not window["truncated"]
+    assert not window["eof"]
+
+
+@pytest.mark.parametrize("length", [1, 7, 100, 4096])
+def test_byte_pages_reassemble_the_file(file_service, path, length):
+    parts = []
+    offset = 0
+    while True:
+        window = run(
+            file_service.read_file_range(
+                str(path), offset=offset, length=length, encoding="base64"
+            )
+        )
+        assert window["offset"] == offset
+        parts.append(base64.b64decode(window["content"]))
+        offset = window["next_offset"]
+        if window["eof"]:
+            break
+
+    assert b"".join(parts) == path.read_bytes()
+    assert offset == window["file_size"]
+
+
+def test_text_byte_pages_reassemble_the_file(file_service, path):
+    parts = []
+    offset = 0
+    while True:
+        window = run(file_service.read_file_range(str(path), offset=offset, length=7))
+        parts.append(window["content"])
+        offset = window["next_offset"]
+        if window["eof"]:
+            break
+
+    assert "".join(parts) == CONTENT
@@ -0,0 +1,177 @@
+import itertools
+import os
+import time
+
+import pytest
+
+from mcp_fs.index.search_cache import SearchResultCache
+
+
+_ticks = itertools.count(1)
+
+
+def age(path, seconds=60):
+    """Move the mtime of `path` out of the racy window, to a time not used before."""
+    mtime_ns = time.time_ns() - seconds * 1_000_000_000 + next(_ticks)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file.txt").write_text(name)
+        age(tmp_path / name)
+    age(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def cache():
+    # Recompute digests on every lookup instead of once per second.
+    return SearchResultCache(check_interval=0)
+
+
+def cached(cache, path, key):
+    return cache.get(key, cache.digest(str(path)))
+
+
+def store(cache, path, key, results, max_age=None):
+    cache.put(key, cache.digest(str(path)), results, max_age=max_age)
+
+
+def test_unchanged_tree_hits(tree, cache):
+    store(cache, tree, "root", ["x"])
+
+    assert cached(cache, tree, "root") == ["x"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_new_file_invalidates_the_subtrees_containing_it(tree, cache):
+    for path in (tree, tree / "a", tree / "b"):
+        store(cache, path, str(path), [str(path)])
+
+    (tree / "a" / "new.txt").write_text("new")
+    age(tree / "a")
+
+    assert cached(cache, tree, str(tree)) is None
+    assert cached(cache, tree / "a", str(tree / "a")) is None
+    assert cached(cache, tree / "b", str(tree / "b")) == [str(tree / "b")]
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_removed_directory_invalidates_its_parent(tree, cache):
+    store(cache, tree, "root", ["x"])
+
+    (tree / "b" / "file.txt").unlink()
+    (tree / "b").rmdir()
+    age(tree)
+
+    assert cached(cache, tree, "root") is None
+
+
+def test_touch_invalidates_in_place_writes(tree, cache):
+    store(cache, tree / "a", "a", ["x"])
+    store(cache, tree / "b", "b", ["y"])
+
+    # Rewriting a file in place leaves its directory's mtime alone.
+    (tree / "a" / "file.txt").write_text("A")
+    assert cached(cache, tree / "a", "a") == ["x"]
+
+    cache.touch(str(tree / "a" / "file.txt"))
+
+    assert cached(cache, tree / "a", "a") is None
+    assert cached(cache, tree / "b", "b") == ["y"]
+
+
+def test_touch_rechecks_without_waiting_for_the_interval(tree):
+    cache = SearchResultCache(check_interval=3600)
+    store(cache, tree, "root", ["x"])
+    (tree / "a" / "new.txt").write_text("new")
+    age(tree / "a")
+    assert cached(cache, tree, "root") == ["x"]
+
+    cache.touch(str(tree / "a" / "new.txt"))
+
+    assert cached(cache, tree, "root") is None
+
+
+def test_recently_modified_subtree_is_not_cached(tree, cache):
+    (tree / "a" / "new.txt").write_text("new")
+
+    assert cache.digest(str(tree / "a")) is None
+    assert cache.digest(str(tree)) is None
+    assert cache.digest(str(tree / "b")) is not None
+    store(cache, tree / "a", "a", ["x"])
+    assert cache.stats()["entries"] == 0
+
+
+def test_generation_advances_when_the_root_changes(tree, cache):
+    cache.digest(str(tree))
+    generation = cache.generation(str(tree))
+
+    cache.digest(str(tree))
+    assert cache.generation(str(tree)) == generation
+
+    (tree / "c").mkdir()
+    age(tree / "c")
+    age(tree)
+    cache.digest(str(tree))
+    assert cache.generation(str(tree)) == generation + 1
+
+
+def test_only_directories_of_the_searched_subtree_are_read(tree, cache, monkeypatch):
+    stated, scanned = [], []
+    stat, scandir = os.stat, os.scandir
+
+    def recording_stat(path, *args, **kwargs):
+        stated.append(os.fspath(path))
+        return stat(path, *args, **kwargs)
+
+    def recording_scandir(path):
+        scanned.append(os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "stat", recording_stat)
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    cache.digest(str(tree / "a"))
+
+    assert scanned == [str(tree / "a")]
+    assert str(tree / "a" / "file.txt") not in stated
+    assert not any(path.startswith(str(tree / "b")) for path in stated)
+
+
+def test_listings_are_bounded(tree):
+    cache = SearchResultCache(max_listings=2, check_interval=0)
+    store(cache, tree, "root", ["x"])
+
+    assert cache.stats()["listings"] == 2
+    # The evicted listing is read again under a new stamp, which only costs a miss.
+    assert cached(cache, tree, "root") is None
+    assert cache.stats()["listings"] == 2
+
+
+def test_results_expire_after_max_age(tree, cache):
+    store(cache, tree, "root", ["x"], max_age=0)
+    time.sleep(0.01)
+
+    assert cached(cache, tree, "root") is None
+
+
+def test_least_recently_used_results_are_evicted(tree):
+    cache = SearchResultCache(max_entries=2, check_interval=0)
+    store(cache, tree, "first", ["1"])
+    store(cache, tree, "second", ["2"])
+    assert cached(cache, tree, "first") == ["1"]
+    store(cache, tree, "third", ["3"])
+
+    assert cached(cache, tree, "second") is None
+    assert cached(cache, tree, "first") == ["1"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_large_results_are_not_cached(tree):
+    cache = SearchResultCache(max_results=2, check_interval=0)
+    store(cache, tree, "large", ["1", "2", "3"])
+
+    assert cached(cache, tree, "large") is None
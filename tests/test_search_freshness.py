@@ -0,0 +1,59 @@
+from asyncio import run
+
+import pytest
+
+
+def search(search_service, path, text, mode="literal"):
+    return run(search_service.search_file_bodies_for_substring(path, text, mode=mode))
+
+
+@pytest.mark.parametrize("mode", ["literal", "grep"])
+def test_written_file_is_found_at_once(root, services, mode):
+    file_service, search_service = services
+    (root / "old.txt").write_text("hello world\n")
+    assert search(search_service, root, "needle", mode) == []
+
+    run(file_service.write_file(str(root / "new.txt"), "a needle here\n"))
+    (root / "sub").mkdir()
+    run(file_service.write_file(str(root / "sub" / "deep.txt"), "another needle\n"))
+
+    found = search(search_service, root, "needle", mode)
+    assert sorted(found) == sorted(
+        [str(root / "new.txt"), str(root / "sub" / "deep.txt")]
+    )
+    assert search(search_service, root / "sub", "needle", mode) == [
+        str(root / "sub" / "deep.txt")
+    ]
+
+
+def test_rewritten_and_appended_files_are_reread(root, services):
+    file_service, search_service = services
+    run(file_service.write_file(str(root / "a.txt"), "needle\n"))
+    assert search(search_service, root, "needle") == [str(root / "a.txt")]
+
+    # Same size, so only the server's own report of the write can reveal it.
+    run(file_service.write_file(str(root / "a.txt"), "pinned\n"))
+    assert search(search_service, root, "needle") == []
+    assert search(search_service, root, "pinned") == [str(root / "a.txt")]
+
+    run(file_service.append_to_file(str(root / "a.txt"), "haystack\n"))
+    assert search(search_service, root, "haystack") == [str(root / "a.txt")]
+
+
+def test_ignored_files_stay_out_of_results(root, services):
+    file_service, search_service = services
+    (root / "node_modules").mkdir()
+    assert search(search_service, root, "needle") == []
+
+    run(file_service.write_file(str(root / "node_modules" / "dep.js"), "needle\n"))
+    assert search(search_service, root, "needle") == []
+
+
+def test_external_writes_are_found_after_the_refresh_interval(root, services):
+    _, search_service = services
+    assert search(search_service, root, "outsider") == []
+    for content_index in search_service._content_indexes.values():
+        content_index.refresh_interval = 0
+
+    (root / "external.txt").write_text("outsider\n")
+    assert search(search_service, root, "outsider") == [str(root / "external.txt")]
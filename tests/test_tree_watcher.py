@@ -0,0 +1,59 @@
+from asyncio import run
+
+import pytest
+
+from mcp_fs.index.tree_watcher import TreeWatcher
+from mcp_fs.search.content_search import SearchTimeoutError
+from mcp_fs.tools.search_tools import SearchService
+
+
+def write(path, content=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git").mkdir()
+    write(tmp_path / ".gitignore", "*.gen\n/output/\n")
+    write(tmp_path / "src" / ".gitignore", "secret_*\n")
+    write(tmp_path / "src" / "match_main.py")
+    write(tmp_path / "src" / "match_table.gen")
+    write(tmp_path / "src" / "secret_match.txt")
+    write(tmp_path / "output" / "match_build.txt")
+    write(tmp_path / "docs" / "match_notes.md")
+    write(tmp_path / "node_modules" / "match_dep.js")
+    return tmp_path
+
+
+@pytest.fixture
+def watcher(repo):
+    watcher = TreeWatcher([repo], use_inotify=False)
+    watcher.start()
+    assert watcher.wait_until_ready(timeout=10)
+    yield watcher
+    watcher.stop()
+
+
+def find(search_service, path, substring, **kwargs):
+    return sorted(
+        run(search_service.find_files_with_substring_in_path(path, substring, **kwargs))
+    )
+
+
+@pytest.mark.parametrize("subdir", ["", "src"])
+def test_watched_search_skips_what_the_walk_skips(repo, watcher, subdir):
+    walked = find(SearchService([repo]), repo / subdir, "match")
+    watched = find(SearchService([repo], tree_watcher=watcher), repo / subdir, "match")
+
+    assert watched == walked
+    assert str(repo / "src" / "match_main.py") in watched
+    assert str(repo / "src" / "match_table.gen") not in watched
+    assert str(repo / "src" / "secret_match.txt") not in watched
+
+
+def test_watched_search_times_out(repo, watcher):
+    search_service = SearchService([repo], tree_watcher=watcher)
+
+    with pytest.raises(SearchTimeoutError):
+        run(search_service.find_files_with_substring_in_path(repo, "match", timeout=0))
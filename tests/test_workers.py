@@ -0,0 +1,45 @@
+import time
+
+from mcp_fs import workers
+from mcp_fs.index.path_index import PathIndexPublisher
+from mcp_fs.workers import SessionProxy, WorkerPool
+
+
+def test_worker_crashing_on_start_is_retried_with_backoff_then_given_up(
+    tmp_path, monkeypatch, caplog
+):
+    monkeypatch.setattr(workers, "_WATCH_INTERVAL", 0.05)
+    monkeypatch.setattr(workers, "_RESTART_DELAY", 0.1)
+    monkeypatch.setattr(workers, "_MAX_RESTARTS", 2)
+    # FileSystemMCP rejects the argument, so the worker exits as it starts.
+    pool = WorkerPool(1, {"no_such_argument": True}, PathIndexPublisher(tmp_path))
+    exits, failed = [], []
+    pool.on_exit = exits.append
+    pool.on_failure = lambda: failed.append(True)
+
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        while not failed and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+
+    assert failed
+    assert "exited with code 1" in pool.error
+    assert exits == [0, 0, 0]
+    assert [
+        record.getMessage().rpartition(" in ")[2]
+        for record in caplog.records
+        if "restarting" in record.getMessage()
+    ] == ["0.1 seconds.", "0.2 seconds."]
+    assert not any(thread.is_alive() for thread in pool.publishers)
+
+
+def test_exited_worker_sessions_are_forgotten():
+    proxy = SessionProxy([1, 2])
+    proxy.sessions = {"a": 0, "b": 1, "c": 0}
+
+    proxy.forget_worker(0)
+
+    assert proxy.sessions == {"b": 1}